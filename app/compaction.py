@@ -0,0 +1,208 @@
+"""
+compaction.py — Keeps the timeblock table small.
+
+Run with:  python -m app.compaction                      (merge adjacent blocks)
+           python -m app.compaction --archive-months 6   (and archive older history)
+
+Merging joins blocks of the same task that follow each other on the timeline within one
+effective day, when the gap between them is at most COMPACTION_GAP_SECONDS. Archiving
+replaces every block older than N whole months with one ArchivedDay row per task and
+effective day; analytics reads both tables, so reports don't change. Finally, change-log
+entries for rows deleted more than CHANGELOG_RETENTION_DAYS ago are dropped and, on
+Postgres, upcoming timeblock partitions are created (see app.partitions).
+
+Both work one user and month at a time, each in its own transaction under that user's
+lock_timeline, with days and months following the user's day start (app.services.settings).
+A user's current effective day is never touched, since the timer may still be writing to it.
+The CLI compacts every user; POST /system/compact only the caller, and leaves the shared
+change log and partitions to the CLI.
+"""
+import argparse
+from datetime import datetime, timedelta
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlmodel import Session, select, delete, func
+
+from app import partitions
+from app.core import changelog
+from app.core.config import ARCHIVE_AFTER_MONTHS, CHANGELOG_RETENTION_DAYS, COMPACTION_GAP_SECONDS
+from app.core.events import record_deleted, record_rewritten
+from app.core.timebuckets import UserClock, bucket_start, duration_minutes
+from app.database import dialect_insert, lock_timeline
+from app.models import ArchivedDay, TimeBlock
+from app.schemas import CompactionReport
+from app.services.settings import all_clocks, get_clock
+
+
+def _month_windows(session: Session, before: datetime, owner_id: int, clock: UserClock) -> Iterator[Tuple[datetime, datetime]]:
+    """[start, end) of each of the user's effective months holding their blocks that start before `before`, oldest first."""
+    oldest = session.exec(
+        select(func.min(TimeBlock.start_time)).where(TimeBlock.owner_id == owner_id, TimeBlock.start_time < before)
+    ).one()
+    session.commit()
+    if oldest is None:
+        return
+    month = clock.date_of(oldest).replace(day=1)
+    while True:
+        window_start, _ = clock.day_range(month)
+        if window_start >= before:
+            return
+        month = (month + timedelta(days=32)).replace(day=1)
+        yield window_start, min(clock.day_range(month)[0], before)
+
+
+def _windows(
+    session: Session, before: Callable[[UserClock], datetime], owner_id: Optional[int] = None
+) -> List[Tuple[int, UserClock, datetime, datetime]]:
+    """
+    (owner, clock, start, end) of every user's month windows, or only owner_id's, each user's
+    ending at before(their clock).
+    """
+    clocks = all_clocks(session)
+    if owner_id is None:
+        owners = session.exec(select(TimeBlock.owner_id).distinct().order_by(TimeBlock.owner_id)).all()
+    else:
+        owners = [owner_id]
+    session.commit()
+    windows = []
+    for owner_id in owners:
+        clock = clocks.get(owner_id, UserClock())
+        windows += [(owner_id, clock, *w) for w in _month_windows(session, before(clock), owner_id, clock)]
+    return windows
+
+
+def _months_back(now: datetime, months: int, clock: UserClock) -> datetime:
+    """Start of the user's effective month `months` whole months before the one containing `now` on their clock."""
+    month = clock.today(now).replace(day=1)
+    for _ in range(months):
+        month = (month - timedelta(days=1)).replace(day=1)
+    return clock.day_range(month)[0]
+
+
+def merge_adjacent(
+    session: Session, now: datetime, gap_seconds: int = COMPACTION_GAP_SECONDS, owner_id: Optional[int] = None
+) -> int:
+    """
+    Merges runs of same-task blocks with nothing else between them, before each user's current
+    effective day at `now`; returns how many blocks were absorbed.
+    """
+    gap = timedelta(seconds=gap_seconds)
+    absorbed = 0
+    windows = _windows(session, lambda clock: clock.day_range(clock.today(now))[0], owner_id)
+    for owner_id, clock, window_start, window_end in windows:
+        lock_timeline(session, owner_id)
+        rows = session.exec(
+            select(TimeBlock, bucket_start(TimeBlock.start_time, "day", clock.day_start_hour))
+            .where(TimeBlock.owner_id == owner_id, TimeBlock.start_time >= window_start, TimeBlock.start_time < window_end)
+            .order_by(TimeBlock.start_time, TimeBlock.id)
+        ).all()
+        current: Optional[TimeBlock] = None
+        current_day = None
+        for block, day in rows:
+            if (
+                current is not None
+                and block.task_id == current.task_id
+                and block.start_time - current.end_time <= gap
+                and day == current_day
+            ):
+                current.end_time = max(current.end_time, block.end_time)
+                session.add(current)
+                session.delete(block)
+                absorbed += 1
+            else:
+                current, current_day = block, day
+        session.commit()
+    return absorbed
+
+
+def archive_before(session: Session, cutoff: datetime, owner_id: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Folds every block of the effective days before cutoff's date into ArchivedDay rows, where
+    each user's days start at their own hour; returns (blocks, days) archived.
+    """
+    return _archive(session, lambda clock: clock.day_range(cutoff.date())[0], owner_id)
+
+
+def archive_months(session: Session, now: datetime, months: int, owner_id: Optional[int] = None) -> Tuple[int, int]:
+    """Like archive_before, for the blocks older than `months` whole effective months of each user's calendar."""
+    return _archive(session, lambda clock: _months_back(now, months, clock), owner_id)
+
+
+def _archive(session: Session, before: Callable[[UserClock], datetime], owner_id: Optional[int]) -> Tuple[int, int]:
+    blocks_archived = days_archived = 0
+    windows = _windows(session, before, owner_id)
+    for owner_id, clock, window_start, window_end in windows:
+        lock_timeline(session, owner_id)
+        in_window = (TimeBlock.owner_id == owner_id, TimeBlock.start_time >= window_start, TimeBlock.start_time < window_end)
+        day = bucket_start(TimeBlock.start_time, "day", clock.day_start_hour)
+        totals = session.exec(
+            select(TimeBlock.task_id, day, func.sum(duration_minutes(TimeBlock.start_time, TimeBlock.end_time)))
+            .where(*in_window)
+            .group_by(TimeBlock.task_id, day)
+        ).all()
+        if totals:
+            # A day can be archived twice when old blocks are entered after a previous run; add to it.
+            stmt = dialect_insert(session, ArchivedDay).values([
+                {"task_id": task_id, "start_time": clock.day_range(d)[0], "minutes": minutes, "owner_id": owner_id}
+                for task_id, d, minutes in totals
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ArchivedDay.task_id, ArchivedDay.start_time],
+                set_={"minutes": ArchivedDay.minutes + stmt.excluded.minutes},
+            )
+            session.exec(stmt)
+        deleted = session.exec(delete(TimeBlock).where(*in_window).returning(TimeBlock.id, TimeBlock.start_time)).all()
+        record_deleted(session, block_ids=[b.id for b in deleted], starts=[b.start_time for b in deleted])
+        record_rewritten(session)
+        session.commit()
+        blocks_archived += len(deleted)
+        days_archived += len(totals)
+    return blocks_archived, days_archived
+
+
+def compact(
+    session: Session,
+    gap_seconds: int = COMPACTION_GAP_SECONDS,
+    archive_after_months: int = ARCHIVE_AFTER_MONTHS,
+    now: Optional[datetime] = None,
+    owner_id: Optional[int] = None,
+) -> CompactionReport:
+    """Compacts every user's blocks, or only owner_id's; the change log and partitions only for everyone."""
+    now = now or datetime.now()
+    report = CompactionReport(blocks_merged=merge_adjacent(session, now, gap_seconds, owner_id))
+    if archive_after_months > 0:
+        clock = UserClock() if owner_id is None else get_clock(session, owner_id)
+        report.archived_before = _months_back(now, archive_after_months, clock)
+        report.blocks_archived, report.days_archived = archive_months(session, now, archive_after_months, owner_id)
+    if owner_id is None:
+        report.changes_truncated = changelog.truncate(session, datetime.utcnow() - timedelta(days=CHANGELOG_RETENTION_DAYS))
+        session.commit()
+        partitions.maintain(session.get_bind(), now)
+    owned = () if owner_id is None else (TimeBlock.owner_id == owner_id,)
+    report.live_blocks = session.exec(select(func.count(TimeBlock.id)).where(*owned)).one()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gap-seconds", type=int, default=COMPACTION_GAP_SECONDS,
+                        help="largest gap between two blocks that still merges them")
+    parser.add_argument("--archive-months", type=int, default=ARCHIVE_AFTER_MONTHS,
+                        help="archive blocks older than this many whole months (0 = don't archive)")
+    args = parser.parse_args()
+
+    from app.database import engine
+
+    with Session(engine) as session:
+        report = compact(session, args.gap_seconds, args.archive_months)
+
+    print(f"Merged {report.blocks_merged} blocks into their neighbours.")
+    if report.archived_before:
+        print(f"Archived {report.blocks_archived} blocks before {report.archived_before:%Y-%m-%d} "
+              f"into {report.days_archived} daily summaries.")
+    print(f"Dropped {report.changes_truncated} expired change-log entries.")
+    print(f"✅ {report.live_blocks} blocks remain in timeblock.")
+
+
+if __name__ == "__main__":
+    main()
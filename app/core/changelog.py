@@ -0,0 +1,151 @@
+"""
+Change log behind /sync: every committed insert, update or delete of a Category, Task,
+TimeBlock, ActiveTimer or UserSettings row gets a new, strictly increasing revision.
+/sync only serves the first four; settings are logged so a user's analytics caches, keyed
+by their generation(), are dropped when their day boundary changes.
+
+Unit-of-work changes are picked up from the session's flushes. Set-based DELETE/UPDATE
+statements are handled in do_orm_execute by selecting the affected ids first; set-based
+INSERTs must RETURN the primary key to be logged. Writes made with connection.execute()
+bypass both hooks. Importing this module registers the listeners (app.main does).
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event, insert, select, delete, func, text
+from sqlalchemy.orm import Session
+
+from app.database import TIMELINE_LOCK_NAMESPACE
+from app.models import ActiveTimer, Category, ChangeLog, Task, TimeBlock, UserSettings
+
+TRACKED = {model.__tablename__: model for model in (Category, Task, TimeBlock, ActiveTimer, UserSettings)}
+TRUNCATE = "truncate"
+
+# Owner key of the advisory lock that keeps Postgres revisions in commit order; timeline owners are >= 0.
+CHANGELOG_LOCK_OWNER = -1
+
+
+def _serialize_revisions(session: Session):
+    """
+    Postgres hands out sequence values at insert time, not commit time, so a reader could see
+    revision 11 before revision 10 commits and skip it forever. Holding this lock from the first
+    logged change until commit keeps the two orders the same. SQLite only has one writer anyway.
+    """
+    if session.get_bind().dialect.name == "postgresql" and not session.info.get("changelog_locked"):
+        session.connection().execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :owner)"),
+            {"namespace": TIMELINE_LOCK_NAMESPACE, "owner": CHANGELOG_LOCK_OWNER},
+        )
+        session.info["changelog_locked"] = True
+
+
+def _log(session: Session, changes: Dict[Tuple[str, int], Tuple[str, int]]):
+    """Logs {(table_name, row_id): (op, owner_id)}."""
+    if not changes:
+        return
+    _serialize_revisions(session)
+    session.info["logged_changes"] = True  # get_session reports the resulting revision to the client
+    connection = session.connection()
+    by_table: Dict[str, list] = {}
+    for table_name, row_id in changes:
+        by_table.setdefault(table_name, []).append(row_id)
+    for table_name, row_ids in by_table.items():
+        connection.execute(
+            delete(ChangeLog).where(ChangeLog.table_name == table_name, ChangeLog.row_id.in_(row_ids))
+        )
+    now = datetime.utcnow()
+    connection.execute(insert(ChangeLog), [
+        {"table_name": table_name, "row_id": row_id, "op": op, "owner_id": owner_id, "changed_at": now}
+        for (table_name, row_id), (op, owner_id) in changes.items()
+    ])
+
+
+def _log_rows(session: Session, table_name: str, rows: Iterable[Tuple[int, int]], op: str):
+    """Logs (row_id, owner_id) pairs of one table."""
+    _log(session, {(table_name, row_id): (op, owner_id) for row_id, owner_id in rows})
+
+
+@event.listens_for(Session, "after_flush")
+def _log_flushed_rows(session, flush_context):
+    changes = {}
+    for obj in session.new | session.dirty:
+        table_name = getattr(obj, "__tablename__", None)
+        if table_name in TRACKED and (obj in session.new or session.is_modified(obj)):
+            changes[(table_name, obj.id)] = ("upsert", obj.owner_id)
+    for obj in session.deleted:
+        table_name = getattr(obj, "__tablename__", None)
+        if table_name in TRACKED:
+            changes[(table_name, obj.id)] = ("delete", obj.owner_id)
+    _log(session, changes)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _log_bulk_statements(state):
+    if not (state.is_delete or state.is_update or state.is_insert):
+        return None
+    table = state.statement.table
+    if table.name not in TRACKED:
+        return None
+
+    if state.is_insert:
+        if "id" not in state.statement.exported_columns.keys():
+            return None
+        result = state.invoke_statement().freeze()
+        row_ids = [row.id for row in result()]
+        if row_ids:
+            owned = select(table.c.id, table.c.owner_id).where(table.c.id.in_(row_ids))
+            _log_rows(state.session, table.name, state.session.connection().execute(owned).all(), "upsert")
+        return result()
+
+    rows = select(table.c.id, table.c.owner_id)
+    if state.statement.whereclause is not None:
+        rows = rows.where(state.statement.whereclause)
+    affected = state.session.connection().execute(rows).all()
+    result = state.invoke_statement()
+    _log_rows(state.session, table.name, affected, "delete" if state.is_delete else "upsert")
+    return result
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _release_revision_lock(session):
+    session.info.pop("changelog_locked", None)
+
+
+def current_revision(session: Session) -> int:
+    return session.execute(select(func.coalesce(func.max(ChangeLog.revision), 0))).scalar_one()
+
+
+def generation(session: Session, owner_id: Optional[int] = None) -> Tuple[int, Optional[datetime]]:
+    """
+    The newest revision (of one user's rows, if given) and when it was written. Unlike the
+    revision alone this also changes when the tables are dropped and recreated (seed.py, tests)
+    and revisions start over.
+    """
+    newest = select(ChangeLog.revision, ChangeLog.changed_at).order_by(ChangeLog.revision.desc()).limit(1)
+    if owner_id is not None:
+        newest = newest.where(ChangeLog.owner_id == owner_id)
+    newest = session.execute(newest).first()
+    return (newest.revision, newest.changed_at) if newest else (0, None)
+
+
+def truncated_through(session: Session) -> int:
+    """Newest revision dropped by truncate(); clients that synced before it must start over."""
+    return session.execute(select(func.coalesce(func.max(ChangeLog.row_id), 0)).where(ChangeLog.op == TRUNCATE)).scalar_one()
+
+
+def truncate(session: Session, before: datetime) -> int:
+    """
+    Drops delete entries older than `before` (upserts are already one per live row) and
+    records how far the log was cut. Returns the number of entries removed; the caller commits.
+    """
+    expired = ChangeLog.op == "delete", ChangeLog.changed_at < before
+    newest = session.execute(select(func.max(ChangeLog.revision)).where(*expired)).scalar_one()
+    if newest is None:
+        return 0
+    removed = session.connection().execute(delete(ChangeLog).where(*expired)).rowcount
+    _log(session, {("changelog", max(newest, truncated_through(session))): (TRUNCATE, 0)})
+    session.connection().execute(
+        delete(ChangeLog).where(ChangeLog.op == TRUNCATE, ChangeLog.revision < current_revision(session))
+    )
+    return removed
@@ -0,0 +1,225 @@
+"""
+Optional columnar cache of every time block, for vectorized analytics over long histories.
+
+Enabled with COLUMNAR_ANALYTICS=1. The arrays are loaded lazily on first use and then
+kept current from the write events in app.core.events, so the cache is only coherent
+inside a single worker process. Each block's effective day uses its owner's day start;
+changing it reloads the arrays.
+"""
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.core import events
+from app.core.config import OFFSET_HOURS
+from app.models import ArchivedDay, Category, Task, TimeBlock, UserSettings
+from app.schemas import DashboardReport, TaskBreakdownData, TaskStreakReport
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_DATE = EPOCH.date()
+NO_CATEGORY = -1
+
+
+def to_epoch(dt: datetime) -> int:
+    return int((dt - EPOCH).total_seconds())
+
+
+def effective_day_ordinal(start_epoch, day_start_hour=OFFSET_HOURS):
+    """Days since 1970-01-01 of the effective day a block starts in; works on ints and arrays (of both)."""
+    return (start_epoch - day_start_hour * 3600) // 86400
+
+
+def bucket_days(days: np.ndarray, granularity: str) -> np.ndarray:
+    """Day ordinals of the first day of each value's day/week (Monday)/month bucket."""
+    if granularity == "week":
+        return days - (days + 3) % 7  # 1970-01-01 was a Thursday
+    if granularity == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    return days
+
+
+def _datetimes_to_epoch(values: List[datetime]) -> np.ndarray:
+    return np.array(values, dtype="datetime64[s]").astype(np.int64)
+
+
+class ColumnarBlockStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._pending: List[events.BlockChanges] = []
+        self._set_columns(*([np.empty(0, dtype=np.int64)] * 7))
+
+    def _set_columns(self, ids, task_id, category_id, owner_id, start, end, day):
+        self.ids = ids
+        self.task_id = task_id
+        self.category_id = category_id
+        self.owner_id = owner_id
+        self.start = start
+        self.end = end
+        self.day = day
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+            self._pending.clear()
+
+    def on_changes(self, changes: events.BlockChanges):
+        with self._lock:
+            if changes.rewritten:
+                self._loaded = False
+                self._pending.clear()
+            elif self._loaded:
+                self._pending.append(changes)
+
+    def _task_categories(self, session: Session) -> Dict[int, Tuple[int, int]]:
+        """task_id -> (category_id, owner_id)"""
+        return {
+            task_id: (NO_CATEGORY if category_id is None else category_id, owner_id)
+            for task_id, category_id, owner_id in session.exec(select(Task.id, Task.category_id, Task.owner_id)).all()
+        }
+
+    def _day_start_hours(self, session: Session, owners: np.ndarray) -> np.ndarray:
+        """Each row's owner's day start hour, looked up once per distinct owner."""
+        hours = dict(session.exec(select(UserSettings.owner_id, UserSettings.day_start_hour)).all())
+        distinct, index = np.unique(owners, return_inverse=True)
+        return np.array([hours.get(int(o), OFFSET_HOURS) for o in distinct], dtype=np.int64)[index]
+
+    def _columns_for(self, session, ids, task_ids, starts, ends, task_categories):
+        start = _datetimes_to_epoch(starts)
+        end = _datetimes_to_epoch(ends)
+        # Blocks of a task deleted meanwhile are about to be dropped; owner -1 hides them until then.
+        owned = [task_categories.get(t, (NO_CATEGORY, -1)) for t in task_ids]
+        owners = np.array([owner for _, owner in owned], dtype=np.int64)
+        return (
+            np.asarray(ids, dtype=np.int64),
+            np.asarray(task_ids, dtype=np.int64),
+            np.array([category for category, _ in owned], dtype=np.int64),
+            owners,
+            start,
+            end,
+            effective_day_ordinal(start, self._day_start_hours(session, owners)),
+        )
+
+    def _load(self, session: Session):
+        rows = session.exec(select(TimeBlock.id, TimeBlock.task_id, TimeBlock.start_time, TimeBlock.end_time)).all()
+        # Archived days become one synthetic block each; negative ids keep them clear of real block ids.
+        rows += [
+            (-day.id, day.task_id, day.start_time, day.start_time + timedelta(minutes=day.minutes))
+            for day in session.exec(select(ArchivedDay)).all()
+        ]
+        ids, task_ids, starts, ends = zip(*rows) if rows else ((), (), (), ())
+        self._set_columns(*self._columns_for(session, ids, task_ids, starts, ends, self._task_categories(session)))
+        self._pending.clear()
+        self._loaded = True
+
+    def _apply_pending(self, session: Session):
+        replaced, deleted_tasks, upserted = set(), set(), {}
+        for changes in self._pending:
+            for block_id in changes.deleted_ids:
+                upserted.pop(block_id, None)
+            replaced |= changes.deleted_ids | changes.upserted.keys()
+            deleted_tasks |= changes.deleted_task_ids
+            upserted.update(changes.upserted)
+        self._pending.clear()
+
+        keep = ~np.isin(self.ids, np.fromiter(replaced, dtype=np.int64, count=len(replaced)))
+        if deleted_tasks:
+            keep &= ~np.isin(self.task_id, np.fromiter(deleted_tasks, dtype=np.int64, count=len(deleted_tasks)))
+        new = [(i, *v) for i, v in upserted.items() if v[0] not in deleted_tasks]
+        ids, task_ids, starts, ends = zip(*new) if new else ((), (), (), ())
+        added = self._columns_for(session, ids, task_ids, starts, ends, self._task_categories(session))
+
+        current = (self.ids, self.task_id, self.category_id, self.owner_id, self.start, self.end, self.day)
+        self._set_columns(*(np.concatenate([col[keep], extra]) for col, extra in zip(current, added)))
+
+    def refresh(self, session: Session):
+        """Loads the arrays on first use and folds in any writes committed since the last call."""
+        with self._lock:
+            if not self._loaded:
+                self._load(session)
+            elif self._pending:
+                self._apply_pending(session)
+
+    def dashboard(self, session: Session, start_date: datetime, end_date: datetime, granularity: str = "day",
+                  owner_id: int = 0) -> DashboardReport:
+        self.refresh(session)
+        mask = (self.owner_id == owner_id) & (self.start >= to_epoch(start_date)) & (self.end <= to_epoch(end_date))
+        minutes = (self.end[mask] - self.start[mask]) // 60
+        if not minutes.size:
+            return DashboardReport(total_minutes=0, granularity=granularity, pie_chart=[], bar_chart=[], task_breakdown=[])
+
+        categories = {c.id: c for c in session.exec(select(Category).where(Category.owner_id == owner_id)).all()}
+        tasks = {t.id: t for t in session.exec(select(Task).where(Task.owner_id == owner_id)).all()}
+
+        def category_info(category_id):
+            category = categories.get(int(category_id))
+            return (category.name, category.color_hex) if category else ("Uncategorized", "#CCCCCC")
+
+        cat_codes, cat_index = np.unique(self.category_id[mask], return_inverse=True)
+        cat_minutes = np.bincount(cat_index, weights=minutes).astype(np.int64)
+        pie_data: dict = {}
+        for code, value in zip(cat_codes, cat_minutes):
+            name, color = category_info(code)
+            entry = pie_data.setdefault(name, {"name": name, "value": 0, "color": color})
+            entry["value"] += int(value)
+
+        day_cat = bucket_days(self.day[mask], granularity) * len(cat_codes) + cat_index
+        day_cat_codes, day_cat_index = np.unique(day_cat, return_inverse=True)
+        day_cat_minutes = np.bincount(day_cat_index, weights=minutes).astype(np.int64)
+        bar_data: dict = {}
+        for code, value in zip(day_cat_codes, day_cat_minutes):
+            day, cat = divmod(int(code), len(cat_codes))
+            day_str = (EPOCH_DATE + timedelta(days=day)).isoformat()
+            name, _ = category_info(cat_codes[cat])
+            bar_data.setdefault(day_str, {})
+            bar_data[day_str][name] = bar_data[day_str].get(name, 0) + int(value)
+
+        task_codes, task_index = np.unique(self.task_id[mask], return_inverse=True)
+        task_minutes = np.bincount(task_index, weights=minutes).astype(np.int64)
+        task_data: dict = {}
+        for code, value in zip(task_codes, task_minutes):
+            task = tasks.get(int(code))
+            title = task.title if task else "Unknown"
+            _, color = category_info(task.category_id if task and task.category_id is not None else NO_CATEGORY)
+            entry = task_data.setdefault(title, {"minutes": 0, "color": color})
+            entry["minutes"] += int(value)
+
+        return DashboardReport(
+            total_minutes=int(minutes.sum()),
+            granularity=granularity,
+            pie_chart=list(pie_data.values()),
+            bar_chart=[{"date": d, "categories": cats} for d, cats in sorted(bar_data.items())],
+            task_breakdown=[
+                TaskBreakdownData(task=title, minutes=v["minutes"], color=v["color"])
+                for title, v in sorted(task_data.items(), key=lambda x: (-x[1]["minutes"], x[0]))
+            ]
+        )
+
+    def streak(self, session: Session, task: Task, today: date) -> TaskStreakReport:
+        self.refresh(session)
+        mask = self.task_id == task.id
+        total_time = int(((self.end[mask] - self.start[mask]) // 60).sum())
+
+        today_ordinal = (today - EPOCH_DATE).days
+        days = np.unique(self.day[mask])
+        days = days[days <= today_ordinal]
+
+        current_streak = 0
+        if days.size and days[-1] >= today_ordinal - 1:
+            breaks = np.nonzero(np.diff(days) != 1)[0]
+            current_streak = int(days.size - (breaks[-1] + 1)) if breaks.size else int(days.size)
+
+        return TaskStreakReport(
+            task_id=task.id,
+            task_title=task.title,
+            current_streak_days=current_streak,
+            total_time_spent_minutes=total_time,
+            tracked_days_count=int(days.size)
+        )
+
+
+block_store = ColumnarBlockStore()
+events.subscribe(block_store.on_changes)
@@ -0,0 +1,147 @@
+"""
+gzip/brotli response compression, negotiated from Accept-Encoding.
+
+Bodies smaller than COMPRESSION_MIN_BYTES (the timer, single rows, status replies) go out
+as they are: compressing them costs more CPU than the few bytes it saves. Streaming
+responses are compressed chunk by chunk and flushed after each one, so the client still
+receives every chunk as soon as it is sent. brotli is used when the `brotli` package is
+installed and the client prefers it or ranks it equal to gzip.
+
+CPU time and bytes before/after are recorded per route under "compression" in /system/stats.
+"""
+import time
+import zlib
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import COMPRESSION_MIN_BYTES
+from app.core.metrics import metrics
+
+# Fast settings: API bodies are small enough that higher levels buy a few percent for several times the CPU.
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+@lru_cache(maxsize=None)
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """The coding to answer an Accept-Encoding header with: "br", "gzip" or None."""
+    supported = ("br", "gzip") if _brotli() else ("gzip",)
+    best, best_q = None, 0.0
+    for part in accept_encoding.split(","):
+        coding, *params = (p.strip() for p in part.split(";"))
+        coding = coding.lower()
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if coding == "*":
+            coding = supported[0]
+        # Ties go to the first entry of `supported`, i.e. brotli.
+        if coding in supported and (q > best_q or (q == best_q and best and supported.index(coding) < supported.index(best))):
+            best, best_q = coding, q
+    return best
+
+
+def _compressor(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]:
+    """(compress a chunk and flush it, compress the last chunk and end the stream)."""
+    if encoding == "br":
+        compressor = _brotli().Compressor(quality=BROTLI_QUALITY)
+        return (lambda data: compressor.process(data) + compressor.flush(),
+                lambda data: compressor.process(data) + compressor.finish())
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+    return (lambda data: compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH),
+            lambda data: compressor.compress(data) + compressor.flush())
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressingResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compress_chunk = self.compress_last = None
+        self.passthrough = False
+        self.bytes_in = self.bytes_out = 0
+        self.cpu = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.scope, self.send = scope, send
+        await self.app(scope, receive, self.on_message)
+
+    async def on_message(self, message: Message):
+        if message["type"] == "http.response.start":
+            self.start = message  # held back until the first body chunk shows whether to compress
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.compress_chunk is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            if "content-encoding" in headers or (not more_body and len(body) < self.minimum_size):
+                self.passthrough = True
+                self.record(len(body), len(body), compressed=False)
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compress_chunk, self.compress_last = _compressor(self.encoding)
+            data = self.compress(body, last=not more_body)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(data))
+            await self.send(self.start)
+        else:
+            data = self.compress(body, last=not more_body)
+
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+        if not more_body:
+            self.record(self.bytes_in, self.bytes_out, compressed=True)
+
+    def compress(self, body: bytes, last: bool) -> bytes:
+        started = time.thread_time()
+        data = (self.compress_last if last else self.compress_chunk)(body)
+        self.cpu += time.thread_time() - started
+        self.bytes_in += len(body)
+        self.bytes_out += len(data)
+        return data
+
+    def record(self, bytes_in: int, bytes_out: int, compressed: bool):
+        route = self.scope.get("route")
+        metrics.add(
+            "compression", getattr(route, "path", "unmatched"),
+            responses=1, compressed=int(compressed), bytes_in=bytes_in, bytes_out=bytes_out, cpu_ms=self.cpu * 1000,
+        )
@@ -2,6 +2,45 @@ import os
 
 OFFSET_HOURS = int(os.getenv("OFFSET_HOURS", "4"))
 
+# granularity=auto on /analytics/dashboard picks the finest bucket that keeps bar_chart under this many entries.
+DASHBOARD_MAX_POINTS = int(os.getenv("DASHBOARD_MAX_POINTS", "90"))
+
+# Serve dashboard/streak analytics from the in-memory NumPy block store (single worker only).
+COLUMNAR_ANALYTICS = os.getenv("COLUMNAR_ANALYTICS", "0") == "1"
+
+# Analytics results remembered per user and report type (dashboard, streak, ...) until the data changes; 0 keeps none.
+ANALYTICS_RESULTS_KEPT = int(os.getenv("ANALYTICS_RESULTS_KEPT", "16"))
+
+# Users whose analytics results are remembered; the least recently served user's are dropped first.
+ANALYTICS_USERS_KEPT = int(os.getenv("ANALYTICS_USERS_KEPT", "256"))
+
+# Precompute today's / last 7 and 30 days' / this month's dashboards and the streaks at startup and after each day rollover.
+ANALYTICS_WARMUP = os.getenv("ANALYTICS_WARMUP", "1") == "1"
+
+# Only users who changed something in this many days are warmed up (at most ANALYTICS_USERS_KEPT of them).
+WARMUP_ACTIVE_DAYS = int(os.getenv("WARMUP_ACTIVE_DAYS", "14"))
+
+# The warm-up pauses this many times as long as each report took, so it never hogs the database.
+WARMUP_PAUSE_RATIO = float(os.getenv("WARMUP_PAUSE_RATIO", "1.0"))
+
+# Compaction merges same-task blocks separated by at most this many seconds (pause/resume leaves small gaps).
+COMPACTION_GAP_SECONDS = int(os.getenv("COMPACTION_GAP_SECONDS", "60"))
+
+# Blocks older than this many whole months are archived into per-day summaries; 0 disables archiving.
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "0"))
+
+# Compaction drops change-log entries for deleted rows after this many days; older /sync clients start over.
+CHANGELOG_RETENTION_DAYS = int(os.getenv("CHANGELOG_RETENTION_DAYS", "30"))
+
+# Responses smaller than this many bytes are sent uncompressed even when the client accepts gzip/brotli.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+# Postgres only: monthly timeblock partitions are created this many months ahead of the current one.
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# Postgres only: partitions older than this many months get a BRIN index on start_time instead of a b-tree.
+PARTITION_HOT_MONTHS = int(os.getenv("PARTITION_HOT_MONTHS", "3"))
+
 ALLOWED_ORIGINS = os.getenv(
     "ALLOWED_ORIGINS", 
     "http://localhost:8501,http://127.0.0.1:8501"
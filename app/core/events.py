@@ -0,0 +1,86 @@
+"""
+In-process notifications about committed TimeBlock writes.
+
+ORM changes are picked up automatically from the session's flushes; set-based
+DELETE statements bypass the ORM and must call record_deleted() themselves.
+Subscribers run after the commit, so they only ever see durable data.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import TimeBlock
+
+
+@dataclass
+class BlockChanges:
+    # block id -> (task_id, start_time, end_time) as committed
+    upserted: Dict[int, Tuple[int, datetime, datetime]] = field(default_factory=dict)
+    deleted_ids: Set[int] = field(default_factory=set)
+    deleted_task_ids: Set[int] = field(default_factory=set)
+    # start_time of every affected block, before and after the change (unknown for deleted_task_ids)
+    touched_starts: Set[datetime] = field(default_factory=set)
+    # Rows changed in ways the fields above can't describe (e.g. blocks folded into ArchivedDay); reload everything.
+    rewritten: bool = False
+
+    def __bool__(self):
+        return bool(self.upserted or self.deleted_ids or self.deleted_task_ids or self.rewritten)
+
+
+_subscribers: List[Callable[[BlockChanges], None]] = []
+
+
+def subscribe(callback: Callable[[BlockChanges], None]):
+    _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[BlockChanges], None]):
+    _subscribers.remove(callback)
+
+
+def _pending(session: Session) -> BlockChanges:
+    return session.info.setdefault("block_changes", BlockChanges())
+
+
+def record_deleted(session: Session, block_ids: Iterable[int] = (), task_ids: Iterable[int] = (), starts: Iterable[datetime] = ()):
+    changes = _pending(session)
+    for block_id in block_ids:
+        changes.upserted.pop(block_id, None)
+        changes.deleted_ids.add(block_id)
+    changes.deleted_task_ids.update(task_ids)
+    changes.touched_starts.update(starts)
+
+
+def record_rewritten(session: Session):
+    _pending(session).rewritten = True
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flushed_blocks(session, flush_context):
+    changes = _pending(session)
+    for obj in session.new | session.dirty:
+        if isinstance(obj, TimeBlock):
+            changes.upserted[obj.id] = (obj.task_id, obj.start_time, obj.end_time)
+            changes.touched_starts.add(obj.start_time)
+            changes.touched_starts.update(inspect(obj).attrs.start_time.history.deleted)
+    for obj in session.deleted:
+        if isinstance(obj, TimeBlock):
+            changes.upserted.pop(obj.id, None)
+            changes.deleted_ids.add(obj.id)
+            changes.touched_starts.add(obj.start_time)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_blocks(session):
+    changes = session.info.pop("block_changes", None)
+    if changes:
+        for callback in _subscribers:
+            callback(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_blocks(session):
+    session.info.pop("block_changes", None)
@@ -0,0 +1,118 @@
+"""
+Response formats for the large read endpoints, picked from the request's Accept header.
+
+    application/json                            the default; rows as objects
+    application/vnd.dailyfocus.columnar+json    lists of rows become {column: [values]}
+    application/msgpack                         same shape as JSON, binary (needs msgpack)
+    application/vnd.apache.arrow.stream         Arrow IPC stream; a list becomes a table with
+                                                one row per item, anything else one row (needs pyarrow)
+
+Formats whose library isn't installed are skipped during negotiation, so a client that
+lists JSON as a fallback still gets an answer; the Content-Type says what was sent.
+"""
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.dailyfocus.columnar+json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+ALIASES = {"application/x-msgpack": MSGPACK}
+FORMATS = (JSON, COLUMNAR_JSON, MSGPACK, ARROW)
+
+# Documents the extra media types in OpenAPI; pass as responses= on negotiated routes.
+RESPONSES = {200: {"content": {media_type: {} for media_type in FORMATS[1:]}}}
+
+
+def available(media_type: str) -> bool:
+    module = {MSGPACK: "msgpack", ARROW: "pyarrow"}.get(media_type)
+    if module is None:
+        return True
+    try:
+        __import__(module)
+    except ImportError:
+        return False
+    return True
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Best supported media type in an Accept header by q-value, JSON when nothing else fits."""
+    candidates = []
+    for position, part in enumerate((accept or "").split(",")):
+        media_type, *params = (p.strip() for p in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            candidates.append((-q, position, ALIASES.get(media_type.lower(), media_type.lower())))
+    for _, _, media_type in sorted(candidates):
+        if media_type in ("*/*", "application/*"):
+            return JSON
+        if media_type in FORMATS and available(media_type):
+            return media_type
+    return JSON
+
+
+def _plain(content: Any, schema=None, mode: str = "json"):
+    """Applies the route's response model and turns the result into dicts and lists."""
+    if isinstance(content, list):
+        return [_plain(item, schema, mode) for item in content]
+    if schema is not None:
+        content = schema.model_validate(content, from_attributes=True)
+    if hasattr(content, "model_dump"):
+        return content.model_dump(mode=mode)
+    return jsonable_encoder(content) if mode == "json" else content
+
+
+def columnar(value: Any):
+    """Rewrites every list of objects, at any depth, as one list per key."""
+    if isinstance(value, dict):
+        return {key: columnar(item) for key, item in value.items()}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        keys = list(dict.fromkeys(key for item in value for key in item))
+        return {key: [columnar(item.get(key)) for item in value] for key in keys}
+    if isinstance(value, list):
+        return [columnar(item) for item in value]
+    return value
+
+
+def encode(content: Any, media_type: str, schema=None) -> bytes:
+    if media_type == JSON:
+        return JSONResponse(_plain(content, schema)).body
+    if media_type == COLUMNAR_JSON:
+        return JSONResponse(columnar(_plain(content, schema))).body
+    if media_type == MSGPACK:
+        import msgpack
+
+        return msgpack.packb(_plain(content, schema))
+    if media_type == ARROW:
+        import pyarrow as pa
+
+        # Python mode keeps datetimes, so they arrive as Arrow timestamps rather than strings.
+        rows = _plain(content, schema, mode="python")
+        table = pa.Table.from_pylist(rows if isinstance(rows, list) else [rows])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Unknown response format: {media_type}")
+
+
+def respond(request: Request, content: Any, schema=None, headers: Optional[dict] = None):
+    """
+    Returns `content` untouched for JSON, so FastAPI's response_model handling applies as
+    before; otherwise encodes it in the negotiated format. `schema` is the route's
+    response_model (of one item for list routes), which a custom Response would skip.
+    """
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type == JSON:
+        return content
+    return Response(encode(content, media_type, schema), media_type=media_type, headers={**(headers or {}), "Vary": "Accept"})
@@ -0,0 +1,41 @@
+"""
+In-process counters for /system/stats, grouped by section and then by key, e.g.
+metrics.add("compression", "/analytics/dashboard", bytes_in=..., bytes_out=...).
+
+Each worker keeps its own numbers; they reset when the process restarts.
+"""
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
+
+    def add(self, section: str, key: str, **amounts: float):
+        """Adds to counters."""
+        with self._lock:
+            values = self._values[section][key]
+            for name, amount in amounts.items():
+                values[name] += amount
+
+    def set(self, section: str, key: str, **values: float):
+        """Overwrites gauges, e.g. the duration of the last run of something."""
+        with self._lock:
+            self._values[section][key].update(values)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                section: {key: {name: round(value, 3) for name, value in values.items()} for key, values in keys.items()}
+                for section, keys in self._values.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+metrics = Metrics()
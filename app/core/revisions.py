@@ -0,0 +1,32 @@
+"""
+Read-your-writes when reads go to a replica.
+
+Every request that wrote something answers with X-Revision: the change-log revision right
+after its commit. A client that sends the highest revision it has seen back as
+X-Min-Revision is served from the primary until the replica has caught up with it (see
+database.get_read_session). Reads without the header always use the replica.
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.database import REVISION_HEADER
+
+
+class RevisionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_revision(message: Message):
+            if message["type"] == "http.response.start":
+                # Set by get_session's teardown, which FastAPI runs before the response starts.
+                revision = scope.get("state", {}).get("revision")
+                if revision is not None:
+                    MutableHeaders(scope=message).append(REVISION_HEADER, str(revision))
+            await send(message)
+
+        await self.app(scope, receive, send_with_revision)
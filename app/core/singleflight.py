@@ -0,0 +1,94 @@
+"""
+Request coalescing: concurrent calls with the same key wait for the first one and share
+its result (or exception) instead of each running the same computation.
+
+With keep=N the last N results are also remembered, so a later caller with the same key
+gets the stored result (this is what the startup warm-up fills). With owners=M as well,
+keys start with their owner and every owner gets their own N results, for the M owners
+used most recently, so a busy user (or the warm-up going through everyone) can't push
+another user's results out. Keys should contain
+everything the result depends on, including a data revision: callers that arrive after a
+write then never join or reuse a computation that started before it, and entries for old
+revisions simply age out.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from app.core.metrics import metrics
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str, keep: int = 0, owners: int = 0):
+        self.name = name
+        self.keep = keep
+        self.owners = owners
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        # owner (None without owners=) -> that owner's results, least recently used first.
+        self._recent: "OrderedDict[Hashable, OrderedDict[Hashable, Any]]" = OrderedDict()
+
+    def _owner(self, key: Hashable) -> Hashable:
+        return key[0] if self.owners else None
+
+    def _remember(self, key: Hashable, result: Any):
+        owner = self._owner(key)
+        recent = self._recent.setdefault(owner, OrderedDict())
+        self._recent.move_to_end(owner)
+        recent[key] = result
+        while len(recent) > self.keep:
+            recent.popitem(last=False)
+        while self.owners and len(self._recent) > self.owners:
+            self._recent.popitem(last=False)
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            recent = self._recent.get(self._owner(key))
+            if recent is not None and key in recent:
+                recent.move_to_end(key)
+                self._recent.move_to_end(self._owner(key))
+                metrics.add("singleflight", self.name, reused=1)
+                return recent[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            metrics.add("singleflight", self.name, shared=1)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = compute()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if self.keep and call.error is None:
+                    self._remember(key, call.result)
+            call.done.set()
+            metrics.add("singleflight", self.name, computed=1)
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def waiting(self) -> int:
+        with self._lock:
+            return sum(call.waiters for call in self._calls.values())
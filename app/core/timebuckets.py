@@ -0,0 +1,169 @@
+"""
+SQL expressions for bucketing blocks by effective day/week/month and measuring their length.
+
+Each construct compiles to native date functions on SQLite and Postgres, so grouping
+happens in the database. Days start at a user's day_start_hour (UserClock), OFFSET_HOURS
+for users who never changed it.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Date, DateTime, Float, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+from app.core.config import OFFSET_HOURS
+
+GRANULARITIES = ("day", "week", "month")
+
+
+def effective_date(dt: datetime, day_start_hour: int = OFFSET_HOURS) -> date:
+    """The logical day a timestamp belongs to; days start at day_start_hour, not midnight."""
+    return (dt - timedelta(hours=day_start_hour)).date()
+
+
+def effective_range(d: date, day_start_hour: int = OFFSET_HOURS) -> Tuple[datetime, datetime]:
+    """[start, end) datetimes of an effective day."""
+    start = datetime.combine(d, time(day_start_hour, 0))
+    return start, start + timedelta(days=1)
+
+
+@dataclass(frozen=True)
+class UserClock:
+    """
+    A user's day boundary and time zone (app.services.settings). Block times are naive wall-clock
+    times in the user's zone, so only "now" needs converting; time_zone None is the server's.
+    """
+    day_start_hour: int = OFFSET_HOURS
+    time_zone: Optional[str] = None
+
+    def now(self, at: Optional[datetime] = None) -> datetime:
+        """The user's wall-clock time at the server-local time `at` (default: now)."""
+        at = at or datetime.now()
+        if self.time_zone is None:
+            return at
+        return at.astimezone(ZoneInfo(self.time_zone)).replace(tzinfo=None)
+
+    def today(self, at: Optional[datetime] = None) -> date:
+        return effective_date(self.now(at), self.day_start_hour)
+
+    def date_of(self, dt: datetime) -> date:
+        return effective_date(dt, self.day_start_hour)
+
+    def day_range(self, d: date) -> Tuple[datetime, datetime]:
+        return effective_range(d, self.day_start_hour)
+
+
+class bucket_start(FunctionElement):
+    """First effective day of the day/week (Monday)/month bucket containing a timestamp."""
+    type = Date()
+    inherit_cache = True
+    # Part of the statement cache key, otherwise day/week/month and different day starts would share compiled SQL.
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("granularity", InternalTraversal.dp_string),
+        ("day_start_hour", InternalTraversal.dp_plain_obj),
+    ]
+
+    def __init__(self, column, granularity: str = "day", day_start_hour: int = OFFSET_HOURS):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        self.granularity = granularity
+        self.day_start_hour = int(day_start_hour)  # rendered into the SQL, so never anything but an int
+        super().__init__(column)
+
+
+class shift_hours(FunctionElement):
+    """A timestamp moved by a whole number of hours."""
+    type = DateTime()
+    inherit_cache = True
+    _traverse_internals = FunctionElement._traverse_internals + [("hours", InternalTraversal.dp_plain_obj)]
+
+    def __init__(self, column, hours: int):
+        self.hours = int(hours)
+        super().__init__(column)
+
+
+class duration_minutes(FunctionElement):
+    """Whole minutes between two timestamps, floored like the Python analytics code."""
+    type = Integer()
+    inherit_cache = True
+
+
+class duration_seconds(FunctionElement):
+    """Seconds between two timestamps, with millisecond precision."""
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(bucket_start, "sqlite")
+def _bucket_start_sqlite(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    modifiers = {
+        "day": "",
+        "week": ", 'weekday 0', '-6 days'",
+        "month": ", 'start of month'",
+    }[element.granularity]
+    return f"date({column}, '{-element.day_start_hour} hours'{modifiers})"
+
+
+@compiles(bucket_start, "postgresql")
+def _bucket_start_postgresql(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    shifted = f"({column} - interval '{element.day_start_hour} hours')"
+    if element.granularity == "day":
+        return f"CAST({shifted} AS DATE)"
+    return f"CAST(date_trunc('{element.granularity}', {shifted}) AS DATE)"
+
+
+@compiles(shift_hours, "sqlite")
+def _shift_hours_sqlite(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    # Keep the stored "YYYY-MM-DD HH:MM:SS.ffffff" text form: datetime() would drop the fraction
+    # and text comparisons against bound parameters would go wrong.
+    return f"(strftime('%Y-%m-%d %H:%M:%S', {column}, '{element.hours:+d} hours') || substr({column}, 20))"
+
+
+@compiles(shift_hours, "postgresql")
+def _shift_hours_postgresql(element, compiler, **kw):
+    column = compiler.process(list(element.clauses)[0], **kw)
+    return f"({column} + interval '{element.hours} hours')"
+
+
+@compiles(duration_minutes, "sqlite")
+def _duration_minutes_sqlite(element, compiler, **kw):
+    start, end = (compiler.process(c, **kw) for c in element.clauses)
+    # julianday() is a float; round to whole milliseconds before the integer division.
+    return f"(CAST(ROUND((julianday({end}) - julianday({start})) * 86400000) AS INTEGER) / 60000)"
+
+
+@compiles(duration_minutes, "postgresql")
+def _duration_minutes_postgresql(element, compiler, **kw):
+    start, end = (compiler.process(c, **kw) for c in element.clauses)
+    return f"CAST(FLOOR(EXTRACT(EPOCH FROM ({end} - {start})) / 60) AS INTEGER)"
+
+
+@compiles(duration_seconds, "sqlite")
+def _duration_seconds_sqlite(element, compiler, **kw):
+    start, end = (compiler.process(c, **kw) for c in element.clauses)
+    return f"(ROUND((julianday({end}) - julianday({start})) * 86400000) / 1000.0)"
+
+
+@compiles(duration_seconds, "postgresql")
+def _duration_seconds_postgresql(element, compiler, **kw):
+    start, end = (compiler.process(c, **kw) for c in element.clauses)
+    return f"CAST(EXTRACT(EPOCH FROM ({end} - {start})) AS DOUBLE PRECISION)"
+
+
+def resolve_granularity(granularity: str, start: datetime, end: datetime, max_points: int) -> str:
+    """Maps "auto" to the finest bucket that keeps the bar chart within max_points entries."""
+    if granularity != "auto":
+        return granularity
+    days = (end - start).days + 1
+    if days <= max_points:
+        return "day"
+    if days // 7 + 1 <= max_points:
+        return "week"
+    return "month"
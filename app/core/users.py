@@ -0,0 +1,16 @@
+"""
+Which user a request acts for.
+
+Every row belongs to one user (owner_id) and every service call is scoped to one. The API
+takes the user from the X-User-Id header and trusts it: when several people share a backend,
+put it behind a proxy that authenticates them and sets the header. Requests without it act
+for user 0, the only user of single-user deployments.
+"""
+from fastapi import Header
+
+USER_HEADER = "X-User-Id"
+DEFAULT_OWNER = 0
+
+
+def get_owner(user_id: int = Header(DEFAULT_OWNER, alias=USER_HEADER, ge=0)) -> int:
+    return user_id
@@ -1,15 +1,172 @@
 import os 
-from sqlmodel import SQLModel, create_engine , Session
+import hashlib
+from fastapi import Depends, Request
+from sqlmodel import SQLModel, create_engine , Session, text
+from sqlalchemy import Column, Integer, MetaData, String, Table, bindparam, delete, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
+
+from app.core.metrics import metrics
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:focus_password@db:5432/daily_focus_db")
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# SQLite waits this long for a competing writer's lock before raising "database is locked".
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT} if url.startswith("sqlite") else {}
+
+connect_args = _connect_args(DATABASE_URL)
+
+# Logging every statement is slow and noisy; turn it on with SQL_ECHO=1 when debugging queries.
+SQL_ECHO = os.getenv("SQL_ECHO", "0") == "1"
+
+engine = create_engine(DATABASE_URL, echo=SQL_ECHO, connect_args=connect_args)
+
+# Optional read-only replica for analytics and list routes; without it they share the primary engine.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", "")
+read_engine = create_engine(DATABASE_READ_URL, echo=SQL_ECHO, connect_args=_connect_args(DATABASE_READ_URL)) if DATABASE_READ_URL else engine
+
+# Writes answer with the change-log revision they produced; sending it back on reads guarantees they see it.
+REVISION_HEADER = "X-Revision"
+MIN_REVISION_HEADER = "X-Min-Revision"
+
+# Namespace for pg_advisory_xact_lock(namespace, owner) so our keys can't collide with other users of advisory locks.
+TIMELINE_LOCK_NAMESPACE = 0x7F0C
+
+# Kept out of SQLModel.metadata so drop_all/create_all in tests and seed.py leave it alone.
+_schema_state = MetaData()
+schema_fingerprint = Table(
+    "schema_fingerprint", _schema_state,
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+)
 
-engine = create_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+def schema_hash(bind) -> str:
+    """sha256 of the CREATE TABLE / CREATE INDEX statements the models compile to on this dialect."""
+    ddl = []
+    for table in SQLModel.metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=bind.dialect)))
+        ddl.extend(str(CreateIndex(index).compile(dialect=bind.dialect)) for index in sorted(table.indexes, key=lambda i: i.name))
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()
 
-def init_db():
-    SQLModel.metadata.create_all(engine)
+# Indexes earlier versions created that the models have since replaced.
+RETIRED_INDEXES = ("ix_category_name", "ux_task_normalized_title_category", "ix_timeblock_start_time", "ix_archivedday_start_time")
 
-def get_session():
+def _upgrade(connection):
+    """
+    create_all skips tables that already exist, so bring those up to the models here: add
+    missing columns (new columns need a server default) and swap retired indexes for new ones.
+    """
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {CreateColumn(column).compile(dialect=connection.dialect)}"))
+    backfill_normalized_titles(connection)
+    for name in RETIRED_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for table in SQLModel.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            CreateIndex(index, if_not_exists=True)._invoke_with(connection)
+
+def backfill_normalized_titles(connection, only_missing: bool = True):
+    """
+    Tasks from before normalized_title got '' from its server default; fill in what the ORM hook
+    would have, in Python, so they dedupe against new tasks (SQL lower() only folds ASCII).
+    only_missing=False recomputes every row, e.g. after an older migrate_db.py used SQL.
+    """
+    from app.models import Task, normalize_title
+
+    task = Task.__table__
+    rows = select(task.c.id, task.c.title)
+    if only_missing:
+        rows = rows.where(task.c.normalized_title == "")
+    rows = connection.execute(rows).all()
+    if rows:
+        connection.execute(
+            update(task).where(task.c.id == bindparam("task_id")).values(normalized_title=bindparam("normalized")),
+            [{"task_id": task_id, "normalized": normalize_title(title)} for task_id, title in rows],
+        )
+
+def init_db(bind=None) -> bool:
+    """
+    Creates missing tables, but only when the models changed since the last boot: create_all
+    checks every table and index one round trip at a time, which dominates a cold start on a
+    remote Postgres. Returns whether create_all ran. Delete the schema_fingerprint row to force it.
+    """
+    bind = bind or engine
+    fingerprint = schema_hash(bind)
+    try:
+        with bind.connect() as connection:
+            stored = connection.execute(select(schema_fingerprint.c.fingerprint)).scalar()
+    except DBAPIError:  # first boot: the table doesn't exist yet
+        stored = None
+    if stored == fingerprint:
+        return False
+    SQLModel.metadata.create_all(bind)
+    with bind.begin() as connection:
+        _upgrade(connection)
+        _schema_state.create_all(connection)
+        connection.execute(delete(schema_fingerprint))
+        connection.execute(insert(schema_fingerprint).values(id=1, fingerprint=fingerprint))
+    return True
+
+def get_session(request: Request):
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+        if session.info.get("logged_changes"):
+            from app.core import changelog
+
+            # Teardown runs before the response goes out; RevisionMiddleware copies this into X-Revision.
+            request.state.revision = changelog.current_revision(session)
+
+def get_read_session(request: Request, primary: Session = Depends(get_session)):
+    """
+    Session for routes that only read. Goes to the replica unless the client's X-Min-Revision
+    is newer than what the replica has applied, in which case the primary session (which
+    opens no connection until used) serves the request so the client sees its own writes.
+    """
+    if read_engine is engine:
+        yield primary
+        return
+    from app.core import changelog
+
+    min_revision = request.headers.get(MIN_REVISION_HEADER, "")
+    with Session(read_engine) as replica:
+        if min_revision.isdigit() and changelog.current_revision(replica) < int(min_revision):
+            metrics.add("replica", "reads", primary=1)
+            replica.close()
+            yield primary
+            return
+        metrics.add("replica", "reads", replica=1)
+        yield replica
+
+def lock_timeline(session: Session, owner_id: int = 0):
+    """
+    Serializes writes to an owner's timeline (time blocks + active timer) until the
+    current transaction ends, so read-modify-write paths stay safe with several workers.
+    Must be called before the transaction has read or written anything.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        session.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :owner)"),
+            {"namespace": TIMELINE_LOCK_NAMESPACE, "owner": owner_id},
+        )
+    elif dialect == "sqlite":
+        # SQLite has no row locks; take the database write lock up front instead of on first write.
+        dbapi_connection = session.connection().connection.dbapi_connection
+        if not dbapi_connection.in_transaction:
+            session.execute(text("BEGIN IMMEDIATE"))
+
+def dialect_insert(session: Session, model):
+    """INSERT construct for the bound dialect, so callers can use on_conflict_do_update on both backends."""
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on {dialect}")
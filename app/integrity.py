@@ -0,0 +1,170 @@
+"""
+integrity.py — Finds and repairs bad rows in the timeblock table.
+
+Run with:  python -m app.integrity            (dry run, prints a report)
+           python -m app.integrity --repair   (fixes everything it finds)
+
+Detects overlapping blocks, zero/negative-length blocks and blocks whose task no
+longer exists, with one sweep over the blocks in (owner, start_time) order; only blocks
+of the same user can overlap. The CLI covers every user, the /system routes only the
+caller's blocks. Repairs replay
+the trim/split rules of create_time_block, newest block first, so the result is the
+same as if every block had been entered through the API in id order.
+"""
+import argparse
+from datetime import datetime
+from typing import List, Optional
+
+from sqlmodel import Session, select, delete
+
+from app.core import changelog  # noqa: F401  repairs must reach /sync clients when run from the CLI
+from app.core.events import record_deleted
+from app.database import lock_timeline
+from app.models import Task, TimeBlock
+from app.services.calendar import resolve_overlaps
+from app.schemas import BlockIssue, IntegrityReport
+
+MAX_REPORTED_ISSUES = 500
+MAX_REPAIR_PASSES = 5
+
+
+def _owned(owner_id: Optional[int]) -> tuple:
+    """WHERE clauses limiting a sweep to one user's blocks; none (every user) for owner_id=None."""
+    return () if owner_id is None else (TimeBlock.owner_id == owner_id,)
+
+
+def scan(session: Session, batch_size: int = 5000, owner_id: Optional[int] = None) -> IntegrityReport:
+    """Streams every block once; an overlap is any block starting before the latest end seen so far."""
+    statement = (
+        select(TimeBlock.id, TimeBlock.task_id, TimeBlock.start_time, TimeBlock.end_time, Task.id, TimeBlock.owner_id)
+        .outerjoin(Task, Task.id == TimeBlock.task_id)
+        .where(*_owned(owner_id))
+        .order_by(TimeBlock.owner_id, TimeBlock.start_time, TimeBlock.id)
+        .execution_options(yield_per=batch_size)
+    )
+    report = IntegrityReport(scanned=0, overlaps=0, zero_length=0, orphans=0, issues=[])
+
+    def flag(block_id, task_id, start, end, issue, conflicts_with=None):
+        setattr(report, issue, getattr(report, issue) + 1)
+        if len(report.issues) < MAX_REPORTED_ISSUES:
+            report.issues.append(BlockIssue(
+                block_id=block_id, task_id=task_id, start_time=start, end_time=end,
+                issue=issue, conflicts_with=conflicts_with
+            ))
+
+    latest_end, latest_id, owner = None, None, None
+    for block_id, task_id, start, end, existing_task, block_owner in session.exec(statement):
+        report.scanned += 1
+        if block_owner != owner:
+            latest_end, latest_id, owner = None, None, block_owner
+        if existing_task is None:
+            flag(block_id, task_id, start, end, "orphans")
+        if end <= start:
+            flag(block_id, task_id, start, end, "zero_length")
+            continue
+        if latest_end is not None and start < latest_end:
+            flag(block_id, task_id, start, end, "overlaps", conflicts_with=latest_id)
+        if latest_end is None or end > latest_end:
+            latest_end, latest_id = end, block_id
+    return report
+
+
+def _overlapping_ids(session: Session, batch_size: int, owner_id: Optional[int]) -> List[int]:
+    ids, latest_end, latest_id, owner = set(), None, None, None
+    statement = (
+        select(TimeBlock.id, TimeBlock.start_time, TimeBlock.end_time, TimeBlock.owner_id)
+        .where(TimeBlock.end_time > TimeBlock.start_time, *_owned(owner_id))
+        .order_by(TimeBlock.owner_id, TimeBlock.start_time, TimeBlock.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for block_id, start, end, block_owner in session.exec(statement):
+        if block_owner != owner:
+            latest_end, latest_id, owner = None, None, block_owner
+        if latest_end is not None and start < latest_end:
+            ids.update((block_id, latest_id))
+        if latest_end is None or end > latest_end:
+            latest_end, latest_id = end, block_id
+    return sorted(ids, reverse=True)
+
+
+def _delete_in_batches(session: Session, condition, batch_size: int, owner_id: Optional[int]) -> int:
+    """Deletes the blocks matching condition one user at a time, each batch under that user's lock."""
+    if owner_id is None:
+        owners = session.exec(select(TimeBlock.owner_id).where(condition).distinct().order_by(TimeBlock.owner_id)).all()
+        session.commit()
+    else:
+        owners = [owner_id]
+    deleted = 0
+    for owner in owners:
+        while True:
+            lock_timeline(session, owner)
+            batch = session.exec(
+                select(TimeBlock.id, TimeBlock.start_time).where(condition, TimeBlock.owner_id == owner).limit(batch_size)
+            ).all()
+            if not batch:
+                session.commit()
+                break
+            session.exec(delete(TimeBlock).where(TimeBlock.id.in_([b.id for b in batch])))
+            record_deleted(session, block_ids=[b.id for b in batch], starts=[b.start_time for b in batch])
+            session.commit()
+            deleted += len(batch)
+    return deleted
+
+
+def repair(session: Session, batch_size: int = 500, owner_id: Optional[int] = None) -> IntegrityReport:
+    """Fixes everything scan() reports, committing every batch_size blocks, and returns the pre-repair report."""
+    report = scan(session, owner_id=owner_id)
+    session.commit()  # each batch below takes the lock before its first read
+
+    _delete_in_batches(session, TimeBlock.end_time <= TimeBlock.start_time, batch_size, owner_id)
+    _delete_in_batches(session, ~select(Task.id).where(Task.id == TimeBlock.task_id).exists(), batch_size, owner_id)
+
+    # Splitting an old block can leave a new piece that still overlaps something older; rescan until clean.
+    for _ in range(MAX_REPAIR_PASSES):
+        ids = _overlapping_ids(session, batch_size, owner_id)
+        session.commit()
+        if not ids:
+            break
+        for i in range(0, len(ids), batch_size):
+            batch = ids[i:i + batch_size]
+            owners = session.exec(select(TimeBlock.owner_id).where(TimeBlock.id.in_(batch)).distinct()).all()
+            session.commit()
+            for owner in sorted(owners):
+                lock_timeline(session, owner)
+            for block_id in batch:
+                block = session.get(TimeBlock, block_id)
+                if block is not None:
+                    resolve_overlaps(session, block.start_time, block.end_time, exclude_id=block.id,
+                                     owner_id=block.owner_id)
+                    session.flush()
+            session.commit()
+
+    report.repaired = True
+    report.repaired_at = datetime.now()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repair", action="store_true", help="fix the issues instead of only reporting them")
+    parser.add_argument("--batch-size", type=int, default=500, help="blocks per repair transaction")
+    args = parser.parse_args()
+
+    from app.database import engine
+
+    with Session(engine) as session:
+        report = repair(session, args.batch_size) if args.repair else scan(session)
+
+    print(f"Scanned {report.scanned} blocks: {report.overlaps} overlaps, "
+          f"{report.zero_length} zero-length, {report.orphans} orphaned.")
+    for issue in report.issues:
+        extra = f" (overlaps block {issue.conflicts_with})" if issue.conflicts_with else ""
+        print(f"  #{issue.block_id} task={issue.task_id} {issue.start_time} → {issue.end_time}: {issue.issue}{extra}")
+    if report.repaired:
+        print("✅ Repaired.")
+    elif report.overlaps or report.zero_length or report.orphans:
+        print("Dry run only — re-run with --repair to fix.")
+
+
+if __name__ == "__main__":
+    main()
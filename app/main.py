@@ -1,24 +1,34 @@
 from contextlib import asynccontextmanager 
-from app.database import init_db, get_session
-from fastapi import FastAPI, Depends, HTTPException
+from app.database import init_db, get_session, engine, read_engine, REVISION_HEADER
+from app import integrity, compaction, partitions, warmup
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlmodel import Session, select
 from app.models import ActiveTimer
+from app.schemas import IntegrityReport, CompactionReport
 from pydantic import BaseModel
 from datetime import datetime
 from app.routers import categories, tasks, callender
-from app.routers import analytics, timer
-from app.core.config import ALLOWED_ORIGINS, OFFSET_HOURS
+from app.routers import analytics, timer, sync, settings
+from app.core.config import ALLOWED_ORIGINS, OFFSET_HOURS, ANALYTICS_WARMUP
+from app.services import ServiceError
+from app.core.users import get_owner
+from app.services import system as system_service
+from app.core.compression import CompressionMiddleware
+from app.core.revisions import RevisionMiddleware
 from app.models import TimeBlock
 from datetime import timedelta, time
-import psutil
-import os
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Initializing Database Tables...")
     init_db()
+    partitions.maintain(engine)
+    stop_warmup = warmup.start(read_engine) if ANALYTICS_WARMUP else None
     yield
+    if stop_warmup:
+        stop_warmup()
 
 
 app = FastAPI(title="Daily Focus API", lifespan=lifespan)
@@ -29,13 +39,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[REVISION_HEADER],
 )
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(RevisionMiddleware)
+
+@app.exception_handler(ServiceError)
+async def service_error_handler(request: Request, exc: ServiceError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 app.include_router(categories.router)
 app.include_router(tasks.router)
 app.include_router(callender.router)
 app.include_router(analytics.router)
 app.include_router(timer.router)
+app.include_router(sync.router)
+app.include_router(settings.router)
 
 @app.get("/")
 def read_root():
@@ -43,16 +62,19 @@ def read_root():
 
 @app.get("/system/stats")
 def get_system_stats():
-    process = psutil.Process(os.getpid())
-    mem_info = process.memory_info()
-    
-    return {
-        "cpu_percent": psutil.cpu_percent(interval=0.1),
-        "process_cpu_percent": process.cpu_percent(interval=0.1),
-        "total_memory_hz": psutil.virtual_memory().total,
-        "available_memory_hz": psutil.virtual_memory().available,
-        "process_memory_hz": mem_info.rss,
-        "memory_percent": psutil.virtual_memory().percent
-    }
+    return system_service.system_stats()
+
+@app.get("/system/integrity", response_model=IntegrityReport)
+def get_integrity_report(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    """Dry run: lists the caller's overlapping, zero-length and orphaned blocks without touching them."""
+    return integrity.scan(session, owner_id=owner_id)
 
+@app.post("/system/integrity/repair", response_model=IntegrityReport)
+def repair_integrity(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    """Fixes everything the dry run reports; the response is the report from before the repair."""
+    return integrity.repair(session, owner_id=owner_id)
 
+@app.post("/system/compact", response_model=CompactionReport)
+def compact_history(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    """Merges the caller's adjacent same-task blocks and, if ARCHIVE_AFTER_MONTHS is set, archives their old history."""
+    return compaction.compact(session, owner_id=owner_id)
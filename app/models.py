@@ -1,16 +1,31 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index, PrimaryKeyConstraint, event, func, literal_column
+from sqlalchemy.ext.compiler import compiles
 from typing import Optional, List
 from datetime import datetime
 
+
+def normalize_title(title: str) -> str:
+    return title.strip().lower()
+
+def owner_field():
+    """The user a row belongs to (see app.core.users). 0 is the single user of deployments that don't send X-User-Id."""
+    return Field(default=0, sa_column_kwargs={"server_default": "0"})
+
 class Category(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    name: str = Field(index=True)
+    owner_id: int = owner_field()
+    name: str
     color_hex: str  
     tasks: List["Task"] = Relationship(back_populates="category")
 
+Index("ix_category_owner_id_name", Category.owner_id, Category.name)
+
 class Task(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    owner_id: int = owner_field()
     title: str
+    normalized_title: str = Field(default="", sa_column_kwargs={"server_default": ""})  # filled by the hook below
     is_completed: bool = Field(default=False)
     is_streak: bool = Field(default=False)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -20,15 +35,89 @@ class Task(SQLModel, table=True):
     
     time_blocks: List["TimeBlock"] = Relationship(back_populates="task")
 
+# One task per user, title and category regardless of case; NULL categories are folded to 0 so they dedupe too.
+TASK_DEDUPE_KEY = (Task.owner_id, Task.normalized_title, func.coalesce(Task.category_id, literal_column("0")))
+Index("ux_task_owner_id_normalized_title_category", *TASK_DEDUPE_KEY, unique=True)
+
+@event.listens_for(Task, "before_insert")
+@event.listens_for(Task, "before_update")
+def _set_normalized_title(mapper, connection, target):
+    target.normalized_title = normalize_title(target.title)
+
 class TimeBlock(SQLModel, table=True):
+    # Monthly partitions on Postgres (see app.partitions); SQLite keeps a single table.
+    __table_args__ = ({"postgresql_partition_by": "RANGE (start_time)"},)
     id: Optional[int] = Field(default=None, primary_key=True)
-    task_id: int = Field(foreign_key="task.id")
+    owner_id: int = owner_field()
+    task_id: int = Field(foreign_key="task.id", index=True)
     start_time: datetime
     end_time: datetime
     task: Optional[Task] = Relationship(back_populates="time_blocks")
 
+def _unpartitioned(ddl, target, bind, dialect, **kw) -> bool:
+    if dialect.name != "postgresql":
+        return True
+    if bind is None:  # compiled without a database: the models describe a partitioned table
+        return False
+    from app.partitions import is_partitioned
+
+    return not is_partitioned(bind)
+
+# Every time range query is one user's, so the index leads with the owner.
+# On partitioned Postgres every partition gets its own index instead: a b-tree while recent,
+# BRIN once old. A plain timeblock table that `partitions --convert` hasn't rebuilt yet keeps it.
+Index("ix_timeblock_owner_id_start_time", TimeBlock.owner_id, TimeBlock.start_time).ddl_if(callable_=_unpartitioned)
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _timeblock_primary_key(constraint, compiler, **kw):
+    """A partitioned table's primary key has to include the partition key; the ORM still identifies blocks by id."""
+    if constraint.table is not None and constraint.table.name == "timeblock":
+        return "PRIMARY KEY (id, start_time)"
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+class ArchivedDay(SQLModel, table=True):
+    """What is left of a task's blocks on one effective day once they are archived (see app.compaction)."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    owner_id: int = owner_field()
+    task_id: int = Field(foreign_key="task.id", index=True)
+    start_time: datetime  # start of the effective day, so it buckets like a block
+    minutes: int
+
+Index("ux_archivedday_task_start_time", ArchivedDay.task_id, ArchivedDay.start_time, unique=True)
+Index("ix_archivedday_owner_id_start_time", ArchivedDay.owner_id, ArchivedDay.start_time)
+
 class ActiveTimer(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    owner_id: int = owner_field()
     task_id: int = Field(foreign_key="task.id")
     start_time: Optional[datetime] = Field(default=None)
-    accumulated_seconds: int = Field(default=0)
\ No newline at end of file
+    accumulated_seconds: int = Field(default=0)
+
+# One running timer per user.
+Index("ux_activetimer_owner_id", ActiveTimer.owner_id, unique=True)
+
+class UserSettings(SQLModel, table=True):
+    """A user's day boundary and time zone (see app.services.settings); users without a row get the defaults."""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    owner_id: int = owner_field()
+    day_start_hour: int  # effective days run from this hour to the same hour the next day
+    time_zone: Optional[str] = None  # IANA name; None means the server's local time
+
+Index("ux_usersettings_owner_id", UserSettings.owner_id, unique=True)
+
+class ChangeLog(SQLModel, table=True):
+    """
+    Latest change to each Category/Task/TimeBlock/ActiveTimer/UserSettings row, ordered by revision (see app.core.changelog).
+    Older entries for a row are dropped when it changes again, so the log stays as large as the tables.
+    """
+    # AUTOINCREMENT so SQLite never hands out a revision again after the newest entry is deleted.
+    __table_args__ = ({"sqlite_autoincrement": True},)
+    revision: Optional[int] = Field(default=None, primary_key=True)
+    owner_id: int = owner_field()  # of the changed row; /sync and the analytics caches only look at their user's
+    table_name: str
+    row_id: int
+    op: str  # "upsert", "delete", or "truncate" with row_id = newest revision removed by truncation
+    changed_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+Index("ix_changelog_table_name_row_id", ChangeLog.table_name, ChangeLog.row_id)
+Index("ix_changelog_owner_id_revision", ChangeLog.owner_id, ChangeLog.revision)
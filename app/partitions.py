@@ -0,0 +1,182 @@
+"""
+partitions.py — Monthly range partitions of the timeblock table on Postgres.
+
+Run with:  python -m app.partitions             (create upcoming partitions, re-index old ones)
+           python -m app.partitions --convert   (turn an existing plain timeblock table into a partitioned one)
+
+On Postgres timeblock is PARTITION BY RANGE (start_time): one partition per effective month,
+bounded at the default OFFSET_HOURS, plus a DEFAULT partition for anything outside them.
+Users with another day start (app.services.settings) have month windows a few hours off
+the bounds; their queries just touch the neighbouring partition too. maintain() runs at startup and after compaction. It creates the
+partitions for this month, PARTITION_MONTHS_AHEAD months ahead and every month that has
+rows in the default partition (old history entered late), moving those rows over.
+Recent partitions get a b-tree on (owner_id, start_time), so one user's window is a
+single index range however many users share the table. Partitions older than
+PARTITION_HOT_MONTHS get a BRIN index on start_time instead: blocks are written in time
+order, so a few pages of block ranges do the job of a full index, and old months are
+read by whole ranges (archiving, reports) far more than by single users.
+
+SQLite deployments keep a single table and every function here is a no-op for them.
+"""
+import argparse
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import OFFSET_HOURS, PARTITION_HOT_MONTHS, PARTITION_MONTHS_AHEAD
+from app.core.timebuckets import effective_date, effective_range
+from app.database import TIMELINE_LOCK_NAMESPACE
+
+TABLE = "timeblock"
+DEFAULT_PARTITION = f"{TABLE}_default"
+# Owner key of the advisory lock that keeps several starting workers from creating the same partition.
+PARTITION_LOCK_OWNER = -2
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_y{month.year}m{month.month:02d}"
+
+
+def partition_bounds(month: date) -> Tuple[datetime, datetime]:
+    """[start, end) of an effective month; partition keys are compared in the same local time as blocks."""
+    return effective_range(month)[0], effective_range(add_months(month, 1))[0]
+
+
+def is_partitioned(connection: Connection) -> bool:
+    return connection.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = :table"
+    ), {"table": TABLE}).first() is not None
+
+
+def partitions(connection: Connection) -> List[str]:
+    return connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": TABLE}).scalars().all()
+
+
+def _literal(value: datetime) -> str:
+    # Partition bounds are DDL and can't be bind parameters; these always come from dates we built.
+    return f"'{value:%Y-%m-%d %H:%M:%S}'"
+
+
+def create_partition(connection: Connection, month: date):
+    """Creates one month's partition, moving any of its rows that landed in the default partition."""
+    name = partition_name(month)
+    start, end = partition_bounds(month)
+    bounds = f"FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})"
+    in_range = f"start_time >= {_literal(start)} AND start_time < {_literal(end)}"
+    if connection.execute(text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range} LIMIT 1")).first() is None:
+        connection.execute(text(f"CREATE TABLE {name} PARTITION OF {TABLE} {bounds}"))
+        return
+    # Attaching checks the default partition no longer holds rows for the range, so empty it first.
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    connection.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} {bounds}"))
+
+
+def index_partition(connection: Connection, name: str, hot: bool):
+    """A b-tree on (owner_id, start_time) for recent partitions, a BRIN index for old ones."""
+    # {name}_start_time_idx is the b-tree partitions had before blocks had owners.
+    connection.execute(text(f"DROP INDEX IF EXISTS {name}_start_time_idx"))
+    if hot:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name}_owner_start_time_idx ON {name} (owner_id, start_time)"))
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}_start_time_brin"))
+    else:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name}_start_time_brin ON {name} USING brin (start_time)"))
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}_owner_start_time_idx"))
+
+
+def maintain(engine, now: Optional[datetime] = None) -> List[str]:
+    """Creates missing partitions and (re-)indexes all of them; returns the names of new partitions."""
+    if engine.dialect.name != "postgresql":
+        return []
+    this_month = effective_date(now or datetime.now()).replace(day=1)
+    created = []
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return []
+        connection.execute(
+            text("SELECT pg_advisory_xact_lock(:namespace, :owner)"),
+            {"namespace": TIMELINE_LOCK_NAMESPACE, "owner": PARTITION_LOCK_OWNER},
+        )
+        connection.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        index_partition(connection, DEFAULT_PARTITION, hot=True)  # before the per-month moves below scan it
+
+        existing = set(partitions(connection))
+        # Past months only get a partition once the default partition holds rows for them.
+        stray_months = connection.execute(text(
+            f"SELECT DISTINCT date_trunc('month', start_time - make_interval(hours => :offset)) FROM {DEFAULT_PARTITION}"
+        ), {"offset": OFFSET_HOURS}).scalars().all()
+        months = {m.date() for m in stray_months} | {add_months(this_month, n) for n in range(PARTITION_MONTHS_AHEAD + 1)}
+        for month in sorted(months):
+            if partition_name(month) not in existing:
+                create_partition(connection, month)
+                created.append(partition_name(month))
+
+        hot_from = add_months(this_month, -PARTITION_HOT_MONTHS)
+        for name in partitions(connection):
+            index_partition(connection, name, hot=name == DEFAULT_PARTITION or name >= partition_name(hot_from))
+    return created
+
+
+def convert(engine) -> int:
+    """Rebuilds a plain timeblock table as a partitioned one in one transaction; returns the rows copied."""
+    from app.models import TimeBlock
+
+    with engine.begin() as connection:
+        if is_partitioned(connection):
+            return 0
+        connection.execute(text(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_unpartitioned"))
+        # Constraint and index names are schema-wide; free them for the new table.
+        connection.execute(text(
+            f"ALTER TABLE {TABLE}_unpartitioned DROP CONSTRAINT IF EXISTS {TABLE}_pkey, "
+            f"DROP CONSTRAINT IF EXISTS {TABLE}_task_id_fkey"
+        ))
+        connection.execute(text(
+            "DROP INDEX IF EXISTS ix_timeblock_task_id, ix_timeblock_start_time, ix_timeblock_owner_id_start_time"
+        ))
+        TimeBlock.__table__.create(connection)
+        connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+        copied = connection.execute(text(
+            f"INSERT INTO {TABLE} (id, task_id, start_time, end_time, owner_id) "
+            f"SELECT id, task_id, start_time, end_time, owner_id FROM {TABLE}_unpartitioned"
+        )).rowcount
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), coalesce((SELECT max(id) FROM {TABLE}), 0) + 1, false)"
+        ))
+        connection.execute(text(f"DROP TABLE {TABLE}_unpartitioned"))
+    maintain(engine)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--convert", action="store_true", help="partition an existing unpartitioned timeblock table")
+    args = parser.parse_args()
+
+    from app.database import engine, init_db
+
+    if engine.dialect.name != "postgresql":
+        print("Partitioning is only used on Postgres; nothing to do.")
+        return
+    if args.convert:
+        init_db()  # adds owner_id to tables from before it existed
+        print(f"Copied {convert(engine)} blocks into the partitioned table.")
+    created = maintain(engine)
+    print(f"✅ Created {len(created)} partitions{': ' + ', '.join(created) if created else '.'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,101 +1,70 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlmodel import Session, select
-from datetime import datetime, date, timedelta
-from app.database import get_session
-from app.models import TimeBlock, Task
-from app.schemas import DashboardReport, TaskBreakdownData, TaskStreakReport
-from app.core.config import OFFSET_HOURS
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlmodel import Session
+from typing import Literal, Optional
+from datetime import datetime
+from app.core.users import USER_HEADER, get_owner
+from app.database import get_read_session
+from app.schemas import DashboardReport, TaskStreakReport, HeatmapReport, DistributionReport
+from app.schemas import BatchAnalyticsRequest, BatchAnalyticsReport
+from app.core.config import DASHBOARD_MAX_POINTS
+from app.services import analytics as analytics_service
+from app.services.settings import get_clock
+from app.core import formats
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
-@router.get("/dashboard", response_model=DashboardReport)
+@router.get("/dashboard", response_model=DashboardReport, responses=formats.RESPONSES)
 def get_dashboard_data(
+    request: Request,
     start_date: datetime = Query(..., description="Start of range"),
     end_date: datetime = Query(..., description="End of range"),
-    session: Session = Depends(get_session)
+    granularity: Literal["day", "week", "month", "auto"] = Query("auto", description="Bar chart bucket size"),
+    max_points: int = Query(DASHBOARD_MAX_POINTS, ge=1, description="Upper bound on bar chart entries for granularity=auto"),
+    limit: Optional[int] = Query(None, ge=1, description="Keep the top K categories and tasks, roll the rest into Other"),
+    session: Session = Depends(get_read_session),
+    owner_id: int = Depends(get_owner)
 ):
-    statement = select(TimeBlock).where(
-        TimeBlock.start_time >= start_date,
-        TimeBlock.end_time <= end_date
-    )
-    blocks = session.exec(statement).all()
+    return formats.respond(request, analytics_service.dashboard(session, start_date, end_date, granularity, max_points, limit, owner_id=owner_id))
 
-    total_minutes = 0
-    pie_data: dict = {}     
-    bar_data: dict = {}      
-    task_data: dict = {}     
-
-    for block in blocks:
-        duration = int((block.end_time - block.start_time).total_seconds() // 60)
-        total_minutes += duration
-
-        task_title = block.task.title if block.task else "Unknown"
-        cat_name   = block.task.category.name      if (block.task and block.task.category) else "Uncategorized"
-        cat_color  = block.task.category.color_hex if (block.task and block.task.category) else "#CCCCCC"
-
-        if cat_name not in pie_data:
-            pie_data[cat_name] = {"name": cat_name, "value": 0, "color": cat_color}
-        pie_data[cat_name]["value"] += duration
-        block_date_str = (block.start_time - timedelta(hours=OFFSET_HOURS)).date().isoformat()
-        bar_data.setdefault(block_date_str, {})
-        bar_data[block_date_str][cat_name] = bar_data[block_date_str].get(cat_name, 0) + duration
-
-        if task_title not in task_data:
-            task_data[task_title] = {"minutes": 0, "color": cat_color}
-        task_data[task_title]["minutes"] += duration
-
-    return DashboardReport(
-        total_minutes=total_minutes,
-        pie_chart=list(pie_data.values()),
-        bar_chart=[{"date": d, "categories": cats} for d, cats in sorted(bar_data.items())],
-        task_breakdown=[
-            TaskBreakdownData(task=title, minutes=v["minutes"], color=v["color"])
-            for title, v in sorted(task_data.items(), key=lambda x: -x[1]["minutes"])
-        ]
-    )
+@router.get("/distribution", response_model=DistributionReport, responses=formats.RESPONSES)
+def get_session_distribution(
+    request: Request,
+    start_date: datetime = Query(..., description="Start of range"),
+    end_date: datetime = Query(..., description="End of range"),
+    group_by: Literal["task", "category"] = Query("task"),
+    session: Session = Depends(get_read_session),
+    owner_id: int = Depends(get_owner)
+):
+    """Session-length distribution (count, mean, median, p90, max) and sessions per active day."""
+    return formats.respond(request, analytics_service.distribution(session, start_date, end_date, group_by, owner_id=owner_id))
 
+@router.post("/batch", response_model=BatchAnalyticsReport, responses=formats.RESPONSES)
+def get_batch_dashboard_data(http_request: Request, request: BatchAnalyticsRequest, session: Session = Depends(get_read_session), owner_id: int = Depends(get_owner)):
+    """One DashboardReport per named range from a single scan, plus the change between consecutive ranges."""
+    return formats.respond(http_request, analytics_service.batch_dashboard(session, request, owner_id=owner_id))
 
-@router.get("/streak/{task_id}", response_model=TaskStreakReport)
-def get_task_streak(task_id: int, session: Session = Depends(get_session)):
+@router.get("/streak/{task_id}", response_model=TaskStreakReport, responses=formats.RESPONSES)
+def get_task_streak(request: Request, task_id: int, session: Session = Depends(get_read_session), owner_id: int = Depends(get_owner)):
     """
     Calculates your current daily consistency streak for a specific task.
     """
-    task = session.get(Task, task_id)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    statement = select(TimeBlock).where(TimeBlock.task_id == task_id)
-    blocks = session.exec(statement).all()
-
-    if not blocks:
-        return TaskStreakReport(
-            task_id=task.id, task_title=task.title, current_streak_days=0,
-            total_time_spent_minutes=0, tracked_days_count=0
-        )
+    return formats.respond(request, analytics_service.task_streak(session, task_id, owner_id=owner_id))
 
-    today = (datetime.now() - timedelta(hours=OFFSET_HOURS)).date()
-    total_time = sum(int((b.end_time - b.start_time).total_seconds() // 60) for b in blocks)
-
-    unique_dates = sorted(
-        list(set((b.start_time - timedelta(hours=OFFSET_HOURS)).date() for b in blocks if (b.start_time - timedelta(hours=OFFSET_HOURS)).date() <= today)),
-        reverse=True
-    )
-    
-    current_streak = 0
-    if unique_dates and (unique_dates[0] == today or unique_dates[0] == today - timedelta(days=1)):
-        current_streak = 1
-        current_date_to_check = unique_dates[0]
-        for i in range(1, len(unique_dates)):
-            if unique_dates[i] == current_date_to_check - timedelta(days=1):
-                current_streak += 1
-                current_date_to_check = unique_dates[i]
-            else:
-                break
-
-    return TaskStreakReport(
-        task_id=task.id,
-        task_title=task.title,
-        current_streak_days=current_streak,
-        total_time_spent_minutes=total_time,
-        tracked_days_count=len(unique_dates)
-    )
\ No newline at end of file
+@router.get("/heatmap", response_model=HeatmapReport, responses=formats.RESPONSES)
+def get_heatmap(
+    request: Request,
+    response: Response,
+    year: int = Query(..., ge=1970, le=9999),
+    task_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    session: Session = Depends(get_read_session),
+    owner_id: int = Depends(get_owner)
+):
+    """Minutes per effective day of a year, run-length encoded as [minutes, days] pairs."""
+    report = analytics_service.heatmap(session, year, task_id, category_id, owner_id=owner_id)
+    headers = {}
+    if analytics_service.heatmap_is_final(year, get_clock(session, owner_id)):
+        # Private: the report is one user's; shared caches would hand it to the next X-User-Id.
+        headers = {"Cache-Control": "private, max-age=86400", "Vary": f"Accept, {USER_HEADER}"}
+    response.headers.update(headers)
+    return formats.respond(request, report, headers=headers)
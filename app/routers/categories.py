@@ -1,41 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
 from typing import List
 
-from app.database import get_session
-from app.models import Category
+from app.core.users import get_owner
+from app.database import get_session, get_read_session
 from app.schemas import CategoryCreate, CategoryRead
+from app.services import categories as category_service
 
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
 @router.post("/", response_model=CategoryRead)
-async def create_category(
+def create_category(
     category: CategoryCreate,
-    session: Session = Depends(get_session)
+    session: Session = Depends(get_session),
+    owner_id: int = Depends(get_owner)
 ):
-    db_category = Category(**category.model_dump())
-    session.add(db_category)
-    session.commit()
-    session.refresh(db_category)
-    return db_category
+    return category_service.create_category(session, category, owner_id=owner_id)
 
 @router.get("/", response_model=List[CategoryRead])
-async def read_categories(
-    session: Session = Depends(get_session)
+def read_categories(
+    session: Session = Depends(get_read_session),
+    owner_id: int = Depends(get_owner)
 ):
-    categories = session.exec(select(Category)).all()
-    return categories
+    return category_service.list_categories(session, owner_id=owner_id)
 
 @router.put("/{category_id}", response_model=CategoryRead)
-def update_category(category_id: int, category: CategoryCreate, session: Session = Depends(get_session)):
-    db_category = session.get(Category, category_id)
-    if not db_category:
-        raise HTTPException(status_code=404, detail="Category not found")
-    
-    db_category.name = category.name
-    db_category.color_hex = category.color_hex
-    session.add(db_category)
-    session.commit()
-    session.refresh(db_category)
-    return db_category
\ No newline at end of file
+def update_category(category_id: int, category: CategoryCreate, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return category_service.update_category(session, category_id, category, owner_id=owner_id)
@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends
+from sqlmodel import Session
+
+from app.core.users import get_owner
+from app.database import get_session
+from app.schemas import UserSettingsRead, UserSettingsUpdate
+from app.services import settings as settings_service
+
+router = APIRouter(prefix="/settings", tags=["Settings"])
+
+@router.get("/", response_model=UserSettingsRead)
+def read_settings(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    """The user's day start hour and time zone, plus the effective day it is for them right now."""
+    return settings_service.get_settings(session, owner_id=owner_id)
+
+@router.put("/", response_model=UserSettingsRead)
+def update_settings(settings: UserSettingsUpdate, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return settings_service.update_settings(session, settings, owner_id=owner_id)
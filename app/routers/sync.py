@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from sqlmodel import Session
+from typing import List
+
+from app.core.users import get_owner
+from app.database import get_read_session
+from app.schemas import SyncReport
+from app.services import sync as sync_service
+from app.services.sync import SYNCED, SyncedTable
+
+router = APIRouter(tags=["Sync"])
+
+@router.get("/sync", response_model=SyncReport)
+def sync(
+    since: int = Query(0, ge=0, description="Revision the client already has; 0 for a full snapshot"),
+    tables: List[SyncedTable] = Query(list(SYNCED)),
+    session: Session = Depends(get_read_session),
+    owner_id: int = Depends(get_owner)
+):
+    """Rows changed after `since` plus deleted ids; pass the returned revision back next time."""
+    return sync_service.sync(session, since, tables, owner_id=owner_id)
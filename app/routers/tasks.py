@@ -1,12 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, func
+from fastapi import APIRouter, Depends, Request
+from sqlmodel import Session
 from typing import List
-from datetime import datetime, date, time, timedelta
-from app.database import get_session
-from app.models import Task ,TimeBlock
-from app.schemas import TaskCreate, TaskRead, TaskUpdate
-from app.schemas import TimeBlockCreate
-from app.core.config import OFFSET_HOURS
+from app.core.users import get_owner
+from app.database import get_session, get_read_session
+from app.schemas import TaskCreate, TaskRead, TaskUpdate, BatchDeleteRequest, BatchDeleteReport
+from app.services import tasks as task_service
+from app.core import formats
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
 
 # @router.post("/block")
@@ -37,83 +36,26 @@ router = APIRouter(prefix="/tasks", tags=["Tasks"])
 #     return db_block
 
 @router.post("/", response_model=TaskRead)
-def create_task(task: TaskCreate, session: Session = Depends(get_session)):
-    stmt = select(Task).where(
-        func.lower(Task.title) == task.title.lower(),
-        Task.category_id == task.category_id
-    )
-    existing_task = session.exec(stmt).first()
-    
-    if existing_task:
-        existing_task.created_at = datetime.utcnow()
-        existing_task.is_completed = False
-        session.add(existing_task)
-        session.commit()
-        session.refresh(existing_task)
-        return existing_task
-
-    db_task = Task(**task.model_dump())
-    session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
-    return db_task
+def create_task(task: TaskCreate, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return task_service.create_task(session, task, owner_id=owner_id)
 
-@router.get("/", response_model=List[TaskRead])
-def get_tasks(session: Session = Depends(get_session)):
-    return session.exec(select(Task)).all()
+@router.get("/", response_model=List[TaskRead], responses=formats.RESPONSES)
+def get_tasks(request: Request, session: Session = Depends(get_read_session), owner_id: int = Depends(get_owner)):
+    return formats.respond(request, task_service.list_tasks(session, owner_id=owner_id), TaskRead)
 
 @router.put("/{task_id}", response_model=TaskRead)
-def toggle_task_completion(task_id: int, task_update: TaskUpdate, session: Session = Depends(get_session)):
-    db_task = session.get(Task, task_id)
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    if task_update.is_completed is not None:
-        db_task.is_completed = task_update.is_completed
-    if task_update.is_streak is not None:
-        db_task.is_streak = task_update.is_streak
-    session.add(db_task)
-    session.commit()
-    session.refresh(db_task)
-    return db_task
+def toggle_task_completion(task_id: int, task_update: TaskUpdate, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return task_service.update_task(session, task_id, task_update, owner_id=owner_id)
 
 @router.delete("/{task_id}")
-def delete_task(task_id: int, session: Session = Depends(get_session)):
-    db_task = session.get(Task, task_id)
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    now = datetime.now()
-    effective_today = (now - timedelta(hours=OFFSET_HOURS)).date()
-    day_start = datetime.combine(effective_today, time(OFFSET_HOURS, 0))
-    day_end = day_start + timedelta(days=1)
-    
-    today_blocks = session.exec(select(TimeBlock).where(
-        TimeBlock.task_id == task_id,
-        TimeBlock.start_time >= day_start,
-        TimeBlock.start_time <= day_end
-    )).all()
-    
-    for b in today_blocks:
-        session.delete(b)
-
-    all_history = session.exec(select(TimeBlock).where(TimeBlock.task_id == task_id)).all()
-    if not all_history:
-        session.delete(db_task)
-        
-    session.commit()
-    return {"status": "success"}
+def delete_task(task_id: int, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return task_service.delete_task(session, task_id, owner_id=owner_id)
 
 @router.delete("/force/{task_id}")
-def force_delete_task(task_id: int, session: Session = Depends(get_session)):
-    db_task = session.get(Task, task_id)
-    if not db_task:
-        raise HTTPException(status_code=404, detail="Task not found")
+def force_delete_task(task_id: int, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return task_service.force_delete_task(session, task_id, owner_id=owner_id)
 
-    all_history = session.exec(select(TimeBlock).where(TimeBlock.task_id == task_id)).all()
-    for b in all_history:
-        session.delete(b)
-        
-    session.delete(db_task)
-    session.commit()
-    return {"status": "success"}
\ No newline at end of file
+@router.post("/batch-delete", response_model=BatchDeleteReport)
+def batch_delete(request: BatchDeleteRequest, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    """Force-deletes many tasks and/or individual blocks in a single transaction."""
+    return task_service.batch_delete(session, request, owner_id=owner_id)
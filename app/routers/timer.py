@@ -1,84 +1,29 @@
 from fastapi import APIRouter, Depends
-from sqlmodel import Session, select
-from datetime import datetime, time, timedelta
+from sqlmodel import Session
 
+from app.core.users import get_owner
 from app.database import get_session
-from app.models import ActiveTimer, TimeBlock
-from app.schemas import ActiveTimerCreate, ActiveTimerRead
-from app.core.config import OFFSET_HOURS
+from app.schemas import ActiveTimerCreate
+from app.services import timer as timer_service
 
 router = APIRouter(prefix="/timer", tags=["timer"])
 
 @router.post("/start")
-def start_timer(timer_in: ActiveTimerCreate, session: Session = Depends(get_session)):
-    existing = session.exec(select(ActiveTimer)).all()
-    for e in existing:
-        session.delete(e)
-    session.commit()
-    
-    new_timer = ActiveTimer(task_id=timer_in.task_id, start_time=timer_in.start_time, accumulated_seconds=0)
-    session.add(new_timer)
-    session.commit()
-    return {"status": "started"}
+def start_timer(timer_in: ActiveTimerCreate, session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return timer_service.start_timer(session, timer_in, owner_id=owner_id)
 
 @router.get("/active", response_model=None)
-def get_active_timer(session: Session = Depends(get_session)):
-    timer = session.exec(select(ActiveTimer)).first()
-    if timer:
-        now = datetime.now()
-        is_paused = timer.start_time is None
-        
-        if not is_paused:
-            timer_date = (timer.start_time - timedelta(hours=OFFSET_HOURS)).date()
-            reset_time = datetime.combine(timer_date + timedelta(days=1), time(OFFSET_HOURS, 0))
-            
-            if now >= reset_time:
-                if reset_time > timer.start_time + timedelta(minutes=1):
-                    try:
-                        tb = TimeBlock(task_id=timer.task_id, start_time=timer.start_time, end_time=reset_time)
-                        session.add(tb)
-                    except Exception as e:
-                        print("Error auto-saving timer:", e)
-                
-                session.delete(timer)
-                session.commit()
-                return None
-        
-        return {
-            "task_id": timer.task_id, 
-            "start_time": timer.start_time.isoformat() if timer.start_time else None,
-            "accumulated_seconds": timer.accumulated_seconds,
-            "is_paused": is_paused
-        }
-    return None
+def get_active_timer(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return timer_service.get_active_timer(session, owner_id=owner_id)
 
 @router.post("/pause")
-def pause_timer(session: Session = Depends(get_session)):
-    timer = session.exec(select(ActiveTimer)).first()
-    if timer and timer.start_time:
-        now = datetime.now()
-        diff = int((now - timer.start_time).total_seconds())
-        timer.accumulated_seconds += max(0, diff)
-        timer.start_time = None
-        session.add(timer)
-        session.commit()
-    return {"status": "paused"}
+def pause_timer(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return timer_service.pause_timer(session, owner_id=owner_id)
 
 @router.post("/resume")
-def resume_timer(session: Session = Depends(get_session)):
-    timer = session.exec(select(ActiveTimer)).first()
-    if timer and timer.start_time is None:
-        timer.start_time = datetime.now()
-        session.add(timer)
-        session.commit()
-        return {"status": "resumed", "start_time": timer.start_time.isoformat()}
-    return {"status": "ignored"}
-
+def resume_timer(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return timer_service.resume_timer(session, owner_id=owner_id)
 
 @router.delete("/active")
-def clear_active_timer(session: Session = Depends(get_session)):
-    existing = session.exec(select(ActiveTimer)).all()
-    for e in existing:
-        session.delete(e)
-    session.commit()
-    return {"status": "cleared"}
+def clear_active_timer(session: Session = Depends(get_session), owner_id: int = Depends(get_owner)):
+    return timer_service.clear_timer(session, owner_id=owner_id)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional, List, Dict
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Literal
 from datetime import datetime, date
+from app.core.config import DASHBOARD_MAX_POINTS
 
 
 class CategoryCreate(BaseModel):
@@ -25,6 +26,22 @@ class TaskRead(TaskCreate):
     is_streak: bool
     created_at: datetime
 
+class BatchDeleteRequest(BaseModel):
+    task_ids: List[int] = []
+    block_ids: List[int] = []
+
+class BatchDeleteReport(BaseModel):
+    tasks_deleted: int
+    blocks_deleted: int
+    timers_cleared: int
+
+class UserSettingsUpdate(BaseModel):
+    day_start_hour: int = Field(ge=0, le=23)
+    time_zone: Optional[str] = None  # IANA name, e.g. "Europe/Berlin"; None uses the server's
+
+class UserSettingsRead(UserSettingsUpdate):
+    today: date  # the user's current effective day
+
 class TimeBlockCreate(BaseModel):
     task_id: int
     start_time: datetime
@@ -33,6 +50,52 @@ class TimeBlockCreate(BaseModel):
 class TimeBlockRead(TimeBlockCreate):
     id: int
 
+class TimelineColumns(BaseModel):
+    """One list per column, row i of the timeline in position i; pd.DataFrame() takes it as is."""
+    id: List[int] = []
+    task_id: List[int] = []
+    title: List[str] = []
+    color: List[str] = []
+    start_time: List[datetime] = []
+    end_time: List[datetime] = []
+
+class Timeline(BaseModel):
+    date: date
+    day_start: datetime
+    day_end: datetime
+    columns: TimelineColumns
+
+class FreeInterval(BaseModel):
+    date: date
+    start_time: datetime
+    end_time: datetime
+    minutes: int
+
+class BlockIssue(BaseModel):
+    block_id: int
+    task_id: int
+    start_time: datetime
+    end_time: datetime
+    issue: Literal["overlaps", "zero_length", "orphans"]
+    conflicts_with: Optional[int] = None
+
+class IntegrityReport(BaseModel):
+    scanned: int
+    overlaps: int
+    zero_length: int
+    orphans: int
+    issues: List[BlockIssue]  # capped; the counters are always complete
+    repaired: bool = False
+    repaired_at: Optional[datetime] = None
+
+class CompactionReport(BaseModel):
+    blocks_merged: int
+    blocks_archived: int = 0
+    days_archived: int = 0
+    archived_before: Optional[datetime] = None
+    changes_truncated: int = 0
+    live_blocks: int = 0
+
 class ActiveTimerCreate(BaseModel):
     task_id: int
     start_time: datetime
@@ -45,6 +108,23 @@ class ActiveTimerRead(BaseModel):
 
 
 
+class TimerState(BaseModel):
+    id: int
+    task_id: int
+    start_time: Optional[datetime]
+    accumulated_seconds: int
+
+class SyncReport(BaseModel):
+    revision: int
+    reset: bool  # true: the lists are a full snapshot and the client should drop its replica first
+    categories: List[CategoryRead] = []
+    tasks: List[TaskRead] = []
+    blocks: List[TimeBlockRead] = []
+    timers: List[TimerState] = []
+    deleted: Dict[str, List[int]] = {}
+
+
+
 class PieChartData(BaseModel):
     name: str       
     value: int      
@@ -61,13 +141,64 @@ class TaskBreakdownData(BaseModel):
 
 class DashboardReport(BaseModel):
     total_minutes: int
+    granularity: str = "day"
     pie_chart: List[PieChartData]
     bar_chart: List[BarChartData]
     task_breakdown: List[TaskBreakdownData]
 
+class SessionStats(BaseModel):
+    name: str
+    color: str
+    sessions: int
+    active_days: int
+    total_minutes: float
+    mean_minutes: float
+    median_minutes: float
+    p90_minutes: float
+    max_minutes: float
+    sessions_per_day: float
+
+class DistributionReport(BaseModel):
+    group_by: str
+    overall: Optional[SessionStats]
+    groups: List[SessionStats]
+
+class NamedRange(BaseModel):
+    name: str
+    start_date: datetime
+    end_date: datetime
+
+class BatchAnalyticsRequest(BaseModel):
+    ranges: List[NamedRange] = Field(..., min_length=1, max_length=12)
+    granularity: Literal["day", "week", "month", "auto"] = "auto"
+    max_points: int = Field(DASHBOARD_MAX_POINTS, ge=1)
+    limit: Optional[int] = Field(None, ge=1)
+
+class NamedDashboardReport(NamedRange):
+    report: DashboardReport
+
+class RangeDelta(BaseModel):
+    from_range: str
+    to_range: str
+    total_minutes: int
+    categories: Dict[str, int]
+    tasks: Dict[str, int]
+
+class BatchAnalyticsReport(BaseModel):
+    reports: List[NamedDashboardReport]
+    deltas: List[RangeDelta]
+
 class TaskStreakReport(BaseModel):
     task_id: int
     task_title: str
     current_streak_days: int
     total_time_spent_minutes: int
     tracked_days_count: int
+
+class HeatmapReport(BaseModel):
+    year: int
+    task_id: Optional[int]
+    category_id: Optional[int]
+    total_minutes: int
+    active_days: int
+    minutes_rle: List[List[int]]  # [minutes, consecutive days] pairs covering every day of the year
@@ -8,6 +8,7 @@ import random
 from datetime import datetime, timedelta, date, time as dtime
 from sqlmodel import Session, SQLModel
 from app.database import engine
+from app import partitions
 from app.models import Category, Task, TimeBlock
 
 
@@ -91,14 +92,16 @@ def make_blocks_for_day(tasks_for_day: list, target_date: date) -> list:
 
 # ── Main seeder ──────────────────────────────────────────────────────
 
-def seed():
+def seed(bind=None):
+    bind = bind or engine
     print("⚠️  Purging database...")
-    SQLModel.metadata.drop_all(engine)
-    SQLModel.metadata.create_all(engine)
+    SQLModel.metadata.drop_all(bind)
+    SQLModel.metadata.create_all(bind)
+    partitions.maintain(bind)  # Postgres: rows need a partition to land in
 
     print("🌱 Seeding 6 months of dummy data...")
 
-    with Session(engine) as session:
+    with Session(bind) as session:
 
         # 1. Create categories
         cat_map = {}   # name → Category object
@@ -173,6 +176,7 @@ def seed():
 
         session.commit()
 
+    partitions.maintain(bind)  # moves the older months out of the default partition
     print(f"✅ Done! Seeded {total_days} days × ~{total_blocks // max(total_days,1)} blocks/day = {total_blocks} total time blocks.")
 
 
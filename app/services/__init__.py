@@ -0,0 +1,32 @@
+"""
+Business logic shared by the FastAPI routers and the in-process frontend client.
+
+Service functions take a Session plus plain arguments and return models or schemas.
+They commit their own transactions and signal failures with ServiceError, which
+app.main turns into the same {"detail": ...} responses HTTPException produces.
+Each one acts for a single user, its owner_id argument, and never sees other users' rows.
+"""
+
+
+class ServiceError(Exception):
+    status_code = 400
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class NotFound(ServiceError):
+    status_code = 404
+
+
+class InvalidRequest(ServiceError):
+    status_code = 400
+
+
+def get_owned(session, model, row_id: int, owner_id: int, detail: str):
+    """session.get() that treats another user's row like a missing one."""
+    row = session.get(model, row_id)
+    if row is None or row.owner_id != owner_id:
+        raise NotFound(detail)
+    return row
@@ -0,0 +1,424 @@
+from sqlmodel import Session, select, func
+from sqlalchemy import and_, case, null, or_, union_all
+import heapq
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, date, timedelta
+from app.models import TimeBlock, Task, Category, ArchivedDay
+from app.schemas import DashboardReport, PieChartData, BarChartData, TaskBreakdownData, TaskStreakReport
+from app.schemas import HeatmapReport, SessionStats, DistributionReport
+from app.schemas import BatchAnalyticsRequest, BatchAnalyticsReport, NamedDashboardReport, RangeDelta
+from app.core.config import COLUMNAR_ANALYTICS, DASHBOARD_MAX_POINTS, ANALYTICS_RESULTS_KEPT, ANALYTICS_USERS_KEPT
+from app.core import changelog
+from app.core.singleflight import SingleFlight
+from app.core.timebuckets import UserClock, bucket_start, duration_minutes, duration_seconds, resolve_granularity
+from app.services import get_owned
+from app.services.settings import get_clock
+
+if COLUMNAR_ANALYTICS:
+    from app.core.columnar import block_store
+
+OTHER = "Other"
+OTHER_COLOR = "#64748b"
+
+_flights = {
+    name: SingleFlight(name, keep=ANALYTICS_RESULTS_KEPT, owners=ANALYTICS_USERS_KEPT)
+    for name in ("dashboard", "distribution", "batch", "streak", "heatmap")
+}
+
+def _coalesced(session: Session, name: str, owner_id: int, key: tuple, compute):
+    """
+    Runs compute() once for concurrent identical requests, e.g. several tabs refreshing the
+    same dashboard, and reuses the result until the data changes. The user's change-log
+    generation is part of the key, so a request that starts after one of their commits never
+    gets an older result, and other users' writes don't invalidate it.
+    """
+    return _flights[name].do((owner_id, *key, changelog.generation(session, owner_id)), compute)
+
+def _tracked_time(owner_id: Optional[int] = None):
+    """
+    Live blocks plus archived days as one (task_id, start_time, end_time, minutes) relation, so
+    analytics over old ranges don't depend on whether compaction has archived them yet.
+    An archived day reads as a zero-length block at the start of its effective day.
+    With an owner_id only that user's rows are included (range queries lead with it to use
+    the (owner_id, start_time) indexes); per-task queries leave it out, the task is already owned.
+    """
+    live = select(
+        TimeBlock.task_id,
+        TimeBlock.start_time,
+        TimeBlock.end_time,
+        duration_minutes(TimeBlock.start_time, TimeBlock.end_time).label("minutes"),
+    )
+    archived = select(ArchivedDay.task_id, ArchivedDay.start_time, ArchivedDay.start_time, ArchivedDay.minutes)
+    if owner_id is not None:
+        live = live.where(TimeBlock.owner_id == owner_id)
+        archived = archived.where(ArchivedDay.owner_id == owner_id)
+    return union_all(live, archived).subquery("tracked")
+
+def _grouped_minutes(tracked, granularity: str, day_start_hour: int, *minute_columns, by_task: bool = True):
+    """Tracked minutes summed per (bucket, task, category); callers add the range filter."""
+    bucket = bucket_start(tracked.c.start_time, granularity, day_start_hour)
+    group_by = [bucket, Category.name, Category.color_hex] + ([Task.title] if by_task else [])
+    return (
+        select(bucket, Task.title if by_task else null(), Category.name, Category.color_hex, *minute_columns)
+        .select_from(tracked)
+        .outerjoin(Task, Task.id == tracked.c.task_id)
+        .outerjoin(Category, Category.id == Task.category_id)
+        .group_by(*group_by)
+    )
+
+def _limit_report(report: DashboardReport, limit: Optional[int]) -> DashboardReport:
+    """Keeps the top `limit` categories and tasks and rolls the remainder into an "Other" entry."""
+    if limit is None:
+        return report
+
+    pie_chart = heapq.nlargest(limit, report.pie_chart, key=lambda p: p.value)
+    kept_categories = {p.name for p in pie_chart}
+    other_minutes = report.total_minutes - sum(p.value for p in pie_chart)
+    if other_minutes > 0:
+        pie_chart.append(PieChartData(name=OTHER, value=other_minutes, color=OTHER_COLOR))
+
+    bar_chart = []
+    for bar in report.bar_chart:
+        categories = {name: v for name, v in bar.categories.items() if name in kept_categories}
+        other = sum(v for name, v in bar.categories.items() if name not in kept_categories)
+        if other:
+            categories[OTHER] = other
+        bar_chart.append(BarChartData(date=bar.date, categories=categories))
+
+    task_breakdown = heapq.nlargest(limit, report.task_breakdown, key=lambda t: t.minutes)
+    other_minutes = report.total_minutes - sum(t.minutes for t in task_breakdown)
+    if other_minutes > 0:
+        task_breakdown.append(TaskBreakdownData(task=OTHER, minutes=other_minutes, color=OTHER_COLOR))
+
+    return report.model_copy(update={"pie_chart": pie_chart, "bar_chart": bar_chart, "task_breakdown": task_breakdown})
+
+def _build_report(rows, granularity: str, task_rows=None) -> DashboardReport:
+    """
+    Assembles a DashboardReport from (bucket, task title, category, color, minutes) rows.
+    task_rows, as (title, color, minutes), replaces the per-task totals when they were queried separately.
+    """
+    total_minutes = 0
+    pie_data: dict = {}     
+    bar_data: dict = {}      
+    task_data: dict = {}     
+
+    for bucket_day, task_title, cat_name, cat_color, duration in rows:
+        total_minutes += duration
+
+        task_title = task_title if task_title is not None else "Unknown"
+        cat_name   = cat_name if cat_name is not None else "Uncategorized"
+        cat_color  = cat_color if cat_color is not None else "#CCCCCC"
+
+        if cat_name not in pie_data:
+            pie_data[cat_name] = {"name": cat_name, "value": 0, "color": cat_color}
+        pie_data[cat_name]["value"] += duration
+        block_date_str = str(bucket_day)
+        bar_data.setdefault(block_date_str, {})
+        bar_data[block_date_str][cat_name] = bar_data[block_date_str].get(cat_name, 0) + duration
+
+        if task_rows is None:
+            if task_title not in task_data:
+                task_data[task_title] = {"minutes": 0, "color": cat_color}
+            task_data[task_title]["minutes"] += duration
+
+    for task_title, cat_color, duration in task_rows or ():
+        task_data[task_title if task_title is not None else "Unknown"] = {
+            "minutes": duration, "color": cat_color if cat_color is not None else "#CCCCCC"
+        }
+
+    return DashboardReport(
+        total_minutes=total_minutes,
+        granularity=granularity,
+        pie_chart=list(pie_data.values()),
+        bar_chart=[{"date": d, "categories": cats} for d, cats in sorted(bar_data.items())],
+        task_breakdown=[
+            TaskBreakdownData(task=title, minutes=v["minutes"], color=v["color"])
+            for title, v in sorted(task_data.items(), key=lambda x: -x[1]["minutes"])
+        ]
+    )
+
+def dashboard(
+    session: Session,
+    start_date: datetime,
+    end_date: datetime,
+    granularity: str = "auto",
+    max_points: int = DASHBOARD_MAX_POINTS,
+    limit: Optional[int] = None,
+    owner_id: int = 0,
+) -> DashboardReport:
+    granularity = resolve_granularity(granularity, start_date, end_date, max_points)
+    return _coalesced(session, "dashboard", owner_id, (start_date, end_date, granularity, limit),
+                      lambda: _dashboard(session, start_date, end_date, granularity, limit, owner_id))
+
+def _dashboard(session: Session, start_date: datetime, end_date: datetime, granularity: str, limit: Optional[int],
+               owner_id: int) -> DashboardReport:
+    if COLUMNAR_ANALYTICS:
+        return _limit_report(block_store.dashboard(session, start_date, end_date, granularity, owner_id), limit)
+
+    day_start_hour = get_clock(session, owner_id).day_start_hour
+    tracked = _tracked_time(owner_id)
+    minutes = func.sum(tracked.c.minutes)
+    # start_time <= end_date follows from the other two; it bounds the start_time index scan at both ends.
+    in_range = (tracked.c.start_time >= start_date, tracked.c.start_time <= end_date, tracked.c.end_time <= end_date)
+    if limit is None:
+        statement = _grouped_minutes(tracked, granularity, day_start_hour, minutes).where(*in_range)
+        return _build_report(session.exec(statement).all(), granularity)
+
+    # Group the chart rows by category only and let the database pick the top K task titles,
+    # so neither the scan result nor the payload grows with the number of tasks.
+    statement = _grouped_minutes(tracked, granularity, day_start_hour, minutes, by_task=False).where(*in_range)
+    top_tasks = (
+        select(Task.title, func.min(Category.color_hex), minutes)
+        .select_from(tracked)
+        .outerjoin(Task, Task.id == tracked.c.task_id)
+        .outerjoin(Category, Category.id == Task.category_id)
+        .where(*in_range)
+        .group_by(Task.title)
+        .order_by(minutes.desc(), Task.title)
+        .limit(limit)
+    )
+    report = _build_report(session.exec(statement).all(), granularity, task_rows=session.exec(top_tasks).all())
+    return _limit_report(report, limit)
+
+def _session_stats(labels: Dict[int, Tuple[str, str]], groups: "np.ndarray", days: "np.ndarray", minutes: "np.ndarray") -> List[SessionStats]:
+    """
+    Per-group session statistics with no Python loop over sessions: sort once by (group, length),
+    then read counts, sums, maxima and interpolated percentiles off the group boundaries.
+    """
+    import numpy as np
+
+    order = np.lexsort((minutes, groups))
+    groups, days, minutes = groups[order], days[order], minutes[order]
+    codes, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    totals = np.add.reduceat(minutes, starts)
+
+    def percentile(q: float) -> "np.ndarray":
+        position = starts + (counts - 1) * q
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        return minutes[low] + (minutes[high] - minutes[low]) * (position - low)
+
+    group_days = np.unique(np.stack([groups, days], axis=1), axis=0)
+    active_days = np.bincount(np.searchsorted(codes, group_days[:, 0]), minlength=len(codes))
+    medians, p90s = percentile(0.5), percentile(0.9)
+
+    return [
+        SessionStats(
+            name=labels[int(code)][0],
+            color=labels[int(code)][1],
+            sessions=int(counts[i]),
+            active_days=int(active_days[i]),
+            total_minutes=round(float(totals[i]), 2),
+            mean_minutes=round(float(totals[i] / counts[i]), 2),
+            median_minutes=round(float(medians[i]), 2),
+            p90_minutes=round(float(p90s[i]), 2),
+            max_minutes=round(float(minutes[starts[i] + counts[i] - 1]), 2),
+            sessions_per_day=round(float(counts[i] / active_days[i]), 2),
+        )
+        for i, code in enumerate(codes)
+    ]
+
+def distribution(session: Session, start_date: datetime, end_date: datetime, group_by: str = "task",
+                 owner_id: int = 0) -> DistributionReport:
+    """
+    Session-length distribution (count, mean, median, p90, max) and sessions per active day.
+    Archived days only keep daily totals, so this reads live blocks alone.
+    """
+    return _coalesced(session, "distribution", owner_id, (start_date, end_date, group_by),
+                      lambda: _distribution(session, start_date, end_date, group_by, owner_id))
+
+def _distribution(session: Session, start_date: datetime, end_date: datetime, group_by: str, owner_id: int) -> DistributionReport:
+    day = bucket_start(TimeBlock.start_time, "day", get_clock(session, owner_id).day_start_hour)
+    statement = (
+        select(TimeBlock.task_id, Task.category_id, day, duration_seconds(TimeBlock.start_time, TimeBlock.end_time))
+        .select_from(TimeBlock)
+        .outerjoin(Task, Task.id == TimeBlock.task_id)
+        .where(
+            TimeBlock.owner_id == owner_id,
+            TimeBlock.start_time >= start_date,
+            TimeBlock.start_time <= end_date,
+            TimeBlock.end_time <= end_date
+        )
+    )
+    rows = session.exec(statement).all()
+    if not rows:
+        return DistributionReport(group_by=group_by, overall=None, groups=[])
+
+    import numpy as np  # imported on first use; it is most of this module's import time
+
+    task_ids, category_ids, days, seconds = zip(*rows)
+    minutes = np.fromiter(seconds, dtype=np.float64, count=len(rows)) / 60
+    days = np.array(days, dtype="datetime64[D]").astype(np.int64)
+
+    categories = {
+        c.id: (c.name, c.color_hex)
+        for c in session.exec(select(Category).where(Category.owner_id == owner_id)).all()
+    }
+    uncategorized = ("Uncategorized", "#CCCCCC")
+    if group_by == "task":
+        groups = np.fromiter(task_ids, dtype=np.int64, count=len(rows))
+        labels = {
+            t.id: (t.title, categories.get(t.category_id, uncategorized)[1])
+            for t in session.exec(select(Task).where(Task.owner_id == owner_id)).all()
+        }
+        for task_id in set(task_ids) - labels.keys():
+            labels[task_id] = ("Unknown", uncategorized[1])
+    else:
+        groups = np.fromiter((-1 if c is None else c for c in category_ids), dtype=np.int64, count=len(rows))
+        labels = {**categories, -1: uncategorized}
+
+    overall = _session_stats({0: ("All", uncategorized[1])}, np.zeros(len(rows), dtype=np.int64), days, minutes)[0]
+    stats = _session_stats(labels, groups, days, minutes)
+    return DistributionReport(
+        group_by=group_by,
+        overall=overall,
+        groups=sorted(stats, key=lambda s: -s.total_minutes),
+    )
+
+def _delta(previous: DashboardReport, current: DashboardReport, from_range: str, to_range: str) -> RangeDelta:
+    def diff(before: dict, after: dict) -> dict:
+        return {k: after.get(k, 0) - before.get(k, 0) for k in sorted(before.keys() | after.keys())}
+
+    return RangeDelta(
+        from_range=from_range,
+        to_range=to_range,
+        total_minutes=current.total_minutes - previous.total_minutes,
+        categories=diff({p.name: p.value for p in previous.pie_chart}, {p.name: p.value for p in current.pie_chart}),
+        tasks=diff({t.task: t.minutes for t in previous.task_breakdown}, {t.task: t.minutes for t in current.task_breakdown}),
+    )
+
+def batch_dashboard(session: Session, request: BatchAnalyticsRequest, owner_id: int = 0) -> BatchAnalyticsReport:
+    """
+    One DashboardReport per named range, computed from a single scan over the union of the
+    ranges, plus the change between each range and the one before it.
+    """
+    longest = max(request.ranges, key=lambda r: r.end_date - r.start_date)
+    granularity = resolve_granularity(request.granularity, longest.start_date, longest.end_date, request.max_points)
+    key = (tuple((r.name, r.start_date, r.end_date) for r in request.ranges), granularity, request.limit)
+    return _coalesced(session, "batch", owner_id, key, lambda: _batch_dashboard(session, request, granularity, owner_id))
+
+def _batch_dashboard(session: Session, request: BatchAnalyticsRequest, granularity: str, owner_id: int) -> BatchAnalyticsReport:
+    ranges = request.ranges
+    day_start_hour = get_clock(session, owner_id).day_start_hour
+    tracked = _tracked_time(owner_id)
+    in_range = [
+        and_(tracked.c.start_time >= r.start_date, tracked.c.start_time <= r.end_date, tracked.c.end_time <= r.end_date)
+        for r in ranges
+    ]
+    # No ELSE branch: a range without blocks in a group sums to NULL rather than 0.
+    per_range = [func.sum(case((condition, tracked.c.minutes))) for condition in in_range]
+    # The union of the ranges, not their hull: "this month vs. the same month last year" reads two months, not thirteen.
+    statement = _grouped_minutes(tracked, granularity, day_start_hour, *per_range).where(or_(*in_range))
+    rows = session.exec(statement).all()
+
+    reports = [
+        NamedDashboardReport(
+            name=r.name,
+            start_date=r.start_date,
+            end_date=r.end_date,
+            report=_limit_report(
+                _build_report((row[:4] + (row[4 + i],) for row in rows if row[4 + i] is not None), granularity),
+                request.limit,
+            ),
+        )
+        for i, r in enumerate(ranges)
+    ]
+    deltas = [
+        _delta(prev.report, cur.report, prev.name, cur.name)
+        for prev, cur in zip(reports, reports[1:])
+    ]
+    return BatchAnalyticsReport(reports=reports, deltas=deltas)
+
+def task_streak(session: Session, task_id: int, owner_id: int = 0) -> TaskStreakReport:
+    """
+    Calculates your current daily consistency streak for a specific task.
+    """
+    clock = get_clock(session, owner_id)
+    # The streak also depends on what "today" is.
+    return _coalesced(session, "streak", owner_id, (task_id, clock, clock.today()),
+                      lambda: _task_streak(session, task_id, owner_id, clock))
+
+def _task_streak(session: Session, task_id: int, owner_id: int, clock: UserClock) -> TaskStreakReport:
+    task = get_owned(session, Task, task_id, owner_id, "Task not found")
+    today = clock.today()
+
+    if COLUMNAR_ANALYTICS:
+        return block_store.streak(session, task, today)
+
+    tracked = _tracked_time()
+    day = bucket_start(tracked.c.start_time, "day", clock.day_start_hour)
+    of_task = tracked.c.task_id == task_id
+    total_time, tracked_days = session.exec(
+        select(func.coalesce(func.sum(tracked.c.minutes), 0), func.count(day.distinct()).filter(day <= today))
+        .where(of_task)
+    ).one()
+    # Most recent tracked days first; the streak only needs as many as it is long.
+    days = session.exec(select(day).where(of_task, day <= today).group_by(day).order_by(day.desc())).all()
+
+    current_streak = 0
+    if days and days[0] >= today - timedelta(days=1):
+        current_streak = 1
+        for previous, current in zip(days, days[1:]):
+            if current != previous - timedelta(days=1):
+                break
+            current_streak += 1
+
+    return TaskStreakReport(
+        task_id=task.id,
+        task_title=task.title,
+        current_streak_days=current_streak,
+        total_time_spent_minutes=total_time,
+        tracked_days_count=tracked_days
+    )
+
+def heatmap_is_final(year: int, clock: UserClock = UserClock()) -> bool:
+    """Whether a year is over for the user, so its heatmap only changes when someone edits the past."""
+    return year < clock.today().year
+
+def heatmap(session: Session, year: int, task_id: Optional[int] = None, category_id: Optional[int] = None,
+            owner_id: int = 0) -> HeatmapReport:
+    """
+    Minutes per effective day of a year, run-length encoded as [minutes, days] pairs.
+    Kept like the other reports until the user's next write, so finished years are mostly served
+    from memory (and HTTP caches, see heatmap_is_final).
+    """
+    clock = get_clock(session, owner_id)
+    return _coalesced(session, "heatmap", owner_id, (task_id, category_id, year, clock.day_start_hour),
+                      lambda: _heatmap(session, year, task_id, category_id, owner_id, clock))
+
+def _heatmap(session: Session, year: int, task_id: Optional[int], category_id: Optional[int], owner_id: int,
+             clock: UserClock) -> HeatmapReport:
+    tracked = _tracked_time(owner_id)
+    day = bucket_start(tracked.c.start_time, "day", clock.day_start_hour)
+    statement = (
+        select(day, func.sum(tracked.c.minutes))
+        .where(
+            tracked.c.start_time >= clock.day_range(date(year, 1, 1))[0],
+            tracked.c.start_time < clock.day_range(date(year + 1, 1, 1))[0]
+        )
+        .group_by(day)
+    )
+    if task_id is not None:
+        statement = statement.where(tracked.c.task_id == task_id)
+    if category_id is not None:
+        statement = statement.join(Task, Task.id == tracked.c.task_id).where(Task.category_id == category_id)
+    minutes_by_day = {d: m for d, m in session.exec(statement).all()}
+
+    rle = []
+    current = date(year, 1, 1)
+    while current.year == year:
+        minutes = minutes_by_day.get(current, 0)
+        if rle and rle[-1][0] == minutes:
+            rle[-1][1] += 1
+        else:
+            rle.append([minutes, 1])
+        current += timedelta(days=1)
+
+    return HeatmapReport(
+        year=year,
+        task_id=task_id,
+        category_id=category_id,
+        total_minutes=sum(minutes_by_day.values()),
+        active_days=sum(1 for m in minutes_by_day.values() if m > 0),
+        minutes_rle=rle,
+    )
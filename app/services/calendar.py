@@ -0,0 +1,174 @@
+from sqlmodel import Session, func, select
+from typing import List, Optional
+from datetime import datetime, date, timedelta
+
+from app.database import lock_timeline
+from app.models import Category, Task, TimeBlock
+from app.schemas import TimeBlockCreate, TimeBlockRead, FreeInterval, Timeline, TimelineColumns
+from app.services import InvalidRequest, get_owned
+from app.services.settings import get_clock
+
+# Same fallback the frontend has always used for blocks without a category.
+DEFAULT_BLOCK_COLOR = "#3788d8"
+
+
+def resolve_overlaps(session: Session, start_time: datetime, end_time: datetime, exclude_id: Optional[int] = None,
+                     owner_id: int = 0):
+    """
+    Makes room for a block spanning [start_time, end_time) on the owner's timeline: swallowed
+    blocks are deleted, partially covered ones are trimmed and a block that fully contains the
+    range is split. Callers must hold the owner's lock_timeline so the read and the trims happen
+    atomically. Every block reaching into the range is found, even when stored blocks overlap each
+    other (old imports and timer autosaves from before they went through here).
+    """
+    overlap_check = select(TimeBlock).where(
+        TimeBlock.owner_id == owner_id,
+        TimeBlock.start_time < end_time,
+        TimeBlock.end_time > start_time
+    )
+    if exclude_id is not None:
+        overlap_check = overlap_check.where(TimeBlock.id != exclude_id)
+    conflicting_blocks = session.exec(overlap_check).all()
+
+    for conflict in conflicting_blocks:
+        if conflict.start_time >= start_time and conflict.end_time <= end_time:
+            session.delete(conflict)
+        elif conflict.start_time >= start_time and conflict.start_time < end_time:
+            conflict.start_time = end_time
+            session.add(conflict)
+        elif conflict.end_time > start_time and conflict.end_time <= end_time:
+            conflict.end_time = start_time
+            session.add(conflict)
+        elif conflict.start_time < start_time and conflict.end_time > end_time:
+            new_after_block = TimeBlock(
+                owner_id=conflict.owner_id,
+                task_id=conflict.task_id,
+                start_time=end_time,
+                end_time=conflict.end_time
+            )
+            conflict.end_time = start_time
+            session.add(conflict)
+            session.add(new_after_block)
+
+def create_block(session: Session, block: TimeBlockCreate, owner_id: int = 0) -> TimeBlockRead:
+    if block.end_time <= block.start_time:
+        raise InvalidRequest("End time must be after start time.")
+
+    lock_timeline(session, owner_id)
+    get_owned(session, Task, block.task_id, owner_id, "Task not found")
+    resolve_overlaps(session, block.start_time, block.end_time, owner_id=owner_id)
+
+    db_block = TimeBlock(**block.model_dump(), owner_id=owner_id)
+    session.add(db_block)
+    session.flush()
+    # Snapshot before commit: once the lock is released another worker may already trim or delete the block.
+    created = TimeBlockRead(**db_block.model_dump())
+    session.commit()
+    return created
+
+def list_blocks(session: Session, start: datetime, end: datetime, owner_id: int = 0) -> List[TimeBlock]:
+    statement = select(TimeBlock).where(
+        TimeBlock.owner_id == owner_id, TimeBlock.start_time >= start, TimeBlock.start_time <= end
+    )
+    return session.exec(statement).all()
+
+def timeline(session: Session, date: date, owner_id: int = 0) -> Timeline:
+    """
+    Blocks of one effective day joined with their task title and category color, in start
+    order and clipped to the day, so the frontend can plot them without looking anything up.
+    """
+    day_start, day_end = get_clock(session, owner_id).day_range(date)
+    joined = (
+        select(TimeBlock.id, TimeBlock.task_id, Task.title, Category.color_hex, TimeBlock.start_time, TimeBlock.end_time)
+        .select_from(TimeBlock)
+        .outerjoin(Task, Task.id == TimeBlock.task_id)
+        .outerjoin(Category, Category.id == Task.category_id)
+        .where(TimeBlock.owner_id == owner_id)
+    )
+    rows = session.exec(
+        joined.where(TimeBlock.start_time < day_end, TimeBlock.end_time > day_start)
+        .order_by(TimeBlock.start_time, TimeBlock.id)
+    ).all()
+
+    columns = TimelineColumns()
+    for block_id, task_id, title, color, start, end in rows:
+        start, end = max(start, day_start), min(end, day_end)
+        if end <= start:
+            continue
+        columns.id.append(block_id)
+        columns.task_id.append(task_id)
+        columns.title.append(title or "Unknown")
+        columns.color.append(color or DEFAULT_BLOCK_COLOR)
+        columns.start_time.append(start)
+        columns.end_time.append(end)
+    return Timeline(date=date, day_start=day_start, day_end=day_end, columns=columns)
+
+def free_intervals(session: Session, date: date, end_date: Optional[date] = None, min_minutes: int = 1,
+                   owner_id: int = 0) -> List[FreeInterval]:
+    """
+    Free time inside the effective days from `date` to `end_date` (inclusive), found with a
+    linear sweep over the blocks in start_time order. Gaps are split at day boundaries.
+    """
+    end_date = end_date or date
+    if end_date < date:
+        raise InvalidRequest("end_date must not be before date.")
+    if (end_date - date).days > 366:
+        raise InvalidRequest("Range is limited to one year.")
+    clock = get_clock(session, owner_id)
+    range_start, _ = clock.day_range(date)
+    _, range_end = clock.day_range(end_date)
+
+    # Stored blocks may overlap (imports, older timer autosaves): the window is taken up to the latest end
+    # of everything that started before it, not just of the last block to start.
+    spill_over_end = session.exec(
+        select(func.max(TimeBlock.end_time))
+        .where(TimeBlock.owner_id == owner_id, TimeBlock.start_time < range_start, TimeBlock.end_time > range_start)
+    ).one()
+    in_window = session.exec(
+        select(TimeBlock.start_time, TimeBlock.end_time)
+        .where(TimeBlock.owner_id == owner_id, TimeBlock.start_time >= range_start, TimeBlock.start_time < range_end)
+        .order_by(TimeBlock.start_time)
+    ).all()
+
+    free = []
+    cursor = max(range_start, spill_over_end) if spill_over_end else range_start
+    for start, end in [*in_window, (range_end, range_end)]:
+        while cursor < start:
+            _, day_end = clock.day_range(clock.date_of(cursor))
+            gap_end = min(start, day_end)
+            if gap_end - cursor >= timedelta(minutes=min_minutes):
+                free.append(FreeInterval(
+                    date=clock.date_of(cursor),
+                    start_time=cursor,
+                    end_time=gap_end,
+                    minutes=int((gap_end - cursor).total_seconds() // 60)
+                ))
+            cursor = gap_end
+        cursor = max(cursor, end)
+    return free
+
+def update_block(session: Session, block_id: int, block: TimeBlockCreate, owner_id: int = 0) -> TimeBlockRead:
+    lock_timeline(session, owner_id)
+    db_block = get_owned(session, TimeBlock, block_id, owner_id, "Block not found")
+
+    if block.end_time <= block.start_time:
+        raise InvalidRequest("End time must be after start time.")
+    if block.task_id != db_block.task_id:
+        get_owned(session, Task, block.task_id, owner_id, "Task not found")
+
+    resolve_overlaps(session, block.start_time, block.end_time, exclude_id=block_id, owner_id=owner_id)
+
+    db_block.task_id = block.task_id
+    db_block.start_time = block.start_time
+    db_block.end_time = block.end_time
+    session.add(db_block)
+    session.flush()
+    updated = TimeBlockRead(**db_block.model_dump())
+    session.commit()
+    return updated
+
+def delete_block(session: Session, block_id: int, owner_id: int = 0) -> dict:
+    db_block = get_owned(session, TimeBlock, block_id, owner_id, "Block not found")
+    session.delete(db_block)
+    session.commit()
+    return {"status": "deleted"}
@@ -0,0 +1,27 @@
+from sqlmodel import Session, select
+from typing import List
+
+from app.models import Category
+from app.schemas import CategoryCreate
+from app.services import get_owned
+
+
+def create_category(session: Session, category: CategoryCreate, owner_id: int = 0) -> Category:
+    db_category = Category(**category.model_dump(), owner_id=owner_id)
+    session.add(db_category)
+    session.commit()
+    session.refresh(db_category)
+    return db_category
+
+def list_categories(session: Session, owner_id: int = 0) -> List[Category]:
+    return session.exec(select(Category).where(Category.owner_id == owner_id)).all()
+
+def update_category(session: Session, category_id: int, category: CategoryCreate, owner_id: int = 0) -> Category:
+    db_category = get_owned(session, Category, category_id, owner_id, "Category not found")
+
+    db_category.name = category.name
+    db_category.color_hex = category.color_hex
+    session.add(db_category)
+    session.commit()
+    session.refresh(db_category)
+    return db_category
@@ -0,0 +1,56 @@
+from typing import Dict
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlmodel import Session, select, update
+
+from app.core.events import record_rewritten
+from app.core.timebuckets import UserClock, shift_hours
+from app.database import lock_timeline
+from app.models import ArchivedDay, UserSettings
+from app.schemas import UserSettingsRead, UserSettingsUpdate
+from app.services import InvalidRequest
+
+
+def get_clock(session: Session, owner_id: int = 0) -> UserClock:
+    """The user's day boundary and time zone; every effective-day computation for them goes through it."""
+    row = session.exec(select(UserSettings).where(UserSettings.owner_id == owner_id)).first()
+    return UserClock(row.day_start_hour, row.time_zone) if row else UserClock()
+
+def all_clocks(session: Session) -> Dict[int, UserClock]:
+    """Clocks of the users who changed their settings; everyone else has the default UserClock()."""
+    return {row.owner_id: UserClock(row.day_start_hour, row.time_zone) for row in session.exec(select(UserSettings))}
+
+def _read(clock: UserClock) -> UserSettingsRead:
+    return UserSettingsRead(day_start_hour=clock.day_start_hour, time_zone=clock.time_zone, today=clock.today())
+
+def get_settings(session: Session, owner_id: int = 0) -> UserSettingsRead:
+    return _read(get_clock(session, owner_id))
+
+def update_settings(session: Session, settings: UserSettingsUpdate, owner_id: int = 0) -> UserSettingsRead:
+    """
+    Saves the user's settings. A new day start moves their archived days with it, in one UPDATE,
+    so each still starts its effective day; live blocks need nothing, days are computed in SQL.
+    """
+    if settings.time_zone is not None:
+        try:
+            ZoneInfo(settings.time_zone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise InvalidRequest(f"Unknown time zone: {settings.time_zone}")
+
+    lock_timeline(session, owner_id)
+    row = session.exec(select(UserSettings).where(UserSettings.owner_id == owner_id)).first()
+    old_hour = row.day_start_hour if row else UserClock().day_start_hour
+    row = row or UserSettings(owner_id=owner_id, day_start_hour=old_hour)
+    row.day_start_hour = settings.day_start_hour
+    row.time_zone = settings.time_zone
+    session.add(row)
+
+    if settings.day_start_hour != old_hour:
+        session.exec(
+            update(ArchivedDay)
+            .where(ArchivedDay.owner_id == owner_id)
+            .values(start_time=shift_hours(ArchivedDay.start_time, settings.day_start_hour - old_hour))
+        )
+        record_rewritten(session)  # the columnar store keeps per-block effective days
+    session.commit()
+    return _read(UserClock(settings.day_start_hour, settings.time_zone))
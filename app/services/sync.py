@@ -0,0 +1,40 @@
+from sqlmodel import Session, select
+from typing import Iterable, Literal
+
+from app.models import Category, Task, TimeBlock, ActiveTimer, ChangeLog
+from app.schemas import SyncReport
+from app.core import changelog
+
+# Response field -> model; the same names are accepted in ?tables= and used as keys of `deleted`.
+SYNCED = {"categories": Category, "tasks": Task, "blocks": TimeBlock, "timers": ActiveTimer}
+SyncedTable = Literal["categories", "tasks", "blocks", "timers"]
+
+def sync(session: Session, since: int = 0, tables: Iterable[str] = tuple(SYNCED), owner_id: int = 0) -> SyncReport:
+    """
+    The user's rows changed after `since`, plus the ids deleted since then. Revisions are
+    shared by all users, so a client may see gaps in them. Clients store the returned
+    revision and pass it back next time. Rows may be slightly newer than the revision, so
+    applying a delta twice is harmless; a reset tells the client to start from scratch.
+    """
+    revision = changelog.current_revision(session)
+    reset = since == 0 or since > revision or since < changelog.truncated_through(session)
+    report = {"revision": revision, "reset": reset, "deleted": {}}
+
+    for field in tables:
+        model = SYNCED[field]
+        if reset:
+            report[field] = session.exec(select(model).where(model.owner_id == owner_id)).all()
+            continue
+        entries = session.exec(
+            select(ChangeLog.row_id, ChangeLog.op)
+            .where(ChangeLog.owner_id == owner_id, ChangeLog.table_name == model.__tablename__, ChangeLog.revision > since)
+        ).all()
+        changed = [row_id for row_id, op in entries if op == "upsert"]
+        rows = session.exec(select(model).where(model.id.in_(changed))).all() if changed else []
+        report[field] = rows
+        # An upsert whose row is already gone was deleted after `revision` was read.
+        deleted = [row_id for row_id, op in entries if op == "delete"]
+        deleted += sorted(set(changed) - {row.id for row in rows})
+        if deleted:
+            report["deleted"][field] = deleted
+    return SyncReport.model_validate(report, from_attributes=True)
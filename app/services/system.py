@@ -0,0 +1,20 @@
+import os
+
+from app.core.metrics import metrics
+
+
+def system_stats() -> dict:
+    import psutil  # only this endpoint needs it; keeps it out of the API's import time
+
+    process = psutil.Process(os.getpid())
+    mem_info = process.memory_info()
+
+    return {
+        "cpu_percent": psutil.cpu_percent(interval=0.1),
+        "process_cpu_percent": process.cpu_percent(interval=0.1),
+        "total_memory_hz": psutil.virtual_memory().total,
+        "available_memory_hz": psutil.virtual_memory().available,
+        "process_memory_hz": mem_info.rss,
+        "memory_percent": psutil.virtual_memory().percent,
+        "metrics": metrics.snapshot(),
+    }
@@ -0,0 +1,108 @@
+from sqlmodel import Session, select, delete
+from sqlalchemy import exists
+from typing import List
+from datetime import datetime
+
+from app.database import lock_timeline, dialect_insert
+from app.models import Category, Task, TimeBlock, ActiveTimer, ArchivedDay, TASK_DEDUPE_KEY, normalize_title
+from app.schemas import TaskCreate, TaskUpdate, BatchDeleteRequest, BatchDeleteReport
+from app.core.events import record_deleted
+from app.services import get_owned
+from app.services.settings import get_clock
+
+
+def create_task(session: Session, task: TaskCreate, owner_id: int = 0) -> Task:
+    if task.category_id is not None:
+        get_owned(session, Category, task.category_id, owner_id, "Category not found")
+    # Re-adding an existing title (any case) in the same category brings it back to today's list.
+    stmt = dialect_insert(session, Task).values(
+        **task.model_dump(),
+        owner_id=owner_id,
+        normalized_title=normalize_title(task.title),
+        created_at=datetime.utcnow(),
+        is_completed=False,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(TASK_DEDUPE_KEY),
+        set_={"created_at": stmt.excluded.created_at, "is_completed": False},
+    ).returning(Task.id)
+    task_id = session.exec(stmt).scalar_one()
+    session.commit()
+    return session.get(Task, task_id, populate_existing=True)
+
+def list_tasks(session: Session, owner_id: int = 0) -> List[Task]:
+    return session.exec(select(Task).where(Task.owner_id == owner_id)).all()
+
+def update_task(session: Session, task_id: int, task_update: TaskUpdate, owner_id: int = 0) -> Task:
+    db_task = get_owned(session, Task, task_id, owner_id, "Task not found")
+
+    if task_update.is_completed is not None:
+        db_task.is_completed = task_update.is_completed
+    if task_update.is_streak is not None:
+        db_task.is_streak = task_update.is_streak
+    session.add(db_task)
+    session.commit()
+    session.refresh(db_task)
+    return db_task
+
+def delete_task(session: Session, task_id: int, owner_id: int = 0) -> dict:
+    """Drops the task's blocks from today; the task itself goes only if no older history remains."""
+    db_task = get_owned(session, Task, task_id, owner_id, "Task not found")
+
+    clock = get_clock(session, owner_id)
+    day_start, day_end = clock.day_range(clock.today())
+
+    lock_timeline(session, owner_id)
+    deleted = session.exec(delete(TimeBlock).where(
+        TimeBlock.task_id == task_id,
+        TimeBlock.start_time >= day_start,
+        TimeBlock.start_time <= day_end
+    ).returning(TimeBlock.id, TimeBlock.start_time)).all()
+    record_deleted(session, block_ids=[b.id for b in deleted], starts=[b.start_time for b in deleted])
+
+    # Tasks with older history stay so that analytics and streaks keep their titles.
+    has_history = session.exec(select(
+        exists().where(TimeBlock.task_id == task_id) | exists().where(ArchivedDay.task_id == task_id)
+    )).one()
+    if not has_history:
+        session.exec(delete(ActiveTimer).where(ActiveTimer.task_id == task_id))
+        session.delete(db_task)
+
+    session.commit()
+    return {"status": "success", "blocks_deleted": len(deleted), "task_deleted": not has_history}
+
+def purge_tasks(session: Session, task_ids: List[int], owner_id: int = 0) -> dict:
+    """Removes tasks together with their blocks and any timer running on them, without loading rows."""
+    if task_ids:
+        task_ids = session.exec(select(Task.id).where(Task.id.in_(task_ids), Task.owner_id == owner_id)).all()
+    if not task_ids:
+        return {"tasks_deleted": 0, "blocks_deleted": 0, "timers_cleared": 0}
+    blocks_deleted = session.exec(delete(TimeBlock).where(TimeBlock.task_id.in_(task_ids))).rowcount
+    session.exec(delete(ArchivedDay).where(ArchivedDay.task_id.in_(task_ids)))
+    timers_cleared = session.exec(delete(ActiveTimer).where(ActiveTimer.task_id.in_(task_ids))).rowcount
+    tasks_deleted = session.exec(delete(Task).where(Task.id.in_(task_ids))).rowcount
+    record_deleted(session, task_ids=task_ids)
+    return {"tasks_deleted": tasks_deleted, "blocks_deleted": blocks_deleted, "timers_cleared": timers_cleared}
+
+def force_delete_task(session: Session, task_id: int, owner_id: int = 0) -> dict:
+    get_owned(session, Task, task_id, owner_id, "Task not found")
+
+    lock_timeline(session, owner_id)
+    counts = purge_tasks(session, [task_id], owner_id)
+    session.commit()
+    return {"status": "success", **counts}
+
+def batch_delete(session: Session, request: BatchDeleteRequest, owner_id: int = 0) -> BatchDeleteReport:
+    """Force-deletes many tasks and/or individual blocks in a single transaction; other users' ids are skipped."""
+    lock_timeline(session, owner_id)
+    counts = purge_tasks(session, request.task_ids, owner_id)
+    if request.block_ids:
+        deleted = session.exec(
+            delete(TimeBlock)
+            .where(TimeBlock.id.in_(request.block_ids), TimeBlock.owner_id == owner_id)
+            .returning(TimeBlock.id, TimeBlock.start_time)
+        ).all()
+        counts["blocks_deleted"] += len(deleted)
+        record_deleted(session, block_ids=[b.id for b in deleted], starts=[b.start_time for b in deleted])
+    session.commit()
+    return BatchDeleteReport(**counts)
@@ -0,0 +1,89 @@
+from sqlmodel import Session, select, delete
+from datetime import timedelta
+from typing import Optional
+
+from app.database import lock_timeline
+from app.models import ActiveTimer, Task, TimeBlock
+from app.schemas import ActiveTimerCreate
+from app.services import get_owned
+from app.services.calendar import resolve_overlaps
+from app.services.settings import get_clock
+
+
+def start_timer(session: Session, timer_in: ActiveTimerCreate, owner_id: int = 0):
+    # Replace the user's timer in one locked transaction so concurrent starts can't leave two timers behind.
+    lock_timeline(session, owner_id)
+    get_owned(session, Task, timer_in.task_id, owner_id, "Task not found")
+    session.exec(delete(ActiveTimer).where(ActiveTimer.owner_id == owner_id))
+
+    new_timer = ActiveTimer(owner_id=owner_id, task_id=timer_in.task_id, start_time=timer_in.start_time, accumulated_seconds=0)
+    session.add(new_timer)
+    session.commit()
+    return {"status": "started"}
+
+def get_active_timer(session: Session, owner_id: int = 0) -> Optional[dict]:
+    timer = session.exec(select(ActiveTimer).where(ActiveTimer.owner_id == owner_id)).first()
+    if timer:
+        clock = get_clock(session, owner_id)
+        now = clock.now()
+        is_paused = timer.start_time is None
+        
+        if not is_paused:
+            _, reset_time = clock.day_range(clock.date_of(timer.start_time))
+            
+            if now >= reset_time:
+                # Another worker may have rolled this timer over while we waited for the lock.
+                lock_timeline(session, owner_id)
+                timer = session.exec(
+                    select(ActiveTimer).where(ActiveTimer.id == timer.id).execution_options(populate_existing=True)
+                ).first()
+                if not timer or timer.start_time is None:
+                    return None
+                if reset_time > timer.start_time + timedelta(minutes=1):
+                    try:
+                        # Same rule as a manual block: the autosave wins over whatever it covers.
+                        resolve_overlaps(session, timer.start_time, reset_time, owner_id=owner_id)
+                        tb = TimeBlock(owner_id=owner_id, task_id=timer.task_id, start_time=timer.start_time, end_time=reset_time)
+                        session.add(tb)
+                    except Exception as e:
+                        print("Error auto-saving timer:", e)
+                
+                session.delete(timer)
+                session.commit()
+                return None
+        
+        return {
+            "task_id": timer.task_id, 
+            "start_time": timer.start_time.isoformat() if timer.start_time else None,
+            "accumulated_seconds": timer.accumulated_seconds,
+            "is_paused": is_paused
+        }
+    return None
+
+def pause_timer(session: Session, owner_id: int = 0):
+    lock_timeline(session, owner_id)
+    timer = session.exec(select(ActiveTimer).where(ActiveTimer.owner_id == owner_id)).first()
+    if timer and timer.start_time:
+        now = get_clock(session, owner_id).now()
+        diff = int((now - timer.start_time).total_seconds())
+        timer.accumulated_seconds += max(0, diff)
+        timer.start_time = None
+        session.add(timer)
+        session.commit()
+    return {"status": "paused"}
+
+def resume_timer(session: Session, owner_id: int = 0):
+    lock_timeline(session, owner_id)
+    timer = session.exec(select(ActiveTimer).where(ActiveTimer.owner_id == owner_id)).first()
+    if timer and timer.start_time is None:
+        timer.start_time = get_clock(session, owner_id).now()
+        session.add(timer)
+        session.commit()
+        return {"status": "resumed", "start_time": timer.start_time.isoformat()}
+    return {"status": "ignored"}
+
+def clear_timer(session: Session, owner_id: int = 0):
+    lock_timeline(session, owner_id)
+    session.exec(delete(ActiveTimer).where(ActiveTimer.owner_id == owner_id))
+    session.commit()
+    return {"status": "cleared"}
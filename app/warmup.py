@@ -0,0 +1,160 @@
+"""
+warmup.py — Precomputes the analytics the frontend asks for first.
+
+Started from the API's lifespan hook (ANALYTICS_WARMUP=1). Right after startup it computes
+for every recently active user (a change in the last WARMUP_ACTIVE_DAYS days; the most
+recent ANALYTICS_USERS_KEPT of them, as many as the result cache holds) the dashboards for
+today, the last 7 and 30 days and this month, plus the streak and this year's heatmap of
+each of their streak tasks. Users start
+their days at different hours and in different time zones, so it then wakes up at the next
+user's day boundary and redoes the users whose day just rolled over.
+The results land in the analytics result cache under the same keys the frontend's requests
+use, so the first page load after a deploy or after a day rollover is a cache hit.
+
+Reports are computed one at a time in a background thread, pausing WARMUP_PAUSE_RATIO times
+as long as each one took, so live requests keep most of the database. The duration of the
+last run is reported under metrics.warmup in /system/stats.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlmodel import Session, func, select
+
+from app.core.config import ANALYTICS_USERS_KEPT, WARMUP_ACTIVE_DAYS, WARMUP_PAUSE_RATIO
+from app.core.metrics import metrics
+from app.core.timebuckets import UserClock
+from app.models import ChangeLog, Task
+from app.services import ServiceError, analytics
+from app.services.settings import all_clocks
+
+# What the frontend's analytics tab passes as limit.
+DASHBOARD_LIMIT = 15
+# Let the first requests of a new day through before competing with them.
+ROLLOVER_DELAY_SECONDS = 5
+
+
+def dashboard_ranges(today: date) -> List[Tuple[str, date, date]]:
+    """(name, first, last) effective days of the ranges worth precomputing."""
+    return [
+        ("today", today, today),
+        ("last_7_days", today - timedelta(days=6), today),
+        ("last_30_days", today - timedelta(days=29), today),
+        ("this_month", today.replace(day=1), today),
+    ]
+
+
+def active_owners(session: Session) -> List[int]:
+    """Users who changed something in the last WARMUP_ACTIVE_DAYS days, most recent first, at most ANALYTICS_USERS_KEPT."""
+    last_change = func.max(ChangeLog.changed_at)
+    return session.exec(
+        select(ChangeLog.owner_id)
+        .where(ChangeLog.changed_at >= datetime.utcnow() - timedelta(days=WARMUP_ACTIVE_DAYS))
+        .group_by(ChangeLog.owner_id)
+        .order_by(last_change.desc(), ChangeLog.owner_id)
+        .limit(ANALYTICS_USERS_KEPT)
+    ).all()
+
+
+def _jobs(session: Session, now: datetime, since: Optional[datetime]) -> List[Callable[[Session], object]]:
+    """Reports of every active user, or with `since` only of those whose effective day changed after it."""
+    clocks = all_clocks(session)
+    todays: Dict[int, date] = {}
+    for owner_id in active_owners(session):
+        clock = clocks.get(owner_id, UserClock())
+        if since is None or clock.today(since) != clock.today(now):
+            todays[owner_id] = clock.today(now)
+
+    jobs = []
+    for owner_id, today in todays.items():
+        clock = clocks.get(owner_id, UserClock())
+        for _, first, last in dashboard_ranges(today):
+            start, end = clock.day_range(first)[0], clock.day_range(last)[1]
+            jobs.append(lambda s, start=start, end=end, owner_id=owner_id: analytics.dashboard(
+                s, start, end, limit=DASHBOARD_LIMIT, owner_id=owner_id
+            ))
+    streak_tasks = select(Task.id, Task.owner_id).where(Task.is_streak == True)  # noqa: E712
+    for task_id, owner_id in session.exec(streak_tasks).all():
+        if owner_id not in todays:
+            continue
+        year = todays[owner_id].year
+        jobs.append(lambda s, task_id=task_id, owner_id=owner_id: analytics.task_streak(s, task_id, owner_id))
+        jobs.append(lambda s, task_id=task_id, owner_id=owner_id, year=year: analytics.heatmap(s, year, task_id, owner_id=owner_id))
+    return jobs
+
+
+def warm_up(engine, now: Optional[datetime] = None, pause_ratio: float = WARMUP_PAUSE_RATIO,
+            stop: Optional[threading.Event] = None, since: Optional[datetime] = None) -> int:
+    """
+    Computes every report once, each in its own session; returns how many were computed.
+    With `since`, only users whose effective day rolled over between then and `now` are warmed.
+    """
+    now = now or datetime.now()
+    started = time.perf_counter()
+    with Session(engine) as session:
+        jobs = _jobs(session, now, since)
+
+    done = 0
+    for job in jobs:
+        if stop is not None and stop.is_set():
+            break
+        job_started = time.perf_counter()
+        try:
+            with Session(engine) as session:
+                job(session)
+            done += 1
+        except ServiceError:
+            pass  # e.g. the task was deleted since the job list was built
+        pause = (time.perf_counter() - job_started) * pause_ratio
+        if pause and stop is not None:
+            stop.wait(pause)
+        elif pause:
+            time.sleep(pause)
+
+    metrics.set("warmup", "last_run", duration_ms=(time.perf_counter() - started) * 1000,
+                reports=done, finished_at=time.time())
+    metrics.add("warmup", "total", runs=1, reports=done)
+    return done
+
+
+def seconds_until_rollover(now: datetime, clock: UserClock = UserClock()) -> float:
+    """Seconds until the user's next effective day starts, `now` being the server's local time."""
+    user_now = clock.now(now)
+    _, day_end = clock.day_range(clock.today(now))
+    return (day_end - user_now).total_seconds()
+
+
+def next_rollover(engine, now: datetime) -> float:
+    """Seconds until the first user (including everyone on the defaults) starts a new day."""
+    with Session(engine) as session:
+        clocks = set(all_clocks(session).values()) | {UserClock()}
+    return min(seconds_until_rollover(now, clock) for clock in clocks)
+
+
+def keep_warm(engine, stop: threading.Event):
+    """Warms up now and, for the users concerned, after every day boundary until `stop` is set."""
+    since = None
+    while not stop.is_set():
+        now = datetime.now()
+        try:
+            warm_up(engine, now=now, stop=stop, since=since)
+            since = now
+            wait = next_rollover(engine, datetime.now())
+        except Exception as e:  # a failed warm-up only costs speed; try again at the next rollover
+            metrics.add("warmup", "total", failures=1)
+            print(f"Analytics warm-up failed: {e!r}")
+            wait = seconds_until_rollover(datetime.now())
+        stop.wait(wait + ROLLOVER_DELAY_SECONDS)
+
+
+def start(engine) -> Callable[[], None]:
+    """Runs keep_warm in a daemon thread; returns a function that stops it."""
+    stop = threading.Event()
+    thread = threading.Thread(target=keep_warm, args=(engine, stop), name="analytics-warmup", daemon=True)
+    thread.start()
+
+    def shutdown():
+        stop.set()
+        thread.join(timeout=5)
+    return shutdown
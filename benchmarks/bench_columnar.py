@@ -0,0 +1,85 @@
+"""
+bench_columnar.py — Dashboard analytics: SQL/ORM path vs the NumPy columnar block store.
+
+Run with:  python -m benchmarks.bench_columnar --blocks 1000000
+
+Builds a throwaway SQLite file with the requested number of blocks (~8 per day,
+going back as many years as needed) and times a full-history dashboard on both paths.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine, insert
+
+from app.core.columnar import ColumnarBlockStore
+from app.models import Category, Task, TimeBlock
+from app.services import analytics
+
+BLOCKS_PER_DAY = 8
+
+
+def build_database(path: str, blocks: int):
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        categories = [Category(name=f"Category {i}", color_hex=f"#{i:06x}") for i in range(8)]
+        session.add_all(categories)
+        session.commit()
+        tasks = [Task(title=f"Task {i}", category_id=categories[i % 8].id) for i in range(200)]
+        session.add_all(tasks)
+        session.commit()
+        task_ids = [t.id for t in tasks]
+
+        days = blocks // BLOCKS_PER_DAY + 1
+        first_day = datetime(2026, 1, 1, 6, 0) - timedelta(days=days)
+        rows = []
+        for n in range(blocks):
+            start = first_day + timedelta(days=n // BLOCKS_PER_DAY, minutes=(n % BLOCKS_PER_DAY) * 100)
+            rows.append({
+                "task_id": random.choice(task_ids),
+                "start_time": start,
+                "end_time": start + timedelta(minutes=random.randint(15, 90)),
+            })
+            if len(rows) == 50_000:
+                session.execute(insert(TimeBlock), rows)
+                rows = []
+        if rows:
+            session.execute(insert(TimeBlock), rows)
+        session.commit()
+    return engine, first_day
+
+
+def timed(label: str, fn):
+    began = time.perf_counter()
+    result = fn()
+    print(f"  {label:<28} {time.perf_counter() - began:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--blocks", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Building {args.blocks:,} blocks...")
+        engine, first_day = build_database(os.path.join(tmp, "bench.db"), args.blocks)
+        start, end = first_day, datetime(2026, 1, 2)
+
+        store = ColumnarBlockStore()
+        with Session(engine) as session:
+            sql_report = timed("SQL/ORM dashboard", lambda: analytics.dashboard(session, start, end, "month"))
+        with Session(engine) as session:
+            timed("columnar cold load", lambda: store.refresh(session))
+            columnar_report = timed("columnar dashboard (warm)", lambda: store.dashboard(session, start, end, "month"))
+
+        assert sql_report.total_minutes == columnar_report.total_minutes
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_compression.py — CPU spent on response compression against bytes saved, per endpoint.
+
+Run with:  python -m benchmarks.bench_compression --days 365
+
+Fills an in-memory SQLite database with `--days` days of blocks, requests the frontend's
+main endpoints through the full middleware stack once per encoding, and prints the
+compression counters from /system/stats.
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, insert
+from sqlmodel.pool import StaticPool
+
+from app.core.compression import _brotli
+from app.core.metrics import metrics
+from app.database import get_session
+from app.main import app
+from app.models import Category, Task, TimeBlock
+
+BLOCKS_PER_DAY = 8
+
+
+def build_database(days: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        categories = [Category(name=f"Category {i}", color_hex=f"#{i:06x}") for i in range(8)]
+        session.add_all(categories)
+        session.commit()
+        tasks = [Task(title=f"Task {i}", category_id=categories[i % 8].id) for i in range(40)]
+        session.add_all(tasks)
+        session.commit()
+        first_day = datetime(2026, 1, 1, 6, 0) - timedelta(days=days)
+        session.exec(insert(TimeBlock), params=[
+            {
+                "task_id": tasks[(day * BLOCKS_PER_DAY + n) % len(tasks)].id,
+                "start_time": first_day + timedelta(days=day, hours=2 * n),
+                "end_time": first_day + timedelta(days=day, hours=2 * n, minutes=90),
+            }
+            for day in range(days) for n in range(BLOCKS_PER_DAY)
+        ])
+        session.commit()
+    return engine, first_day
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=20, help="requests per endpoint and encoding")
+    args = parser.parse_args()
+
+    engine, first_day = build_database(args.days)
+
+    def session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = session_override
+    client = TestClient(app)
+    start, end = first_day.isoformat(), datetime(2026, 1, 1, 4, 0).isoformat()
+    last_week = (datetime(2026, 1, 1, 4, 0) - timedelta(days=7)).isoformat()
+    endpoints = [
+        ("/calendar/blocks", {"start": last_week, "end": end}),
+        ("/tasks/", {}),
+        ("/analytics/dashboard", {"start_date": start, "end_date": end, "granularity": "day"}),
+        ("/analytics/heatmap", {"year": 2025}),
+        ("/timer/active", {}),
+    ]
+
+    for encoding in ("gzip", "br") if _brotli() else ("gzip",):
+        metrics.reset()
+        for path, params in endpoints:
+            for _ in range(args.repeat):
+                client.get(path, params=params, headers={"Accept-Encoding": encoding})
+
+        print(f"\n{encoding}, {args.repeat} requests per endpoint, {args.days * BLOCKS_PER_DAY} blocks")
+        print(f"{'endpoint':<24} {'bytes':>10} {'sent':>10} {'saved':>7} {'cpu ms/req':>11}")
+        for path, values in metrics.snapshot()["compression"].items():
+            responses = values["responses"]
+            saved = 1 - values["bytes_out"] / values["bytes_in"] if values["bytes_in"] else 0
+            print(f"{path:<24} {values['bytes_in'] / responses:>10,.0f} {values['bytes_out'] / responses:>10,.0f} "
+                  f"{saved:>7.0%} {values['cpu_ms'] / responses:>11.3f}")
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+bench_formats.py — Encode time, decode time and size of each /calendar/blocks response format.
+
+Run with:  python -m benchmarks.bench_formats --blocks 10000
+
+Encodes the same list of blocks the way the API does (app.core.formats.encode) and decodes
+it the way a client would, into a pandas DataFrame when pandas is installed. Formats whose
+library is missing are listed as skipped.
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from app.core import formats
+from app.schemas import TimeBlockRead
+
+
+def make_blocks(count: int):
+    start = datetime(2026, 1, 1, 6, 0)
+    return [
+        TimeBlockRead(id=i, task_id=i % 200, start_time=start + timedelta(minutes=30 * i),
+                      end_time=start + timedelta(minutes=30 * i + 25))
+        for i in range(count)
+    ]
+
+
+def decoder(media_type: str, to_frame: bool):
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+    to_frame = to_frame and pd is not None
+
+    if media_type == formats.ARROW:
+        import pyarrow as pa
+
+        def decode(body):
+            table = pa.ipc.open_stream(body).read_all()
+            return table.to_pandas() if to_frame else table
+        return decode
+    if media_type == formats.MSGPACK:
+        import msgpack
+
+        parse = msgpack.unpackb
+    else:
+        parse = json.loads
+    return (lambda body: pd.DataFrame(parse(body))) if to_frame else parse
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--blocks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement; the best one is reported")
+    parser.add_argument("--no-frame", action="store_true", help="decode to Python objects instead of a DataFrame")
+    args = parser.parse_args()
+
+    blocks = make_blocks(args.blocks)
+    print(f"{args.blocks} blocks, best of {args.repeat}\n")
+    print(f"{'format':<42} {'encode ms':>10} {'decode ms':>10} {'bytes':>12}")
+    for media_type in formats.FORMATS:
+        if not formats.available(media_type):
+            print(f"{media_type:<42} {'skipped, library not installed':>34}")
+            continue
+        body = formats.encode(blocks, media_type)
+        decode = decoder(media_type, not args.no_frame)
+        encode_ms = timed(lambda: formats.encode(blocks, media_type), args.repeat)
+        decode_ms = timed(lambda: decode(body), args.repeat)
+        print(f"{media_type:<42} {encode_ms:>10.1f} {decode_ms:>10.1f} {len(body):>12,}")
+
+
+if __name__ == "__main__":
+    main()
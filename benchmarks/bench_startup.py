@@ -0,0 +1,56 @@
+"""
+bench_startup.py — Cold-start import time of the API (or any other module).
+
+Run with:  python -m benchmarks.bench_startup
+           python -m benchmarks.bench_startup --module frontend.api_client --budget-ms 300
+
+Imports the module in a fresh interpreter under `python -X importtime`, prints the
+top-level packages that took longest to load and exits non-zero when the total is over
+--budget-ms, so CI can catch a heavy dependency creeping back into startup.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_times(module: str) -> Tuple[int, Dict[str, int]]:
+    """(total µs, µs spent per top-level package) for importing `module` in a new interpreter."""
+    env = {**os.environ, "DATABASE_URL": os.getenv("DATABASE_URL", "sqlite://")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    packages: Dict[str, int] = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        # Self times add up to the total, so pydantic pulled in by fastapi is charged to pydantic.
+        self_time, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_time)
+    return sum(packages.values()), packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main", help="module to import")
+    parser.add_argument("--top", type=int, default=15, help="how many packages to list")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail when the total import time is above this")
+    args = parser.parse_args()
+
+    total, packages = import_times(args.module)
+    for name, micros in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+        print(f"{micros / 1000:9.1f} ms  {name}")
+    print(f"{total / 1000:9.1f} ms  total for `import {args.module}`")
+
+    if args.budget_ms is not None and total / 1000 > args.budget_ms:
+        sys.exit(f"❌ Over the {args.budget_ms:.0f} ms budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+bench_tenants.py — Per-user request latency as more users share one database.
+
+Run with:  python -m benchmarks.bench_tenants --users 1000 --blocks-per-user 240
+
+Fills a throwaway SQLite file in stages (1%, 10% and all of --users users, each with the
+same tasks and a month of blocks) and after every stage times one user's dashboard,
+streak, day of blocks and a new block on users it hasn't timed yet, so no result is
+cached. Every query leads with the owner's index, so the medians should stay flat while
+the tables grow a hundredfold; the last line prints the ratio between the largest and
+the smallest database.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine, insert
+
+from app.models import Category, Task, TimeBlock
+from app.schemas import TimeBlockCreate
+from app.services import analytics, calendar
+
+TASKS_PER_USER = 10
+FIRST_DAY = datetime(2026, 2, 1, 6, 0)
+MONTH = (datetime(2026, 2, 1, 4), datetime(2026, 3, 1, 4))
+DAY = (datetime(2026, 2, 14, 4), datetime(2026, 2, 15, 4))
+
+
+def task_id(owner_id: int, n: int) -> int:
+    return (owner_id - 1) * TASKS_PER_USER + n + 1
+
+
+def add_users(engine, owners: range, blocks_per_user: int):
+    """Bulk-inserts users `owners`: one category, TASKS_PER_USER tasks and their blocks each."""
+    per_day = max(1, blocks_per_user // 28)
+    with Session(engine) as session:
+        session.execute(insert(Category), [
+            {"id": owner_id, "owner_id": owner_id, "name": "Work", "color_hex": "#3b82f6"} for owner_id in owners
+        ])
+        session.execute(insert(Task), [
+            {"id": task_id(owner_id, n), "owner_id": owner_id, "title": f"Task {n}", "normalized_title": f"task {n}",
+             "category_id": owner_id, "is_streak": n == 0}
+            for owner_id in owners for n in range(TASKS_PER_USER)
+        ])
+        rows = []
+        for owner_id in owners:
+            for n in range(blocks_per_user):
+                start = FIRST_DAY + timedelta(days=n // per_day, minutes=(n % per_day) * 100)
+                rows.append({
+                    "owner_id": owner_id,
+                    "task_id": task_id(owner_id, random.randrange(TASKS_PER_USER)),
+                    "start_time": start,
+                    "end_time": start + timedelta(minutes=random.randint(15, 90)),
+                })
+            if len(rows) >= 50_000:
+                session.execute(insert(TimeBlock), rows)
+                rows = []
+        if rows:
+            session.execute(insert(TimeBlock), rows)
+        session.commit()
+
+
+def requests_of(owner_id: int):
+    """(name, call(session)) of the requests one user makes when opening the app and logging time."""
+    block = TimeBlockCreate(
+        task_id=task_id(owner_id, 1), start_time=datetime(2026, 2, 14, 7, 0), end_time=datetime(2026, 2, 14, 8, 30)
+    )
+    return [
+        ("dashboard (month)", lambda s: analytics.dashboard(s, *MONTH, limit=15, owner_id=owner_id)),
+        ("streak", lambda s: analytics.task_streak(s, task_id(owner_id, 0), owner_id=owner_id)),
+        ("blocks (day)", lambda s: calendar.list_blocks(s, *DAY, owner_id=owner_id)),
+        ("create block", lambda s: calendar.create_block(s, block, owner_id=owner_id)),
+    ]
+
+
+def median_ms(engine, owners) -> dict:
+    timings = {}
+    for owner_id in owners:
+        for name, call in requests_of(owner_id):
+            with Session(engine) as session:
+                began = time.perf_counter()
+                call(session)
+                timings.setdefault(name, []).append((time.perf_counter() - began) * 1000)
+    return {name: statistics.median(values) for name, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--blocks-per-user", type=int, default=240)
+    parser.add_argument("--samples", type=int, default=10, help="users timed after each stage")
+    args = parser.parse_args()
+
+    random.seed(49)
+    stages = sorted({max(args.samples, args.users // 100), max(args.samples, args.users // 10), args.users})
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'tenants.db')}")
+        SQLModel.metadata.create_all(engine)
+
+        results, users = [], 0
+        for total in stages:
+            add_users(engine, range(users + 1, total + 1), args.blocks_per_user)
+            # Time the newest users of this stage: never timed before, so nothing is cached for them.
+            medians = median_ms(engine, range(total - args.samples + 1, total + 1))
+            results.append((total, medians))
+            users = total
+            print(f"{total:>6,} users, {total * args.blocks_per_user:>9,} blocks: "
+                  + ", ".join(f"{name} {ms:6.2f} ms" for name, ms in medians.items()))
+
+        (first, smallest), (last, largest) = results[0], results[-1]
+        print(f"Median latency at {last:,} users vs {first:,}: "
+              + ", ".join(f"{name} x{largest[name] / smallest[name]:.2f}" for name in smallest))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+How the Streamlit app talks to the backend.
+
+FRONTEND_CLIENT=http (default) goes through the FastAPI server at API_URL.
+FRONTEND_CLIENT=embedded calls app.services directly on the backend's engine, for the
+standalone setup where Streamlit and the database live on the same machine and a second
+uvicorn process only adds an HTTP hop and two rounds of JSON encoding.
+
+Both clients take API paths and return objects with .status_code and .json(), so the
+frontend code doesn't care which one it is talking to. Both act for one user,
+FRONTEND_USER_ID (default 0): sent as X-User-Id over HTTP, passed as owner_id when embedded.
+"""
+import os
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+
+class HttpClient:
+    def __init__(self, base_url: str, user_id: int = 0):
+        import requests  # only the HTTP client needs it
+
+        self.base_url = base_url.rstrip("/")
+        self._requests = requests
+        self._session = requests.Session()
+        self._session.headers["X-User-Id"] = str(user_id)
+        # Newest X-Revision our writes produced; sent back so reads from a replica include them.
+        self.revision = 0
+
+    def _track(self, response):
+        revision = response.headers.get("X-Revision", "")
+        if revision.isdigit():
+            self.revision = max(self.revision, int(revision))
+        return response
+
+    def get(self, path: str, params: Optional[dict] = None, timeout: Optional[float] = None):
+        headers = {"X-Min-Revision": str(self.revision)} if self.revision else None
+        return self._session.get(self.base_url + path, params=params, headers=headers, timeout=timeout)
+
+    def post(self, path: str, json: Optional[dict] = None, timeout: Optional[float] = None):
+        return self._track(self._session.post(self.base_url + path, json=json, timeout=timeout))
+
+    def put(self, path: str, json: Optional[dict] = None, timeout: Optional[float] = None):
+        return self._track(self._session.put(self.base_url + path, json=json, timeout=timeout))
+
+    def delete(self, path: str, timeout: Optional[float] = None):
+        return self._track(self._session.delete(self.base_url + path, timeout=timeout))
+
+
+class LocalResponse:
+    def __init__(self, status_code: int, payload: Any):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    @property
+    def text(self) -> str:
+        return str(self._payload)
+
+
+def _jsonable(value):
+    """Same shapes the HTTP client would decode: models become dicts, dates ISO strings."""
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _read(schema, value):
+    """Applies a route's response_model, e.g. so Task rows lose normalized_title like over HTTP."""
+    if isinstance(value, list):
+        return [schema.model_validate(v, from_attributes=True) for v in value]
+    return schema.model_validate(value, from_attributes=True)
+
+
+def _datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+
+
+def _date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _optional_int(value) -> Optional[int]:
+    return None if value is None else int(value)
+
+
+class EmbeddedClient:
+    """Dispatches API paths to app.services in this process; one session per call, like a request."""
+
+    def __init__(self, engine=None, user_id: int = 0):
+        root = str(Path(__file__).resolve().parent.parent)
+        if root not in sys.path:
+            sys.path.insert(0, root)
+
+        from sqlmodel import Session
+        from app import database, schemas
+        from app.services import ServiceError, analytics, calendar, categories, settings, sync, system, tasks, timer
+
+        engine = engine or database.engine
+        database.init_db(engine)
+        self._session_factory = lambda: Session(engine)
+        self._service_error = ServiceError
+        o = self.owner_id = user_id  # every handler below acts for this user
+
+        # (method, path regex, handler(session, path ids, query params, JSON body))
+        self._routes: List[Tuple[str, re.Pattern, Callable]] = [(m, re.compile(f"^{p}$"), h) for m, p, h in [
+            ("GET", r"/sync", lambda s, ids, q, b: sync.sync(
+                s, int(q.get("since", 0)), q.get("tables") or tuple(sync.SYNCED), owner_id=o)),
+            ("GET", r"/categories/", lambda s, ids, q, b: _read(schemas.CategoryRead, categories.list_categories(s, owner_id=o))),
+            ("POST", r"/categories/", lambda s, ids, q, b: _read(schemas.CategoryRead, categories.create_category(s, schemas.CategoryCreate(**b), owner_id=o))),
+            ("PUT", r"/categories/(\d+)", lambda s, ids, q, b: _read(schemas.CategoryRead, categories.update_category(s, ids[0], schemas.CategoryCreate(**b), owner_id=o))),
+            ("GET", r"/tasks/", lambda s, ids, q, b: _read(schemas.TaskRead, tasks.list_tasks(s, owner_id=o))),
+            ("POST", r"/tasks/", lambda s, ids, q, b: _read(schemas.TaskRead, tasks.create_task(s, schemas.TaskCreate(**b), owner_id=o))),
+            ("PUT", r"/tasks/(\d+)", lambda s, ids, q, b: _read(schemas.TaskRead, tasks.update_task(s, ids[0], schemas.TaskUpdate(**b), owner_id=o))),
+            ("DELETE", r"/tasks/(\d+)", lambda s, ids, q, b: tasks.delete_task(s, ids[0], owner_id=o)),
+            ("DELETE", r"/tasks/force/(\d+)", lambda s, ids, q, b: tasks.force_delete_task(s, ids[0], owner_id=o)),
+            ("GET", r"/calendar/blocks", lambda s, ids, q, b: calendar.list_blocks(s, _datetime(q["start"]), _datetime(q["end"]), owner_id=o)),
+            ("GET", r"/calendar/timeline", lambda s, ids, q, b: calendar.timeline(s, _date(q["date"]), owner_id=o)),
+            ("GET", r"/calendar/gaps", lambda s, ids, q, b: calendar.free_intervals(
+                s, _date(q["date"]), _date(q["end_date"]) if q.get("end_date") else None, int(q.get("min_minutes", 1)), owner_id=o)),
+            ("POST", r"/calendar/block", lambda s, ids, q, b: calendar.create_block(s, schemas.TimeBlockCreate(**b), owner_id=o)),
+            ("PUT", r"/calendar/block/(\d+)", lambda s, ids, q, b: calendar.update_block(s, ids[0], schemas.TimeBlockCreate(**b), owner_id=o)),
+            ("DELETE", r"/calendar/block/(\d+)", lambda s, ids, q, b: calendar.delete_block(s, ids[0], owner_id=o)),
+            ("POST", r"/timer/start", lambda s, ids, q, b: timer.start_timer(s, schemas.ActiveTimerCreate(**b), owner_id=o)),
+            ("GET", r"/timer/active", lambda s, ids, q, b: timer.get_active_timer(s, owner_id=o)),
+            ("POST", r"/timer/pause", lambda s, ids, q, b: timer.pause_timer(s, owner_id=o)),
+            ("POST", r"/timer/resume", lambda s, ids, q, b: timer.resume_timer(s, owner_id=o)),
+            ("DELETE", r"/timer/active", lambda s, ids, q, b: timer.clear_timer(s, owner_id=o)),
+            ("GET", r"/analytics/dashboard", lambda s, ids, q, b: analytics.dashboard(
+                s, _datetime(q["start_date"]), _datetime(q["end_date"]), q.get("granularity", "auto"),
+                limit=_optional_int(q.get("limit")), owner_id=o)),
+            ("GET", r"/analytics/streak/(\d+)", lambda s, ids, q, b: analytics.task_streak(s, ids[0], owner_id=o)),
+            ("GET", r"/analytics/heatmap", lambda s, ids, q, b: analytics.heatmap(
+                s, int(q["year"]), _optional_int(q.get("task_id")), _optional_int(q.get("category_id")), owner_id=o)),
+            ("GET", r"/settings/", lambda s, ids, q, b: settings.get_settings(s, owner_id=o)),
+            ("PUT", r"/settings/", lambda s, ids, q, b: settings.update_settings(s, schemas.UserSettingsUpdate(**b), owner_id=o)),
+            ("GET", r"/system/stats", lambda s, ids, q, b: system.system_stats()),
+        ]]
+
+    def _call(self, method: str, path: str, params: Optional[dict] = None, body: Optional[dict] = None):
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                ids = [int(g) for g in match.groups()]
+                with self._session_factory() as session:
+                    try:
+                        return LocalResponse(200, _jsonable(handler(session, ids, params or {}, body or {})))
+                    except self._service_error as e:
+                        return LocalResponse(e.status_code, {"detail": e.detail})
+        return LocalResponse(404, {"detail": "Not Found"})
+
+    def get(self, path: str, params: Optional[dict] = None, timeout: Optional[float] = None):
+        return self._call("GET", path, params=params)
+
+    def post(self, path: str, json: Optional[dict] = None, timeout: Optional[float] = None):
+        return self._call("POST", path, body=json)
+
+    def put(self, path: str, json: Optional[dict] = None, timeout: Optional[float] = None):
+        return self._call("PUT", path, body=json)
+
+    def delete(self, path: str, timeout: Optional[float] = None):
+        return self._call("DELETE", path)
+
+
+def make_client(kind: Optional[str] = None, api_url: Optional[str] = None, user_id: Optional[int] = None):
+    kind = kind or os.getenv("FRONTEND_CLIENT", "http")
+    user_id = int(os.getenv("FRONTEND_USER_ID", "0")) if user_id is None else user_id
+    if kind == "embedded":
+        return EmbeddedClient(user_id=user_id)
+    if kind == "http":
+        return HttpClient(api_url or os.getenv("API_URL", "http://backend:8000"), user_id)
+    raise ValueError(f"Unknown FRONTEND_CLIENT: {kind}")
@@ -1,19 +1,46 @@
 import os
 import streamlit as st
-import requests
-import pandas as pd
-import plotly.express as px
+from api_client import make_client
 from datetime import datetime, date, time, timedelta
 from streamlit_autorefresh import st_autorefresh
+from zoneinfo import ZoneInfo
 import json
 
 
 API_URL = os.getenv("API_URL", "http://backend:8000")
-OFFSET_HOURS = 4  # Tasks reset at 4 AM
+FRONTEND_CLIENT = os.getenv("FRONTEND_CLIENT", "http")  # "embedded" calls the backend services in-process
+
+st.set_page_config(page_title="Daily Focus", page_icon="🎯", layout="wide")
+
+@st.cache_resource
+def get_api_client():
+    return make_client(FRONTEND_CLIENT, API_URL)
+
+api = get_api_client()
+
+def get_day_settings():
+    """The user's day start hour and time zone; the backend's defaults if it can't be reached."""
+    try:
+        res = api.get("/settings/", timeout=5)
+        if res.status_code == 200:
+            return res.json()
+    except Exception as e:
+        print(f"Error fetching settings: {e}")
+    return {"day_start_hour": 4, "time_zone": None}
+
+day_settings = get_day_settings()
+OFFSET_HOURS = day_settings["day_start_hour"]  # Tasks reset at this hour
+USER_TZ = ZoneInfo(day_settings["time_zone"]) if day_settings["time_zone"] else None
+
+def user_now():
+    """Wall-clock time in the user's time zone, the way the backend stores block times."""
+    if USER_TZ is None:
+        return datetime.now()
+    return datetime.now(USER_TZ).replace(tzinfo=None)
 
 def get_effective_date(dt: datetime = None):
     if dt is None:
-        dt = datetime.now()
+        dt = user_now()
     return (dt - timedelta(hours=OFFSET_HOURS)).date()
 
 def get_effective_range(d: date):
@@ -24,7 +51,6 @@ def get_effective_range(d: date):
 effective_today = get_effective_date()
 effective_start, effective_end = get_effective_range(effective_today)
 
-st.set_page_config(page_title="Daily Focus", page_icon="🎯", layout="wide")
 st_autorefresh(interval=300000, key="data_refresh")
 
 st.markdown("""
@@ -84,21 +110,33 @@ st.title(" Daily Focus Dashboard")
 
 # --- API Helper Functions ---
 
-def get_categories():
+def sync_replica():
+    """Keeps categories and tasks in session state and only pulls what changed since the last rerun."""
+    replica = st.session_state.setdefault("replica", {"revision": 0, "categories": {}, "tasks": {}})
     try:
-        res = requests.get(f"{API_URL}/categories/")
-        return res.json() if res.status_code == 200 else []
+        res = api.get("/sync",
+                      params={"since": replica["revision"], "tables": ["categories", "tasks"]}, timeout=5)
+        if res.status_code != 200:
+            return replica
+        delta = res.json()
     except Exception as e:
-        print(f"Error fetching categories: {e}")
-        return []
+        print(f"Error syncing: {e}")
+        return replica
+
+    for table in ("categories", "tasks"):
+        if delta["reset"]:
+            replica[table] = {}
+        replica[table].update({row["id"]: row for row in delta[table]})
+        for row_id in delta["deleted"].get(table, []):
+            replica[table].pop(row_id, None)
+    replica["revision"] = delta["revision"]
+    return replica
+
+def get_categories():
+    return sorted(sync_replica()["categories"].values(), key=lambda c: c["id"])
 
 def get_tasks():
-    try:
-        res = requests.get(f"{API_URL}/tasks/")
-        return res.json() if res.status_code == 200 else []
-    except Exception as e:
-        print(f"Error fetching tasks: {e}")
-        return []
+    return sorted(sync_replica()["tasks"].values(), key=lambda t: t["id"])
 
 # --- Sidebar: Data Entry ---
 
@@ -131,7 +169,7 @@ with st.sidebar:
             final_title = new_task_input.strip() if new_task_input.strip() else task_selection
             
             if categories and final_title:
-                requests.post(f"{API_URL}/tasks/", json={"title": final_title, "category_id": cat_options[selected_cat], "is_streak": is_streak})
+                api.post("/tasks/", json={"title": final_title, "category_id": cat_options[selected_cat], "is_streak": is_streak})
                 st.rerun()
 
     with st.expander(" Manage Categories"):
@@ -146,7 +184,7 @@ with st.sidebar:
             elif new_c_color.upper() in existing_colors:
                 st.error("Color already used! Pick a unique one.")
             else:
-                requests.post(f"{API_URL}/categories/", json={"name": new_c_name, "color_hex": new_c_color})
+                api.post("/categories/", json={"name": new_c_name, "color_hex": new_c_color})
                 st.rerun()
                 
         st.divider()
@@ -156,8 +194,18 @@ with st.sidebar:
             updated_color = st.color_picker("Update Color", current_color, key="edit_color")
             if st.button("Save Color Update"):
                 cat_id = cat_options[edit_cat]
-                requests.put(f"{API_URL}/categories/{cat_id}", json={"name": edit_cat, "color_hex": updated_color})
+                api.put(f"/categories/{cat_id}", json={"name": edit_cat, "color_hex": updated_color})
+                st.rerun()
+
+    with st.expander("⚙️ Day Settings"):
+        new_hour = st.number_input("Day starts at (hour)", min_value=0, max_value=23, value=OFFSET_HOURS)
+        new_tz = st.text_input("Time zone (e.g. Europe/Berlin, empty for server time)", day_settings["time_zone"] or "")
+        if st.button("Save Day Settings"):
+            res = api.put("/settings/", json={"day_start_hour": int(new_hour), "time_zone": new_tz.strip() or None})
+            if res.status_code == 200:
                 st.rerun()
+            else:
+                st.error(res.json().get("detail", "Could not save settings"))
 
 tab1, tab2, tab3 = st.tabs(["📝 Today's List", "⏱️ Log Time", "📊 Analytics"])
 
@@ -178,18 +226,18 @@ with tab1:
             
            
             if col3.button("❌", key=f"del_{task['id']}"):
-                requests.delete(f"{API_URL}/tasks/{task['id']}")
+                api.delete(f"/tasks/{task['id']}")
                 st.rerun()
 
             if is_done != task["is_completed"]:
-                requests.put(f"{API_URL}/tasks/{task['id']}", json={"is_completed": is_done})
+                api.put(f"/tasks/{task['id']}", json={"is_completed": is_done})
                 st.rerun()
 
 
 with tab2:
     st.header("⏱️ Log Session")
 
-    now = datetime.now()
+    now = user_now()
     
     col_clock, col_warn = st.columns([1, 2])
     with col_clock:
@@ -225,9 +273,9 @@ with tab2:
     start_of_day = effective_start.isoformat()
     end_of_day   = effective_end.isoformat()
     try:
-        blocks_res  = requests.get(f"{API_URL}/calendar/blocks",
-                                   params={"start": start_of_day, "end": end_of_day},
-                                   timeout=5)
+        blocks_res  = api.get("/calendar/blocks",
+                              params={"start": start_of_day, "end": end_of_day},
+                              timeout=5)
         blocks_data = blocks_res.json() if blocks_res.status_code == 200 else []
     except Exception:
         blocks_data = []
@@ -240,6 +288,22 @@ with tab2:
     tab_manual, tab_timer = st.tabs(["✍️ Manual Entry", "⏱️ Live Timer"])
     
     with tab_manual:
+        with st.expander("🕳️ Free slots today"):
+            try:
+                gaps_res = api.get("/calendar/gaps",
+                                   params={"date": effective_today.isoformat(), "min_minutes": 15},
+                                   timeout=5)
+                free_slots = gaps_res.json() if gaps_res.status_code == 200 else []
+            except Exception:
+                free_slots = []
+            if free_slots:
+                for g in free_slots:
+                    g_start = datetime.fromisoformat(g["start_time"]).strftime("%H:%M")
+                    g_end = datetime.fromisoformat(g["end_time"]).strftime("%H:%M")
+                    st.write(f"{g_start} → {g_end} ({g['minutes']} min)")
+            else:
+                st.caption("No free slots of 15 minutes or more.")
+
         with st.form("log_session_form", clear_on_submit=True):
             if todays_tasks:
                 form_col1, form_col2, form_col3 = st.columns([2, 1, 1])
@@ -263,10 +327,10 @@ with tab2:
                     if end_dt_obj <= start_dt_obj:
                         end_dt_obj += timedelta(days=1)
     
-                    res = requests.post(f"{API_URL}/calendar/block",
-                                        json={"task_id": task_id,
-                                              "start_time": start_dt_obj.isoformat(),
-                                              "end_time": end_dt_obj.isoformat()})
+                    res = api.post("/calendar/block",
+                                   json={"task_id": task_id,
+                                         "start_time": start_dt_obj.isoformat(),
+                                         "end_time": end_dt_obj.isoformat()})
                     if res.status_code == 200:
                         st.success("Session added!")
                         st.rerun()
@@ -282,7 +346,7 @@ with tab2:
             if "timer_running" not in st.session_state:
                 # Ask backend if there is an active timer
                 try:
-                    active_res = requests.get(f"{API_URL}/timer/active", timeout=2)
+                    active_res = api.get("/timer/active", timeout=2)
                     if active_res.status_code == 200:
                         active_data = active_res.json()
                         if active_data:
@@ -397,15 +461,15 @@ with tab2:
                              task_id = next(t["id"] for t in todays_tasks if t["title"] == timer_task_title)
                         
                         if not is_paused:
-                            end_time_val = datetime.now()
+                            end_time_val = user_now()
                             start_time_val = st.session_state.timer_start_time
                             if end_time_val > start_time_val:
-                                requests.post(f"{API_URL}/calendar/block",
-                                              json={"task_id": task_id,
-                                                    "start_time": start_time_val.isoformat(),
-                                                    "end_time": end_time_val.isoformat()})
+                                api.post("/calendar/block",
+                                         json={"task_id": task_id,
+                                               "start_time": start_time_val.isoformat(),
+                                               "end_time": end_time_val.isoformat()})
                         
-                        requests.delete(f"{API_URL}/timer/active")
+                        api.delete("/timer/active")
                         st.session_state.timer_running = False
                         st.session_state.timer_start_time = None
                         st.session_state.pop("active_timer_task_id", None)
@@ -417,25 +481,25 @@ with tab2:
                 with c_pause:
                     if not is_paused:
                         if st.button("⏸️ Pause"):
-                            end_time_val = datetime.now()
+                            end_time_val = user_now()
                             start_time_val = st.session_state.timer_start_time
                             task_id = st.session_state.get("active_timer_task_id")
                             if end_time_val > start_time_val:
-                                requests.post(f"{API_URL}/calendar/block",
-                                              json={"task_id": task_id,
-                                                    "start_time": start_time_val.isoformat(),
-                                                    "end_time": end_time_val.isoformat()})
-                            requests.post(f"{API_URL}/timer/pause")
+                                api.post("/calendar/block",
+                                         json={"task_id": task_id,
+                                               "start_time": start_time_val.isoformat(),
+                                               "end_time": end_time_val.isoformat()})
+                            api.post("/timer/pause")
                             st.session_state.pop("timer_running", None)
                             st.rerun()
                     else:
                         if st.button("▶️ Resume"):
-                            requests.post(f"{API_URL}/timer/resume")
+                            api.post("/timer/resume")
                             st.session_state.pop("timer_running", None)
                             st.rerun()
             else:
                 if st.button("▶️ Start Timer", type="primary"):
-                    start_time_now = datetime.now()
+                    start_time_now = user_now()
                     st.session_state.timer_running = True
                     st.session_state.timer_start_time = start_time_now
                     st.session_state.timer_paused = False
@@ -445,7 +509,7 @@ with tab2:
                     st.session_state.active_timer_task_id = task_id
                     
                     # Save to backend
-                    requests.post(f"{API_URL}/timer/start", json={
+                    api.post("/timer/start", json={
                         "task_id": task_id,
                         "start_time": start_time_now.isoformat()
                     })
@@ -458,36 +522,30 @@ with tab2:
     # ── 24-Hour Plotly Timeline ───────────────────────────────────────
     st.subheader("Today's Timeline")
 
-    today_str = date.today().isoformat()
+    try:
+        timeline_res = api.get("/calendar/timeline", params={"date": effective_today.isoformat()}, timeout=5)
+        timeline = timeline_res.json()["columns"] if timeline_res.status_code == 200 else {}
+    except Exception:
+        timeline = {}
 
-    if not blocks_data:
+    if not timeline.get("id"):
         st.info("No sessions logged yet today. Add one above.")
     else:
-        chart_rows = []
-        for b in blocks_data:
-            task_info = next((t for t in all_tasks if t["id"] == b["task_id"]), None)
-            task_name = task_info["title"] if task_info else "Unknown"
-            cat_color = global_color_map.get(
-                next((c["name"] for c in categories if c["id"] == task_info.get("category_id")), ""),
-                "#3788d8"
-            ) if task_info else "#3788d8"
-            s = datetime.fromisoformat(b["start_time"])
-            e = datetime.fromisoformat(b["end_time"])
-            chart_rows.append({
-                "Task":  task_name,
-                "Start": s,
-                "End":   e,
-                "Color": cat_color,
-            })
-
-        df_timeline = pd.DataFrame(chart_rows)
+        # pandas/plotly take over a second to import; only pay for them on pages that draw charts.
+        import pandas as pd
+        import plotly.express as px
+
+        # Already joined, sorted and clipped to the day by the backend: one column per list.
+        df_timeline = pd.DataFrame(timeline)
+        df_timeline["start_time"] = pd.to_datetime(df_timeline["start_time"])
+        df_timeline["end_time"] = pd.to_datetime(df_timeline["end_time"])
         fig = px.timeline(
             df_timeline,
-            x_start="Start",
-            x_end="End",
-            y="Task",
-            color="Task",
-            color_discrete_sequence=df_timeline["Color"].tolist(),
+            x_start="start_time",
+            x_end="end_time",
+            y="title",
+            color="title",
+            color_discrete_map=dict(zip(timeline["title"], timeline["color"])),
         )
         fig.update_xaxes(
             range=[effective_start, effective_end],
@@ -503,7 +561,7 @@ with tab2:
             gridcolor="#334155",
         )
         
-        now = datetime.now()
+        now = user_now()
         if effective_start <= now <= effective_end:
             fig.add_vline(
                 x=now.timestamp() * 1000,
@@ -551,7 +609,7 @@ with tab2:
                 st.rerun()
 
             if c4.button("❌", key=f"del_block_{b['id']}"):
-                del_res = requests.delete(f"{API_URL}/calendar/block/{b['id']}")
+                del_res = api.delete(f"/calendar/block/{b['id']}")
                 if del_res.status_code == 200:
                     st.session_state.pop(edit_key, None)
                     st.rerun()
@@ -579,10 +637,10 @@ with tab2:
                         if new_e_dt <= new_s_dt:
                             new_e_dt += timedelta(days=1)
                             
-                        up_res = requests.put(f"{API_URL}/calendar/block/{b['id']}",
-                                            json={"task_id": new_task_id,
-                                                  "start_time": new_s_dt.isoformat(),
-                                                  "end_time": new_e_dt.isoformat()})
+                        up_res = api.put(f"/calendar/block/{b['id']}",
+                                         json={"task_id": new_task_id,
+                                               "start_time": new_s_dt.isoformat(),
+                                               "end_time": new_e_dt.isoformat()})
                         if up_res.status_code == 200:
                             st.session_state[edit_key] = False
                             st.rerun()
@@ -597,7 +655,7 @@ with tab3:
     # ── System / App Resource Profiler ───────────────────────────────
     with st.expander("🖥️ App Resource Profiler", expanded=False):
         try:
-            stats_res = requests.get(f"{API_URL}/system/stats", timeout=3)
+            stats_res = api.get("/system/stats", timeout=3)
             if stats_res.status_code == 200:
                 stats = stats_res.json()
                 
@@ -636,9 +694,9 @@ with tab3:
 
     # ── Fetch Data ───────────────────────────────────────────────────
     try:
-        res = requests.get(
-            f"{API_URL}/analytics/dashboard",
-            params={"start_date": start_iso, "end_date": end_iso},
+        res = api.get(
+            "/analytics/dashboard",
+            params={"start_date": start_iso, "end_date": end_iso, "limit": 15},
             timeout=5
         )
     except Exception:
@@ -661,6 +719,9 @@ with tab3:
     if not data["pie_chart"]:
         st.info("No sessions logged for this period.")
     else:
+        import pandas as pd
+        import plotly.express as px
+
         # ── Row 1: Pie + Task Bar ────────────────────────────────────
         col_pie, col_bar = st.columns(2)
 
@@ -767,9 +828,9 @@ with tab3:
     # Fetch blocks for this specific date
     led_start, led_end = get_effective_range(log_edit_date)
     try:
-        led_res = requests.get(f"{API_URL}/calendar/blocks",
-                               params={"start": led_start.isoformat(), "end": led_end.isoformat()},
-                               timeout=5)
+        led_res = api.get("/calendar/blocks",
+                          params={"start": led_start.isoformat(), "end": led_end.isoformat()},
+                          timeout=5)
         led_blocks = led_res.json() if led_res.status_code == 200 else []
     except Exception:
         led_blocks = []
@@ -796,7 +857,7 @@ with tab3:
                 st.rerun()
 
             if c4.button("❌", key=f"hist_del_block_{b['id']}"):
-                del_res = requests.delete(f"{API_URL}/calendar/block/{b['id']}")
+                del_res = api.delete(f"/calendar/block/{b['id']}")
                 if del_res.status_code == 200:
                     st.session_state.pop(edit_key, None)
                     st.rerun()
@@ -826,10 +887,10 @@ with tab3:
                         if new_e_dt <= new_s_dt:
                             new_e_dt += timedelta(days=1)
                             
-                        up_res = requests.put(f"{API_URL}/calendar/block/{b['id']}",
-                                            json={"task_id": new_task_id,
-                                                  "start_time": new_s_dt.isoformat(),
-                                                  "end_time": new_e_dt.isoformat()})
+                        up_res = api.put(f"/calendar/block/{b['id']}",
+                                         json={"task_id": new_task_id,
+                                               "start_time": new_s_dt.isoformat(),
+                                               "end_time": new_e_dt.isoformat()})
                         if up_res.status_code == 200:
                             st.session_state[edit_key] = False
                             st.rerun()
@@ -848,7 +909,7 @@ with tab3:
         streak_task  = st.selectbox(
             "Select Streak Task", options=list(task_options.keys()), key="streak_select", label_visibility="collapsed"
         )
-        streak_res = requests.get(f"{API_URL}/analytics/streak/{task_options[streak_task]}")
+        streak_res = api.get(f"/analytics/streak/{task_options[streak_task]}")
 
         if streak_res.status_code == 200:
             import plotly.graph_objects as go
@@ -904,6 +965,38 @@ with tab3:
             )
             st.plotly_chart(fig_dots, use_container_width=True)
             st.caption(f"**{dot_fill} / 365** days complete — {365 - dot_fill} days to go until Mega Year {years_done + 1}")
+
+            # Per-day activity heatmap for the year (weeks × weekdays)
+            heat_res = api.get("/analytics/heatmap",
+                               params={"task_id": task_options[streak_task], "year": today.year},
+                               timeout=5)
+            if heat_res.status_code == 200:
+                heat = heat_res.json()
+                day_minutes = [m for m, run in heat["minutes_rle"] for _ in range(run)]
+                jan1 = date(heat["year"], 1, 1)
+                z = [[None] * 54 for _ in range(7)]
+                hover = [[""] * 54 for _ in range(7)]
+                for i, m in enumerate(day_minutes):
+                    d = jan1 + timedelta(days=i)
+                    week = (i + jan1.weekday()) // 7
+                    z[d.weekday()][week] = m
+                    hover[d.weekday()][week] = f"{d.strftime('%b %d')}: {m} min"
+
+                fig_heat = go.Figure(go.Heatmap(
+                    z=z, text=hover, hoverinfo="text",
+                    colorscale=[[0, "#1e2433"], [0.01, "#0e4429"], [0.5, "#26a641"], [1, "#39d353"]],
+                    showscale=False, xgap=3, ygap=3,
+                ))
+                fig_heat.update_layout(
+                    paper_bgcolor="#0f1117", plot_bgcolor="#0f1117",
+                    xaxis=dict(showticklabels=False, showgrid=False, zeroline=False),
+                    yaxis=dict(tickvals=list(range(7)), ticktext=["Mon", "", "Wed", "", "Fri", "", "Sun"],
+                               showgrid=False, zeroline=False, autorange="reversed"),
+                    margin=dict(l=0, r=0, t=5, b=0),
+                    height=160,
+                )
+                st.plotly_chart(fig_heat, use_container_width=True)
+                st.caption(f"**{heat['active_days']}** active days in {heat['year']} · {heat['total_minutes']} min total")
     else:
         st.info("No streak tasks yet. Create one by checking the '🔥 Streak Task' box!")
 
@@ -922,7 +1015,7 @@ with tab3:
             if st.button("Permanently Delete", type="primary"):
                 del_id = del_task_options[task_to_del]
                 # The backend router app/routers/tasks.py needs a force-delete or we use the existing delete endpoint
-                requests.delete(f"{API_URL}/tasks/force/{del_id}") 
+                api.delete(f"/tasks/force/{del_id}") 
                 st.success(f"Task '{task_to_del}' and all its history have been wiped out.")
                 st.rerun()
         else:
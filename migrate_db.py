@@ -1,6 +1,12 @@
 import sqlite3
 import os
 
+from sqlalchemy import delete
+from sqlmodel import create_engine
+
+from app import models  # noqa: F401  registers the tables init_db creates
+from app.database import backfill_normalized_titles, init_db, schema_fingerprint
+
 db_path = os.path.join(os.path.dirname(__file__), "daily_focus.db")
 conn = sqlite3.connect(db_path)
 cursor = conn.cursor()
@@ -13,3 +19,23 @@ except sqlite3.OperationalError as e:
 
 conn.commit()
 conn.close()
+
+# Remaining columns (normalized_title backfilled with app.models.normalize_title) and every index
+# (per-user, replacing the retired global ones) come from the models, the same way the app upgrades
+# at startup; clearing the fingerprint makes init_db run.
+engine = create_engine(f"sqlite:///{db_path}")
+try:
+    with engine.begin() as connection:
+        connection.execute(delete(schema_fingerprint))
+except Exception:
+    pass  # never booted: no fingerprint table yet
+try:
+    init_db(engine)
+    # Earlier versions of this script filled normalized_title with SQL lower(trim()); redo every row.
+    with engine.begin() as connection:
+        backfill_normalized_titles(connection, only_missing=False)
+    print("Ensured normalized task titles and the per-user indexes "
+          "(ix_timeblock_owner_id_start_time, ux_task_owner_id_normalized_title_category, ...)")
+except Exception as e:
+    print(f"Error (duplicate task titles must be merged first): {e}")
+engine.dispose()
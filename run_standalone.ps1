@@ -1,4 +1,6 @@
 # run_standalone.ps1
+# Pass -Embedded to run Streamlit alone, calling the backend services in-process instead of over HTTP.
+param([switch]$Embedded)
 $ErrorActionPreference = "Continue"
 
 Write-Host "--- Launching Time Tracker ---"
@@ -16,12 +18,18 @@ if ([string]::IsNullOrEmpty($env:DATABASE_URL)) {
     Write-Host "No DATABASE_URL found. Using default SQLite database at $RootDir/daily_focus.db"
 }
 
-# Start Backend (FastAPI)
-Write-Host "Starting Backend (FastAPI)..."
-$BackendProc = Start-Process -FilePath "$RootDir\.venv\Scripts\python.exe" -ArgumentList "-m uvicorn app.main:app --host 127.0.0.1 --port 8000 --reload" -WorkingDirectory "$RootDir" -NoNewWindow -PassThru
-
-if ([string]::IsNullOrEmpty($env:API_URL)) {
-    $env:API_URL = "http://127.0.0.1:8000"
+if ($Embedded) {
+    Write-Host "Embedded mode: the frontend talks to the database directly, no API server."
+    $env:FRONTEND_CLIENT = "embedded"
+    $BackendProc = $null
+} else {
+    # Start Backend (FastAPI)
+    Write-Host "Starting Backend (FastAPI)..."
+    $BackendProc = Start-Process -FilePath "$RootDir\.venv\Scripts\python.exe" -ArgumentList "-m uvicorn app.main:app --host 127.0.0.1 --port 8000 --reload" -WorkingDirectory "$RootDir" -NoNewWindow -PassThru
+
+    if ([string]::IsNullOrEmpty($env:API_URL)) {
+        $env:API_URL = "http://127.0.0.1:8000"
+    }
 }
 
 # Start Frontend (Streamlit)
@@ -36,6 +44,6 @@ try {
 }
 finally {
     Write-Host "Stopping services..."
-    Stop-Process -Id $BackendProc.Id -ErrorAction SilentlyContinue
+    if ($BackendProc) { Stop-Process -Id $BackendProc.Id -ErrorAction SilentlyContinue }
     Stop-Process -Id $FrontendProc.Id -ErrorAction SilentlyContinue
 }
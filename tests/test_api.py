@@ -1,9 +1,10 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, select
 from sqlmodel.pool import StaticPool
 from app.main import app
 from app.database import get_session
+from app.services import analytics
 
 # Setup a test database in memory
 DATABASE_URL = "sqlite://"
@@ -125,3 +126,464 @@ def test_analytics_dashboard(client: TestClient):
     assert data["total_minutes"] == 60
     assert len(data["pie_chart"]) == 1
     assert data["pie_chart"][0]["name"] == "Work"
+
+def test_delete_task_keeps_task_with_history(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    client.post(
+        "/calendar/block",
+        json={"task_id": task_id, "start_time": "2020-01-01T09:00:00", "end_time": "2020-01-01T10:00:00"},
+    )
+
+    response = client.delete(f"/tasks/{task_id}")
+    assert response.status_code == 200
+    assert response.json()["task_deleted"] is False
+    assert len(client.get("/tasks/").json()) == 1
+
+    response = client.delete(f"/tasks/force/{task_id}")
+    assert response.status_code == 200
+    assert response.json()["blocks_deleted"] == 1
+    assert client.get("/tasks/").json() == []
+
+def test_batch_delete(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    task1_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    task2_id = client.post("/tasks/", json={"title": "Read", "category_id": cat_id}).json()["id"]
+    for task_id, hour in ((task1_id, 9), (task1_id, 11), (task2_id, 13)):
+        client.post(
+            "/calendar/block",
+            json={"task_id": task_id, "start_time": f"2026-02-20T{hour:02d}:00:00", "end_time": f"2026-02-20T{hour:02d}:30:00"},
+        )
+    client.post("/timer/start", json={"task_id": task1_id, "start_time": "2026-02-20T14:00:00"})
+    block_id = client.get("/calendar/blocks?start=2026-02-20T12:00:00&end=2026-02-20T14:00:00").json()[0]["id"]
+
+    response = client.post("/tasks/batch-delete", json={"task_ids": [task1_id], "block_ids": [block_id]})
+    assert response.status_code == 200
+    assert response.json() == {"tasks_deleted": 1, "blocks_deleted": 3, "timers_cleared": 1}
+    assert [t["id"] for t in client.get("/tasks/").json()] == [task2_id]
+
+def test_create_task_dedupes_case_insensitively(client: TestClient):
+    work_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    life_id = client.post("/categories/", json={"name": "Life", "color_hex": "#00ff00"}).json()["id"]
+
+    first = client.post("/tasks/", json={"title": "Code", "category_id": work_id}).json()
+    client.put(f"/tasks/{first['id']}", json={"is_completed": True})
+    again = client.post("/tasks/", json={"title": "code ", "category_id": work_id}).json()
+    other = client.post("/tasks/", json={"title": "Code", "category_id": life_id}).json()
+
+    assert again["id"] == first["id"]
+    assert again["title"] == "Code"
+    assert again["is_completed"] is False
+    assert other["id"] != first["id"]
+    assert len(client.get("/tasks/").json()) == 2
+
+def test_analytics_dashboard_granularity(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    for day in ("2026-02-02", "2026-02-08", "2026-02-09", "2026-03-10"):
+        client.post(
+            "/calendar/block",
+            json={"task_id": task_id, "start_time": f"{day}T09:00:00", "end_time": f"{day}T09:30:00"},
+        )
+    params = "start_date=2026-02-01T04:00:00&end_date=2026-04-01T04:00:00"
+
+    weekly = client.get(f"/analytics/dashboard?{params}&granularity=week").json()
+    assert weekly["granularity"] == "week"
+    assert weekly["bar_chart"] == [
+        {"date": "2026-02-02", "categories": {"Work": 60}},
+        {"date": "2026-02-09", "categories": {"Work": 30}},
+        {"date": "2026-03-09", "categories": {"Work": 30}},
+    ]
+
+    monthly = client.get(f"/analytics/dashboard?{params}&granularity=month").json()
+    assert [b["date"] for b in monthly["bar_chart"]] == ["2026-02-01", "2026-03-01"]
+
+    auto = client.get(f"/analytics/dashboard?{params}&granularity=auto&max_points=10").json()
+    assert auto["granularity"] == "week"
+    assert auto["total_minutes"] == 120
+
+def test_analytics_batch_ranges(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    code_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    read_id = client.post("/tasks/", json={"title": "Read", "category_id": cat_id}).json()["id"]
+    for task_id, day, end in ((code_id, "2026-02-10", "10:00"), (code_id, "2026-02-17", "09:30"), (read_id, "2026-02-18", "09:45")):
+        client.post(
+            "/calendar/block",
+            json={"task_id": task_id, "start_time": f"{day}T09:00:00", "end_time": f"{day}T{end}:00"},
+        )
+
+    response = client.post("/analytics/batch", json={"ranges": [
+        {"name": "last week", "start_date": "2026-02-09T04:00:00", "end_date": "2026-02-16T04:00:00"},
+        {"name": "this week", "start_date": "2026-02-16T04:00:00", "end_date": "2026-02-23T04:00:00"},
+        {"name": "both", "start_date": "2026-02-09T04:00:00", "end_date": "2026-02-23T04:00:00"},
+    ]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["report"]["total_minutes"] for r in data["reports"]] == [60, 75, 135]
+    assert data["reports"][1]["report"]["task_breakdown"] == [
+        {"task": "Read", "minutes": 45, "color": "#ff0000"},
+        {"task": "Code", "minutes": 30, "color": "#ff0000"},
+    ]
+    assert data["deltas"][0] == {
+        "from_range": "last week", "to_range": "this week", "total_minutes": 15,
+        "categories": {"Work": 15}, "tasks": {"Code": -30, "Read": 45},
+    }
+
+def test_analytics_heatmap(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    # 02:00 on Jan 3rd still belongs to the effective day of Jan 2nd.
+    for start, end in (("2025-01-02T09:00:00", "2025-01-02T10:00:00"), ("2025-01-03T02:00:00", "2025-01-03T02:30:00"),
+                       ("2025-01-05T09:00:00", "2025-01-05T09:15:00")):
+        client.post("/calendar/block", json={"task_id": task_id, "start_time": start, "end_time": end})
+
+    response = client.get(f"/analytics/heatmap?year=2025&task_id={task_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["minutes_rle"] == [[0, 1], [90, 1], [0, 2], [15, 1], [0, 360]]
+    assert data["active_days"] == 2
+    assert data["total_minutes"] == 105
+
+    # Past years are served from memory until the user's next write.
+    client.post("/calendar/block", json={"task_id": task_id, "start_time": "2025-12-31T09:00:00", "end_time": "2025-12-31T09:10:00"})
+    data = client.get(f"/analytics/heatmap?year=2025&task_id={task_id}").json()
+    assert data["minutes_rle"][-1] == [10, 1]
+    data = client.get(f"/analytics/heatmap?year=2025&category_id={cat_id}").json()
+    assert sum(run for _, run in data["minutes_rle"]) == 365
+
+def test_heatmap_sees_writes_from_other_workers(client: TestClient, monkeypatch):
+    from app.core import events
+
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    block = {"task_id": task_id, "start_time": "2025-03-01T09:00:00", "end_time": "2025-03-01T10:00:00"}
+    client.post("/calendar/block", json=block)
+    assert client.get("/analytics/heatmap?year=2025").json()["total_minutes"] == 60
+
+    # Another worker's write only reaches this one through the database, never as an in-process event.
+    monkeypatch.setattr(events, "_subscribers", [])
+    client.post("/calendar/block", json={**block, "start_time": "2025-03-02T09:00:00", "end_time": "2025-03-02T09:30:00"})
+    assert client.get("/analytics/heatmap?year=2025").json()["total_minutes"] == 90
+
+def test_analytics_distribution(client: TestClient):
+    work_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    life_id = client.post("/categories/", json={"name": "Life", "color_hex": "#00ff00"}).json()["id"]
+    code_id = client.post("/tasks/", json={"title": "Code", "category_id": work_id}).json()["id"]
+    gym_id = client.post("/tasks/", json={"title": "Gym", "category_id": life_id}).json()["id"]
+    sessions = [
+        (code_id, "2026-02-20T09:00", "2026-02-20T09:10"),
+        (code_id, "2026-02-20T10:00", "2026-02-20T10:20"),
+        (code_id, "2026-02-20T11:00", "2026-02-20T11:30"),
+        (code_id, "2026-02-21T09:00", "2026-02-21T10:40"),
+        (gym_id, "2026-02-21T18:00", "2026-02-21T19:00"),
+    ]
+    for task_id, start, end in sessions:
+        client.post("/calendar/block", json={"task_id": task_id, "start_time": start, "end_time": end})
+
+    params = "start_date=2026-02-20T04:00:00&end_date=2026-02-22T04:00:00"
+    data = client.get(f"/analytics/distribution?{params}").json()
+    code = data["groups"][0]
+    assert code["name"] == "Code"
+    assert (code["sessions"], code["active_days"], code["sessions_per_day"]) == (4, 2, 2.0)
+    assert (code["mean_minutes"], code["median_minutes"], code["max_minutes"]) == (40.0, 25.0, 100.0)
+    assert code["p90_minutes"] == 79.0
+    assert data["overall"]["sessions"] == 5
+
+    data = client.get(f"/analytics/distribution?{params}&group_by=category").json()
+    assert [(g["name"], g["sessions"]) for g in data["groups"]] == [("Work", 4), ("Life", 1)]
+
+def test_analytics_dashboard_top_k(client: TestClient):
+    work_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    life_id = client.post("/categories/", json={"name": "Life", "color_hex": "#00ff00"}).json()["id"]
+    fun_id = client.post("/categories/", json={"name": "Fun", "color_hex": "#0000ff"}).json()["id"]
+    blocks = [("Code", work_id, "09:00", "11:00"), ("Mail", work_id, "11:00", "11:30"),
+              ("Gym", life_id, "12:00", "13:00"), ("Games", fun_id, "14:00", "14:10")]
+    for title, cat_id, start, end in blocks:
+        task_id = client.post("/tasks/", json={"title": title, "category_id": cat_id}).json()["id"]
+        client.post("/calendar/block", json={"task_id": task_id, "start_time": f"2026-02-20T{start}:00", "end_time": f"2026-02-20T{end}:00"})
+
+    params = "start_date=2026-02-20T04:00:00&end_date=2026-02-21T04:00:00"
+    data = client.get(f"/analytics/dashboard?{params}&limit=2").json()
+    assert data["total_minutes"] == 220
+    assert [(t["task"], t["minutes"]) for t in data["task_breakdown"]] == [("Code", 120), ("Gym", 60), ("Other", 40)]
+    assert [(p["name"], p["value"]) for p in data["pie_chart"]] == [("Work", 150), ("Life", 60), ("Other", 10)]
+    assert data["bar_chart"] == [{"date": "2026-02-20", "categories": {"Work": 150, "Life": 60, "Other": 10}}]
+
+    full = client.get(f"/analytics/dashboard?{params}").json()
+    assert len(full["task_breakdown"]) == 4
+
+def test_calendar_gaps(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    # A late session from the previous effective day spills past the 04:00 boundary.
+    for start, end in (("2026-02-20T02:00", "2026-02-20T05:00"), ("2026-02-20T09:00", "2026-02-20T10:00"),
+                       ("2026-02-20T10:10", "2026-02-20T12:00"), ("2026-02-21T08:00", "2026-02-21T09:00")):
+        client.post("/calendar/block", json={"task_id": task_id, "start_time": start, "end_time": end})
+
+    response = client.get("/calendar/gaps?date=2026-02-20&min_minutes=15")
+    assert response.status_code == 200
+    assert [(g["start_time"], g["end_time"]) for g in response.json()] == [
+        ("2026-02-20T05:00:00", "2026-02-20T09:00:00"),
+        ("2026-02-20T12:00:00", "2026-02-21T04:00:00"),
+    ]
+
+    gaps = client.get("/calendar/gaps?date=2026-02-20&end_date=2026-02-21").json()
+    assert [(g["date"], g["minutes"]) for g in gaps] == [
+        ("2026-02-20", 240), ("2026-02-20", 10), ("2026-02-20", 960), ("2026-02-21", 240), ("2026-02-21", 1140),
+    ]
+
+def test_calendar_gaps_with_overlapping_blocks(client: TestClient, session: Session):
+    from datetime import datetime
+    from app.models import TimeBlock
+
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    # The later-starting block ends first; the long one still covers the window until 06:00.
+    session.add(TimeBlock(task_id=task_id, start_time=datetime(2026, 2, 20, 2), end_time=datetime(2026, 2, 20, 6)))
+    session.add(TimeBlock(task_id=task_id, start_time=datetime(2026, 2, 20, 3), end_time=datetime(2026, 2, 20, 3, 30)))
+    session.commit()
+
+    gaps = client.get("/calendar/gaps?date=2026-02-20").json()
+    assert [(g["start_time"], g["end_time"]) for g in gaps] == [("2026-02-20T06:00:00", "2026-02-21T04:00:00")]
+
+def test_calendar_timeline(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    code_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    read_id = client.post("/tasks/", json={"title": "Read"}).json()["id"]
+    for task_id, start, end in ((read_id, "2026-02-20T09:00", "2026-02-20T10:00"),
+                                (code_id, "2026-02-20T02:00", "2026-02-20T05:00"),
+                                (code_id, "2026-02-21T03:00", "2026-02-21T06:00")):
+        client.post("/calendar/block", json={"task_id": task_id, "start_time": start, "end_time": end})
+
+    response = client.get("/calendar/timeline?date=2026-02-20")
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["day_start"], body["day_end"]) == ("2026-02-20T04:00:00", "2026-02-21T04:00:00")
+    columns = body["columns"]
+    assert columns["title"] == ["Code", "Read", "Code"]
+    assert columns["color"] == ["#ff0000", "#3788d8", "#ff0000"]
+    # Blocks crossing the 04:00 boundary are clipped to the day.
+    assert list(zip(columns["start_time"], columns["end_time"])) == [
+        ("2026-02-20T04:00:00", "2026-02-20T05:00:00"),
+        ("2026-02-20T09:00:00", "2026-02-20T10:00:00"),
+        ("2026-02-21T03:00:00", "2026-02-21T04:00:00"),
+    ]
+
+    assert client.get("/calendar/timeline?date=2026-03-01").json()["columns"]["id"] == []
+
+def test_new_block_splits_blocks_that_already_overlap(client: TestClient, session: Session):
+    from datetime import datetime
+    from app.models import TimeBlock
+
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    # Already overlapping, as a timer autosave can leave them: the long block starts before the short one.
+    session.add(TimeBlock(task_id=task_id, start_time=datetime(2026, 2, 20, 8), end_time=datetime(2026, 2, 20, 12)))
+    session.add(TimeBlock(task_id=task_id, start_time=datetime(2026, 2, 20, 9), end_time=datetime(2026, 2, 20, 9, 30)))
+    session.commit()
+
+    client.post("/calendar/block", json={"task_id": task_id, "start_time": "2026-02-20T11:00", "end_time": "2026-02-20T11:30"})
+    blocks = client.get("/calendar/blocks?start=2026-02-20T00:00&end=2026-02-21T00:00").json()
+    assert sorted((b["start_time"][11:16], b["end_time"][11:16]) for b in blocks) == [
+        ("08:00", "11:00"), ("09:00", "09:30"), ("11:00", "11:30"), ("11:30", "12:00"),
+    ]
+
+def test_calendar_timeline_with_overlapping_blocks(client: TestClient, session: Session):
+    from datetime import datetime
+    from app.models import TimeBlock
+
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    # Stored overlapping (timer autosave, imports): the short block starts later but ends before the day.
+    session.add(TimeBlock(task_id=task_id, start_time=datetime(2026, 2, 20, 2), end_time=datetime(2026, 2, 20, 6)))
+    session.add(TimeBlock(task_id=task_id, start_time=datetime(2026, 2, 20, 3), end_time=datetime(2026, 2, 20, 3, 30)))
+    session.commit()
+
+    columns = client.get("/calendar/timeline?date=2026-02-20").json()["columns"]
+    assert list(zip(columns["start_time"], columns["end_time"])) == [("2026-02-20T04:00:00", "2026-02-20T06:00:00")]
+
+def test_timer_autosave_trims_blocks_it_covers(client: TestClient, session: Session):
+    from datetime import timedelta
+    from app.models import TimeBlock
+    from app.services.settings import get_clock
+
+    clock = get_clock(session, 0)
+    day_start, reset = clock.day_range(clock.today() - timedelta(days=1))
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    client.post("/calendar/block", json={"task_id": task_id, "start_time": (reset - timedelta(hours=2)).isoformat(),
+                                         "end_time": (reset + timedelta(hours=1)).isoformat()})
+    client.post("/timer/start", json={"task_id": task_id, "start_time": (day_start + timedelta(hours=1)).isoformat()})
+
+    assert client.get("/timer/active").json() is None  # rolled over at the day boundary and autosaved
+    blocks = session.exec(select(TimeBlock.start_time, TimeBlock.end_time).order_by(TimeBlock.start_time)).all()
+    assert blocks == [(day_start + timedelta(hours=1), reset), (reset, reset + timedelta(hours=1))]
+    assert client.get("/system/integrity").json()["overlaps"] == 0
+
+def test_integrity_scan_and_repair(client: TestClient, session: Session):
+    from datetime import datetime
+    from app.models import TimeBlock
+
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    at = lambda hour, minute=0: datetime(2026, 2, 20, hour, minute)
+    # Written straight to the table, the way a bad import or an old unlocked writer would.
+    for task, start, end in ((task_id, at(9), at(12)), (task_id, at(10), at(11)), (task_id, at(11, 30), at(13)),
+                             (task_id, at(13), at(13)), (999, at(14), at(15))):
+        session.add(TimeBlock(task_id=task, start_time=start, end_time=end))
+    session.commit()
+
+    report = client.get("/system/integrity").json()
+    assert (report["scanned"], report["overlaps"], report["zero_length"], report["orphans"]) == (5, 2, 1, 1)
+    assert not report["repaired"]
+
+    assert client.post("/system/integrity/repair").json()["repaired"]
+    after = client.get("/system/integrity").json()
+    assert (after["overlaps"], after["zero_length"], after["orphans"]) == (0, 0, 0)
+
+    blocks = client.get("/calendar/blocks?start=2026-02-20T00:00&end=2026-02-21T00:00").json()
+    assert [(b["start_time"][11:16], b["end_time"][11:16]) for b in sorted(blocks, key=lambda b: b["start_time"])] == [
+        ("09:00", "10:00"), ("10:00", "11:00"), ("11:00", "11:30"), ("11:30", "13:00"),
+    ]
+
+def test_compaction_merges_and_archives(client: TestClient, session: Session):
+    from datetime import datetime
+    from app import compaction
+    from app.models import ArchivedDay
+
+    code = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    mail = client.post("/tasks/", json={"title": "Mail"}).json()["id"]
+    for task, start, end in (
+        (code, "2026-02-20T09:00:00", "2026-02-20T09:30:00"),
+        (code, "2026-02-20T09:30:30", "2026-02-20T10:00:00"),  # resumed after a 30 s pause
+        (mail, "2026-02-20T10:00:00", "2026-02-20T10:30:00"),
+        (code, "2026-02-20T10:30:00", "2026-02-20T11:00:00"),  # Mail sits between this and 09:30
+        (code, "2026-02-20T11:00:00", "2026-02-20T11:20:00"),
+        (code, "2026-02-21T03:30:00", "2026-02-21T04:00:00"),  # still Feb 20's effective day
+        (code, "2026-02-21T04:00:00", "2026-02-21T04:30:00"),  # Feb 21: not merged across the boundary
+    ):
+        client.post("/calendar/block", json={"task_id": task, "start_time": start, "end_time": end})
+
+    report = compaction.compact(session, gap_seconds=60, archive_after_months=0, now=datetime(2026, 3, 10, 12))
+    assert (report.blocks_merged, report.live_blocks) == (2, 5)
+    blocks = client.get("/calendar/blocks?start=2026-02-20T00:00&end=2026-02-22T00:00").json()
+    assert sorted((b["start_time"][5:16], b["end_time"][5:16]) for b in blocks) == [
+        ("02-20T09:00", "02-20T10:00"), ("02-20T10:00", "02-20T10:30"), ("02-20T10:30", "02-20T11:20"),
+        ("02-21T03:30", "02-21T04:00"), ("02-21T04:00", "02-21T04:30"),
+    ]
+
+    dashboard_url = "/analytics/dashboard?start_date=2026-02-01T00:00&end_date=2026-03-01T00:00&granularity=day"
+    before = client.get(dashboard_url).json()
+    heatmap_before = client.get("/analytics/heatmap?year=2026").json()
+
+    report = compaction.compact(session, gap_seconds=60, archive_after_months=1, now=datetime(2026, 4, 10, 12))
+    assert (report.blocks_archived, report.days_archived, report.live_blocks) == (5, 3, 0)
+    assert report.archived_before == datetime(2026, 3, 1, 4)
+    assert len(session.exec(select(ArchivedDay)).all()) == 3
+
+    assert client.get(dashboard_url).json() == before
+    assert client.get("/analytics/heatmap?year=2026").json() == heatmap_before
+    assert client.get(f"/analytics/streak/{code}").json()["total_time_spent_minutes"] == 170
+    assert client.delete(f"/tasks/{code}").json()["task_deleted"] is False
+
+def test_sync_delta_feed(client: TestClient, session: Session):
+    from datetime import datetime, timedelta
+    from app.core import changelog
+
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    block = {"task_id": task_id, "start_time": "2026-02-20T09:00", "end_time": "2026-02-20T10:00"}
+    first_block = client.post("/calendar/block", json=block).json()["id"]
+
+    snapshot = client.get("/sync").json()
+    assert snapshot["reset"] and snapshot["revision"] > 0
+    assert [len(snapshot[k]) for k in ("categories", "tasks", "blocks", "timers")] == [1, 1, 1, 0]
+
+    revision = snapshot["revision"]
+    assert client.get(f"/sync?since={revision}").json() == {
+        "revision": revision, "reset": False, "categories": [], "tasks": [], "blocks": [], "timers": [], "deleted": {}
+    }
+
+    # Splits the first block, re-adds the task (bulk upsert) and replaces the timer (bulk delete).
+    client.post("/calendar/block", json={**block, "start_time": "2026-02-20T09:20", "end_time": "2026-02-20T09:40"})
+    client.post("/tasks/", json={"title": "code", "category_id": cat_id})
+    client.post("/timer/start", json={"task_id": task_id, "start_time": "2026-02-20T11:00"})
+    client.post("/timer/start", json={"task_id": task_id, "start_time": "2026-02-20T11:05"})
+
+    delta = client.get(f"/sync?since={revision}").json()
+    assert not delta["reset"] and delta["revision"] > revision
+    assert [t["id"] for t in delta["tasks"]] == [task_id]
+    assert sorted((b["start_time"][11:16], b["end_time"][11:16]) for b in delta["blocks"]) == [
+        ("09:00", "09:20"), ("09:20", "09:40"), ("09:40", "10:00")
+    ]
+    assert [t["start_time"] for t in delta["timers"]] == ["2026-02-20T11:05:00"]
+
+    only_tasks = client.get(f"/sync?since={revision}&tables=tasks").json()
+    assert only_tasks["blocks"] == [] and len(only_tasks["tasks"]) == 1
+
+    client.delete(f"/calendar/block/{first_block}")
+    assert client.get(f"/sync?since={revision}&tables=blocks").json()["deleted"] == {"blocks": [first_block]}
+    removed = changelog.truncate(session, datetime.utcnow() + timedelta(seconds=1))
+    session.commit()
+    assert removed == 1
+    assert client.get(f"/sync?since={revision}").json()["reset"]
+    assert not client.get(f"/sync?since={client.get('/sync').json()['revision']}").json()["reset"]
+
+def test_columnar_response_format(client: TestClient):
+    cat_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}).json()["id"]
+    task_id = client.post("/tasks/", json={"title": "Code", "category_id": cat_id}).json()["id"]
+    for start, end in (("2026-02-20T09:00", "2026-02-20T10:00"), ("2026-02-20T11:00", "2026-02-20T11:30")):
+        client.post("/calendar/block", json={"task_id": task_id, "start_time": start, "end_time": end})
+    columnar = {"Accept": "application/vnd.dailyfocus.columnar+json"}
+
+    blocks = client.get("/calendar/blocks?start=2026-02-20T04:00&end=2026-02-21T04:00", headers=columnar)
+    assert blocks.headers["content-type"] == "application/vnd.dailyfocus.columnar+json"
+    assert blocks.json() == {
+        "task_id": [task_id, task_id],
+        "start_time": ["2026-02-20T09:00:00", "2026-02-20T11:00:00"],
+        "end_time": ["2026-02-20T10:00:00", "2026-02-20T11:30:00"],
+        "id": [1, 2],
+    }
+    # The response model still applies: no normalized_title, same keys as the JSON rows.
+    tasks = client.get("/tasks/", headers=columnar).json()
+    assert set(tasks) == set(client.get("/tasks/").json()[0]) and tasks["title"] == ["Code"]
+
+    dashboard = client.get("/analytics/dashboard?start_date=2026-02-20T04:00&end_date=2026-02-21T04:00",
+                           headers=columnar).json()
+    assert dashboard["pie_chart"] == {"name": ["Work"], "value": [90.0], "color": ["#ff0000"]}
+
+    # q-values pick the format; unknown types fall back to plain JSON.
+    preferred = client.get("/tasks/", headers={"Accept": "application/json;q=0.5, application/vnd.dailyfocus.columnar+json"})
+    assert isinstance(preferred.json(), dict)
+    assert isinstance(client.get("/tasks/", headers={"Accept": "text/csv"}).json(), list)
+
+def test_binary_response_formats(client: TestClient):
+    msgpack = pytest.importorskip("msgpack")
+    pa = pytest.importorskip("pyarrow")
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    client.post("/calendar/block", json={"task_id": task_id, "start_time": "2026-02-20T09:00", "end_time": "2026-02-20T10:00"})
+    url = "/calendar/blocks?start=2026-02-20T04:00&end=2026-02-21T04:00"
+
+    packed = client.get(url, headers={"Accept": "application/msgpack"})
+    assert msgpack.unpackb(packed.content) == client.get(url).json()
+
+    table = pa.ipc.open_stream(client.get(url, headers={"Accept": "application/vnd.apache.arrow.stream"}).content).read_all()
+    assert table.column("id").to_pylist() == [1]
+    assert pa.types.is_timestamp(table.schema.field("start_time").type)
+
+def test_compression_skips_small_responses(client: TestClient):
+    from app.core.metrics import metrics
+
+    metrics.reset()
+    task_id = client.post("/tasks/", json={"title": "Code"}).json()["id"]
+    for day in range(1, 29):
+        client.post("/calendar/block", json={"task_id": task_id, "start_time": f"2026-02-{day:02d}T09:00", "end_time": f"2026-02-{day:02d}T10:00"})
+
+    blocks = client.get("/calendar/blocks?start=2026-02-01T00:00&end=2026-03-01T00:00", headers={"Accept-Encoding": "gzip"})
+    assert blocks.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in blocks.headers["vary"]
+    assert len(blocks.json()) == 28
+
+    timer = client.get("/timer/active", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in timer.headers
+    assert "content-encoding" not in client.get("/calendar/blocks?start=2026-02-01T00:00&end=2026-03-01T00:00",
+                                                headers={"Accept-Encoding": "identity"}).headers
+
+    stats = metrics.snapshot()["compression"]
+    assert stats["/calendar/blocks"]["compressed"] == 1
+    assert stats["/calendar/blocks"]["bytes_out"] < stats["/calendar/blocks"]["bytes_in"]
+    assert stats["/timer/active"]["compressed"] == 0
@@ -0,0 +1,102 @@
+"""
+test_columnar.py — The NumPy block store must agree with the SQL analytics path,
+including after incremental updates from write events.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.core import events
+from app.core.columnar import ColumnarBlockStore
+from app.models import Category, Task, TimeBlock
+from app.services import analytics, calendar, tasks
+from app.schemas import BatchDeleteRequest, TimeBlockCreate
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+RANGE = (datetime(2026, 2, 1, 4, 0), datetime(2026, 3, 1, 4, 0))
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture(name="store")
+def store_fixture():
+    store = ColumnarBlockStore()
+    events.subscribe(store.on_changes)
+    yield store
+    events.unsubscribe(store.on_changes)
+
+
+def seed(session):
+    work = Category(name="Work", color_hex="#ff0000")
+    life = Category(name="Life", color_hex="#00ff00")
+    session.add_all([work, life])
+    session.commit()
+    code, gym, misc = Task(title="Code", category_id=work.id), Task(title="Gym", category_id=life.id), Task(title="Misc")
+    session.add_all([code, gym, misc])
+    session.commit()
+    start = datetime(2026, 2, 10, 2, 0)
+    for day in range(10):
+        for i, task in enumerate((code, gym, misc)):
+            begin = start + timedelta(days=day, hours=3 * i)
+            session.add(TimeBlock(task_id=task.id, start_time=begin, end_time=begin + timedelta(minutes=25 + day + i)))
+    session.commit()
+    return code, gym, misc
+
+
+def normalized(report):
+    data = report.model_dump()
+    data["pie_chart"].sort(key=lambda p: p["name"])
+    data["task_breakdown"].sort(key=lambda t: t["task"])
+    return data
+
+
+def sql_dashboard(session, granularity="day"):
+    return analytics.dashboard(session, *RANGE, granularity)
+
+
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+def test_dashboard_matches_sql_path(session, store, granularity):
+    seed(session)
+    assert normalized(store.dashboard(session, *RANGE, granularity)) == normalized(sql_dashboard(session, granularity))
+
+
+def test_incremental_updates_match_sql_path(session, store):
+    code, gym, _ = seed(session)
+    store.refresh(session)
+
+    calendar.create_block(
+        session,
+        TimeBlockCreate(task_id=gym.id, start_time=datetime(2026, 2, 12, 4, 30), end_time=datetime(2026, 2, 12, 7, 0)),
+    )
+    tasks.batch_delete(session, BatchDeleteRequest(task_ids=[code.id]))
+
+    assert normalized(store.dashboard(session, *RANGE)) == normalized(sql_dashboard(session))
+
+
+def test_streak_counts_effective_days(session, store):
+    code, _, _ = seed(session)
+    # Code starts at 02:00, before the day boundary, so its last effective day is Feb 18.
+    today = datetime(2026, 2, 19).date()
+    report = store.streak(session, code, today)
+    assert report.current_streak_days == 10
+    assert report.tracked_days_count == 10
+    assert report.total_time_spent_minutes == sum(25 + d for d in range(10))
+
+
+def test_archived_days_are_reloaded(session, store):
+    from app import compaction
+
+    code, _, _ = seed(session)
+    store.refresh(session)
+    compaction.archive_before(session, datetime(2026, 2, 15, 4, 0))
+
+    assert normalized(store.dashboard(session, *RANGE)) == normalized(sql_dashboard(session))
+    assert store.streak(session, code, datetime(2026, 2, 19).date()).total_time_spent_minutes == sum(25 + d for d in range(10))
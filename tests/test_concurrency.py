@@ -0,0 +1,70 @@
+"""
+test_concurrency.py — Multi-process stress test for the timer and overlap-trimming write paths.
+
+Several worker processes hammer start_timer and create_time_block against one
+SQLite file, the same way `uvicorn --workers N` would. Afterwards there must be
+exactly one active timer and no two blocks may overlap.
+"""
+import multiprocessing
+import random
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.models import ActiveTimer, Category, Task, TimeBlock
+from app.services import calendar, timer
+from app.schemas import ActiveTimerCreate, TimeBlockCreate
+
+WORKERS = 4
+ITERATIONS = 25
+DAY_START = datetime(2026, 2, 20, 6, 0)
+
+
+def make_engine(db_path):
+    return create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False, "timeout": 60})
+
+
+def writer(db_path, task_ids, seed):
+    rng = random.Random(seed)
+    engine = make_engine(db_path)
+    for _ in range(ITERATIONS):
+        task_id = rng.choice(task_ids)
+        with Session(engine) as session:
+            timer.start_timer(session, ActiveTimerCreate(task_id=task_id, start_time=datetime.now()))
+
+        start = DAY_START + timedelta(minutes=rng.randrange(0, 8 * 60, 5))
+        end = start + timedelta(minutes=rng.randrange(5, 120, 5))
+        with Session(engine) as session:
+            calendar.create_block(session, TimeBlockCreate(task_id=task_id, start_time=start, end_time=end))
+    engine.dispose()
+
+
+def test_concurrent_writers_leave_consistent_state(tmp_path):
+    db_path = tmp_path / "stress.db"
+    engine = make_engine(db_path)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        cat = Category(name="Work", color_hex="#ff0000")
+        session.add(cat)
+        session.commit()
+        tasks = [Task(title=f"Task {i}", category_id=cat.id) for i in range(3)]
+        session.add_all(tasks)
+        session.commit()
+        task_ids = [t.id for t in tasks]
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=writer, args=(str(db_path), task_ids, seed)) for seed in range(WORKERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=120)
+        assert p.exitcode == 0
+
+    with Session(engine) as session:
+        assert len(session.exec(select(ActiveTimer)).all()) == 1
+
+        blocks = session.exec(select(TimeBlock).order_by(TimeBlock.start_time)).all()
+        assert blocks
+        for prev, cur in zip(blocks, blocks[1:]):
+            assert prev.end_time <= cur.start_time, f"block {prev.id} overlaps block {cur.id}"
+    engine.dispose()
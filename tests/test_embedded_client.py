@@ -0,0 +1,79 @@
+"""
+test_embedded_client.py — The in-process frontend client must answer exactly like the HTTP API.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.database import get_session
+from app.main import app
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "frontend"))
+from api_client import EmbeddedClient  # noqa: E402
+
+
+def memory_engine():
+    return create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+
+@pytest.fixture(name="http")
+def http_fixture():
+    engine = memory_engine()
+    SQLModel.metadata.create_all(engine)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+    app.dependency_overrides[get_session] = get_session_override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_embedded_client_matches_http(http):
+    embedded = EmbeddedClient(memory_engine())
+
+    def both(method, path, **kwargs):
+        remote = getattr(http, method)(path, **kwargs)
+        local = getattr(embedded, method)(path, **kwargs)
+        assert local.status_code == remote.status_code, path
+        return remote.json(), local.json()
+
+    def same(method, path, **kwargs):
+        remote, local = both(method, path, **kwargs)
+        assert local == remote, path
+        return remote
+
+    def same_task(method, path, **kwargs):
+        # created_at comes from each backend's own clock.
+        remote, local = both(method, path, **kwargs)
+        assert {**local, "created_at": None} == {**remote, "created_at": None}, path
+        return remote
+
+    cat_id = same("post", "/categories/", json={"name": "Work", "color_hex": "#ff0000"})["id"]
+    same("put", f"/categories/{cat_id}", json={"name": "Deep Work", "color_hex": "#00ff00"})
+    task_id = same_task("post", "/tasks/", json={"title": "Code", "category_id": cat_id})["id"]
+    same_task("put", f"/tasks/{task_id}", json={"is_completed": True})
+    block = {"task_id": task_id, "start_time": "2026-02-20T09:00:00", "end_time": "2026-02-20T10:00:00"}
+    block_id = same("post", "/calendar/block", json=block)["id"]
+    same("post", "/calendar/block", json={**block, "start_time": "2026-02-20T11:00:00", "end_time": "2026-02-20T10:00:00"})
+    same("put", f"/calendar/block/{block_id}", json={**block, "end_time": "2026-02-20T10:30:00"})
+    same("put", "/calendar/block/999", json=block)
+    same("get", "/calendar/blocks", params={"start": "2026-02-20T04:00:00", "end": "2026-02-21T04:00:00"})
+    same("get", "/calendar/gaps", params={"date": "2026-02-20", "min_minutes": 15})
+    same("get", "/calendar/timeline", params={"date": "2026-02-20"})
+    same("get", "/analytics/dashboard",
+         params={"start_date": "2026-02-20T04:00:00", "end_date": "2026-02-21T04:00:00", "limit": 15})
+    same("get", f"/analytics/streak/{task_id}")
+    same("get", "/analytics/heatmap", params={"task_id": task_id, "year": 2026})
+    same("post", "/timer/start", json={"task_id": task_id, "start_time": "2026-02-20T11:00:00"})
+    same("post", "/timer/pause")
+    same("delete", "/timer/active")
+    same("get", "/timer/active")
+    same("delete", f"/calendar/block/{block_id}")
+    assert both("get", "/sync", params={"since": 0, "tables": ["tasks"]})[1]["tasks"][0]["title"] == "Code"
+    same("delete", f"/tasks/force/{task_id}")
+    assert embedded.get("/no/such/path").status_code == 404
@@ -0,0 +1,168 @@
+"""
+test_owners.py — Users picked by X-User-Id share one backend but never see each other's rows.
+"""
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app import integrity
+from app.database import get_session
+from app.main import app
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+ALICE = {"X-User-Id": "1"}
+BOB = {"X-User-Id": "2"}
+MORNING = {"start_time": "2026-02-20T09:00:00", "end_time": "2026-02-20T10:00:00"}
+NOW = {"start_time": datetime.now().isoformat()}
+DAY = {"start_date": "2026-02-20T04:00:00", "end_date": "2026-02-21T04:00:00"}
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        yield session
+    app.dependency_overrides[get_session] = get_session_override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def new_task(client: TestClient, headers: dict, title: str = "Code") -> int:
+    category_id = client.post("/categories/", json={"name": "Work", "color_hex": "#ff0000"}, headers=headers).json()["id"]
+    response = client.post("/tasks/", json={"title": title, "category_id": category_id}, headers=headers)
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_users_only_see_their_own_rows(client: TestClient):
+    alice_task = new_task(client, ALICE)
+    bob_task = new_task(client, BOB)  # same title and category name: only deduped within a user
+    assert alice_task != bob_task
+
+    assert [t["id"] for t in client.get("/tasks/", headers=ALICE).json()] == [alice_task]
+    assert [t["id"] for t in client.get("/tasks/", headers=BOB).json()] == [bob_task]
+    assert client.get("/tasks/").json() == []  # no header: user 0
+
+    # Another user's ids behave like missing ones.
+    assert client.put(f"/tasks/{alice_task}", json={"is_completed": True}, headers=BOB).status_code == 404
+    assert client.delete(f"/tasks/force/{alice_task}", headers=BOB).status_code == 404
+    assert client.get(f"/analytics/streak/{alice_task}", headers=BOB).status_code == 404
+    assert client.post("/calendar/block", json={"task_id": alice_task, **MORNING}, headers=BOB).status_code == 404
+    assert client.post("/timer/start", json={"task_id": alice_task, **NOW}, headers=BOB).status_code == 404
+
+
+def test_timelines_are_per_user(client: TestClient, session: Session):
+    alice_task = new_task(client, ALICE)
+    bob_task = new_task(client, BOB)
+    # The same hour on both calendars: neither block trims the other.
+    alice_block = client.post("/calendar/block", json={"task_id": alice_task, **MORNING}, headers=ALICE).json()
+    bob_block = client.post("/calendar/block", json={"task_id": bob_task, **MORNING}, headers=BOB).json()
+    assert client.delete(f"/calendar/block/{alice_block['id']}", headers=BOB).status_code == 404
+
+    window = {"start": "2026-02-20T04:00:00", "end": "2026-02-21T04:00:00"}
+    assert [b["id"] for b in client.get("/calendar/blocks", params=window, headers=ALICE).json()] == [alice_block["id"]]
+    assert [b["id"] for b in client.get("/calendar/blocks", params=window, headers=BOB).json()] == [bob_block["id"]]
+    assert client.get("/analytics/dashboard", params=DAY, headers=ALICE).json()["total_minutes"] == 60
+    assert client.get("/analytics/dashboard", params=DAY).json()["total_minutes"] == 0
+
+    assert integrity.scan(session).overlaps == 0
+
+
+def test_timers_are_per_user(client: TestClient):
+    alice_task = new_task(client, ALICE)
+    bob_task = new_task(client, BOB)
+    client.post("/timer/start", json={"task_id": alice_task, **NOW}, headers=ALICE)
+    client.post("/timer/start", json={"task_id": bob_task, **NOW}, headers=BOB)
+
+    assert client.get("/timer/active", headers=ALICE).json()["task_id"] == alice_task
+    assert client.get("/timer/active", headers=BOB).json()["task_id"] == bob_task
+    client.delete("/timer/active", headers=ALICE)
+    assert client.get("/timer/active", headers=ALICE).json() is None
+    assert client.get("/timer/active", headers=BOB).json()["task_id"] == bob_task
+
+
+def test_sync_is_per_user(client: TestClient):
+    new_task(client, ALICE)
+    snapshot = client.get("/sync", headers=BOB).json()
+    assert snapshot["tasks"] == [] and snapshot["categories"] == []
+
+    bob_task = new_task(client, BOB, title="Gym")
+    new_task(client, ALICE, title="Read")
+    delta = client.get("/sync", params={"since": snapshot["revision"]}, headers=BOB).json()
+    assert [t["id"] for t in delta["tasks"]] == [bob_task]
+
+
+def test_system_maintenance_is_per_user(client: TestClient, session: Session):
+    from app.models import TimeBlock
+
+    alice_task = new_task(client, ALICE)
+    bob_task = new_task(client, BOB)
+    for owner_id, task_id in ((1, alice_task), (2, bob_task)):
+        # Overlapping pairs written straight to the table, the way an old import would.
+        session.add(TimeBlock(owner_id=owner_id, task_id=task_id,
+                              start_time=datetime(2026, 2, 20, 9), end_time=datetime(2026, 2, 20, 12)))
+        session.add(TimeBlock(owner_id=owner_id, task_id=task_id,
+                              start_time=datetime(2026, 2, 20, 10), end_time=datetime(2026, 2, 20, 11)))
+    session.commit()
+
+    report = client.get("/system/integrity", headers=ALICE).json()
+    assert (report["scanned"], report["overlaps"]) == (2, 1)
+    assert client.post("/system/integrity/repair", headers=ALICE).json()["repaired"]
+    assert integrity.scan(session, owner_id=1).overlaps == 0
+    assert integrity.scan(session, owner_id=2).overlaps == 1  # Bob's blocks weren't touched
+
+    assert client.post("/system/compact", headers=BOB).json()["live_blocks"] == 1  # same task: merged
+    assert len(client.get("/calendar/blocks", params={"start": "2026-02-20T00:00", "end": "2026-02-21T00:00"},
+                          headers=ALICE).json()) == 3
+
+
+def test_repairing_everyone_locks_each_user(client: TestClient, session: Session, monkeypatch):
+    from app.models import TimeBlock
+
+    locked = []
+    monkeypatch.setattr(integrity, "lock_timeline", lambda session, owner_id=0: locked.append(owner_id))
+    for owner_id in (1, 2):
+        session.add(TimeBlock(owner_id=owner_id, task_id=999,
+                              start_time=datetime(2026, 2, 20, 9), end_time=datetime(2026, 2, 20, 10)))
+    session.commit()
+
+    assert integrity.repair(session).orphans == 2
+    assert integrity.scan(session).scanned == 0
+    assert set(locked) == {1, 2}
+
+
+def test_repairing_everyone_leaves_no_overlaps_for_any_user(session: Session):
+    from datetime import timedelta
+    import random
+
+    from sqlmodel import delete
+    from app.models import Task, TimeBlock
+
+    rng = random.Random(49)
+    for _ in range(20):
+        session.exec(delete(TimeBlock))
+        session.exec(delete(Task))
+        for owner_id in (0, 1):
+            task = Task(title="Code", owner_id=owner_id)
+            session.add(task)
+            session.flush()
+            for _ in range(12):  # random blocks on one morning: plenty of nested and chained overlaps
+                start = datetime(2026, 2, 20, 8) + timedelta(minutes=rng.randrange(0, 240, 5))
+                session.add(TimeBlock(owner_id=owner_id, task_id=task.id, start_time=start,
+                                      end_time=start + timedelta(minutes=rng.randrange(5, 120, 5))))
+        session.commit()
+
+        integrity.repair(session, batch_size=4)
+        assert integrity.scan(session, owner_id=0).overlaps == 0
+        assert integrity.scan(session, owner_id=1).overlaps == 0
@@ -0,0 +1,94 @@
+"""
+test_partitions.py — Monthly timeblock partitions on Postgres, a plain table on SQLite.
+
+The Postgres tests need an empty scratch database: TEST_POSTGRES_URL=postgresql://... pytest
+"""
+import os
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import Session, SQLModel, create_engine
+
+from app import partitions
+from app.models import Task, TimeBlock
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+NOW = datetime(2026, 2, 20, 12, 0)
+needs_postgres = pytest.mark.skipif(not POSTGRES_URL, reason="set TEST_POSTGRES_URL to run against Postgres")
+
+
+def test_postgres_ddl_is_partitioned():
+    ddl = str(CreateTable(TimeBlock.__table__).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY RANGE (start_time)" in ddl
+    assert "PRIMARY KEY (id, start_time)" in ddl
+
+
+def test_sqlite_keeps_a_single_table():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    assert "ix_timeblock_owner_id_start_time" in {i["name"] for i in inspect(engine).get_indexes("timeblock")}
+    assert partitions.maintain(engine, NOW) == []
+
+
+def test_unconverted_postgres_table_keeps_its_range_index(monkeypatch):
+    index = next(i for i in TimeBlock.__table__.indexes if i.name == "ix_timeblock_owner_id_start_time")
+    postgres = type("Connection", (), {"dialect": postgresql.dialect()})()
+    for partitioned in (True, False):
+        monkeypatch.setattr(partitions, "is_partitioned", lambda connection: partitioned)
+        # Until --convert runs, the plain table needs the index the upgrade swaps for the retired one.
+        assert CreateIndex(index)._should_execute(TimeBlock.__table__, postgres) is not partitioned
+
+
+def test_month_bounds_follow_the_effective_day():
+    assert partitions.add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert partitions.partition_name(date(2026, 2, 1)) == "timeblock_y2026m02"
+    assert partitions.partition_bounds(date(2026, 2, 1)) == (datetime(2026, 2, 1, 4), datetime(2026, 3, 1, 4))
+
+
+@pytest.fixture(name="pg")
+def postgres_fixture():
+    engine = create_engine(POSTGRES_URL)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    yield engine
+    SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+@needs_postgres
+def test_maintain_creates_months_and_moves_late_history(pg):
+    partitions.maintain(pg, NOW)
+    with Session(pg) as session:
+        task = Task(title="Code")
+        session.add(task)
+        session.commit()
+        # Far older than any partition: lands in the default partition until maintain() runs again.
+        session.add(TimeBlock(task_id=task.id, start_time=datetime(2019, 6, 3, 9), end_time=datetime(2019, 6, 3, 10)))
+        session.add(TimeBlock(task_id=task.id, start_time=datetime(2026, 2, 10, 9), end_time=datetime(2026, 2, 10, 10)))
+        session.commit()
+
+    assert partitions.maintain(pg, NOW) == ["timeblock_y2019m06"]
+    with pg.connect() as connection:
+        names = partitions.partitions(connection)
+        assert {"timeblock_y2026m02", "timeblock_y2026m05", "timeblock_default"} <= set(names)
+        assert connection.execute(text("SELECT count(*) FROM timeblock_default")).scalar() == 0
+        assert connection.execute(text("SELECT count(*) FROM timeblock_y2019m06")).scalar() == 1
+        indexes = dict(connection.execute(text(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = 'timeblock_y2019m06'"
+        )).all())
+    assert "USING brin (start_time)" in indexes["timeblock_y2019m06_start_time_brin"]
+    assert "timeblock_y2019m06_owner_start_time_idx" not in indexes
+
+
+@needs_postgres
+def test_month_range_is_pruned_to_one_partition(pg):
+    partitions.maintain(pg, NOW)
+    with pg.connect() as connection:
+        plan = "\n".join(connection.execute(text(
+            "EXPLAIN SELECT * FROM timeblock WHERE start_time >= :start AND start_time < :end"
+        ), {"start": datetime(2026, 2, 1, 4), "end": datetime(2026, 3, 1, 4)}).scalars())
+    assert "timeblock_y2026m02" in plan
+    assert "timeblock_y2026m03" not in plan and "timeblock_default" not in plan
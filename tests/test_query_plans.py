@@ -0,0 +1,212 @@
+"""
+test_query_plans.py — The hot queries keep using their indexes.
+
+Each test runs a service call against the six months app.seed generates (~1400 blocks),
+records the SQL it sends and checks EXPLAIN QUERY PLAN (SQLite) or EXPLAIN (Postgres) of
+those statements. SQLite has no statistics unless ANALYZE ran, so its plans don't depend on
+the data; on Postgres sequential scans are disabled while explaining, so a Seq Scan in the
+plan means no index could serve the query, not that the tables are small.
+
+The Postgres tests need an empty scratch database: TEST_POSTGRES_URL=postgresql://... pytest
+"""
+import os
+import random
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, text
+from sqlmodel import Session, create_engine, select
+
+from app import partitions, seed
+from app.models import Task
+from app.schemas import BatchAnalyticsRequest, TaskCreate, TimeBlockCreate
+from app.services import analytics, calendar, tasks
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+needs_postgres = pytest.mark.skipif(not POSTGRES_URL, reason="set TEST_POSTGRES_URL to run against Postgres")
+
+# Last seeded day; May 2026 is in the middle of the data.
+NOW = datetime(2026, 8, 20, 12, 0)
+MAY = (datetime(2026, 5, 1, 4), datetime(2026, 6, 1, 4))
+MAY_3 = (datetime(2026, 5, 3, 4), datetime(2026, 5, 4, 4))
+MARCH = (datetime(2026, 3, 1, 4), datetime(2026, 4, 1, 4))
+
+
+@contextmanager
+def recorded(engine):
+    """Collects (statement, parameters) of everything sent to `engine`."""
+    statements = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if not statement.startswith(("BEGIN", "SELECT pg_advisory")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def explain(engine, statement, parameters) -> str:
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            return "\n".join(row[-1] for row in rows)
+        connection.execute(text("SET enable_seqscan = off"))
+        return "\n".join(connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).scalars())
+
+
+def plans(engine, call, table: str):
+    """Plans of the SELECTs `call(session)` sends that read `table`."""
+    with recorded(engine) as statements, Session(engine) as session:
+        call(session)
+    found = [explain(engine, s, p) for s, p in statements if s.startswith("SELECT") and f"FROM {table}" in s]
+    assert found, f"no statement on {table} was sent"
+    return found
+
+
+def inserts(engine, call, table: str):
+    with recorded(engine) as statements, Session(engine) as session:
+        call(session)
+    return [(s, p) for s, p in statements if s.startswith(f"INSERT INTO {table} ")]
+
+
+def sqlite_probes(engine, statement, parameters, index: str) -> bool:
+    """Whether an INSERT's bytecode checks `index` for conflicts (EXPLAIN QUERY PLAN shows nothing for INSERTs)."""
+    with engine.connect() as connection:
+        rootpage = connection.execute(text("SELECT rootpage FROM sqlite_master WHERE name = :name"), {"name": index}).scalar()
+        program = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+    cursors = {row[2] for row in program if row[1] in ("OpenRead", "OpenWrite") and row[3] == rootpage}
+    return any(row[1] == "NoConflict" and row[2] in cursors for row in program)
+
+
+def create_task(session):
+    tasks.create_task(session, TaskCreate(title="review prs", category_id=1))
+
+
+def create_block(session):
+    task_id = session.exec(select(Task.id)).first()
+    calendar.create_block(session, TimeBlockCreate(
+        task_id=task_id, start_time=datetime(2026, 5, 3, 10, 15), end_time=datetime(2026, 5, 3, 11, 45)
+    ))
+
+
+def compare_months(session):
+    analytics.batch_dashboard(session, BatchAnalyticsRequest(ranges=[
+        {"name": "march", "start_date": MARCH[0], "end_date": MARCH[1]},
+        {"name": "may", "start_date": MAY[0], "end_date": MAY[1]},
+    ]))
+
+
+def streak(session):
+    analytics.task_streak(session, session.exec(select(Task.id).where(Task.title == "Morning Workout")).one())
+
+
+# ── SQLite ───────────────────────────────────────────────────────────
+
+@pytest.fixture(name="lite", scope="module")
+def sqlite_fixture(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('plans') / 'seeded.db'}")
+    random.seed(48)
+    seed.seed(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_sqlite_dashboard_scans_only_the_range(lite):
+    for plan in plans(lite, lambda s: analytics.dashboard(s, *MAY, limit=15), "timeblock"):
+        assert "SEARCH timeblock USING INDEX ix_timeblock_owner_id_start_time (owner_id=? AND start_time>? AND start_time<?)" in plan
+        assert "SEARCH archivedday USING INDEX ix_archivedday_owner_id_start_time (owner_id=? AND start_time>? AND start_time<?)" in plan
+
+
+def test_sqlite_batch_reads_each_range_not_the_span(lite):
+    for plan in plans(lite, compare_months, "timeblock"):
+        searches = [line for line in plan.splitlines() if line.startswith("SEARCH timeblock")]
+        assert searches == ["SEARCH timeblock USING INDEX ix_timeblock_owner_id_start_time (owner_id=? AND start_time>? AND start_time<?)"] * 2
+        assert "SCAN timeblock" not in plan
+
+
+def test_sqlite_overlap_check_uses_start_time(lite):
+    for plan in plans(lite, create_block, "timeblock"):
+        assert "SEARCH timeblock USING INDEX ix_timeblock_owner_id_start_time (owner_id=? AND start_time" in plan
+        assert "SCAN timeblock" not in plan and "TEMP B-TREE FOR ORDER BY" not in plan
+
+
+def test_sqlite_streak_fetches_one_task(lite):
+    for plan in plans(lite, streak, "timeblock"):
+        assert "SEARCH timeblock USING INDEX ix_timeblock_task_id (task_id=?)" in plan
+        # Either archivedday index starting with task_id will do.
+        assert any(line.startswith("SEARCH archivedday USING INDEX") and line.endswith("(task_id=?)") for line in plan.splitlines())
+
+
+def test_sqlite_create_task_dedupes_through_the_unique_index(lite):
+    (statement, parameters), = inserts(lite, create_task, "task")
+    assert sqlite_probes(lite, statement, parameters, "ux_task_owner_id_normalized_title_category")
+
+
+def test_sqlite_block_window(lite):
+    (plan,) = plans(lite, lambda s: calendar.list_blocks(s, *MAY_3), "timeblock")
+    assert plan == "SEARCH timeblock USING INDEX ix_timeblock_owner_id_start_time (owner_id=? AND start_time>? AND start_time<?)"
+
+
+# ── Postgres ─────────────────────────────────────────────────────────
+
+@pytest.fixture(name="pg", scope="module")
+def postgres_fixture():
+    engine = create_engine(POSTGRES_URL)
+    random.seed(48)
+    seed.seed(engine)
+    partitions.maintain(engine, NOW)  # hot/cold partition indexes as of the last seeded day
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    yield engine
+    seed.SQLModel.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def no_seq_scans(plan: str):
+    assert "Seq Scan on timeblock" not in plan and "Seq Scan on archivedday" not in plan and "Seq Scan on task " not in plan
+
+
+@needs_postgres
+def test_postgres_dashboard_is_pruned_to_the_range(pg):
+    for plan in plans(pg, lambda s: analytics.dashboard(s, *MAY, limit=15), "timeblock"):
+        no_seq_scans(plan)
+        assert "timeblock_y2026m05" in plan
+        assert "timeblock_y2026m04" not in plan and "timeblock_default" not in plan
+
+
+@needs_postgres
+def test_postgres_batch_skips_the_months_between_ranges(pg):
+    for plan in plans(pg, compare_months, "timeblock"):
+        no_seq_scans(plan)
+        assert "timeblock_y2026m03" in plan and "timeblock_y2026m05" in plan
+        assert "timeblock_y2026m04" not in plan
+
+
+@needs_postgres
+def test_postgres_overlap_check(pg):
+    for plan in plans(pg, create_block, "timeblock"):
+        no_seq_scans(plan)
+
+
+@needs_postgres
+def test_postgres_streak_uses_task_id(pg):
+    for plan in plans(pg, streak, "timeblock"):
+        no_seq_scans(plan)
+        assert "task_id_idx" in plan
+
+
+@needs_postgres
+def test_postgres_create_task_arbiter(pg):
+    (statement, parameters), = inserts(pg, create_task, "task")
+    assert "Conflict Arbiter Indexes: ux_task_owner_id_normalized_title_category" in explain(pg, statement, parameters)
+
+
+@needs_postgres
+def test_postgres_block_window(pg):
+    (plan,) = plans(pg, lambda s: calendar.list_blocks(s, *MAY_3), "timeblock")
+    no_seq_scans(plan)
+    assert "timeblock_y2026m05" in plan and "timeblock_y2026m04" not in plan
@@ -0,0 +1,121 @@
+"""
+test_settings.py — Each user's day start hour and time zone decide their effective days.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app import compaction
+from app.core.config import OFFSET_HOURS
+from app.core.timebuckets import UserClock, effective_date, effective_range
+from app.database import get_session
+from app.main import app
+from app.models import ArchivedDay, TimeBlock
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+EARLY_BIRD = {"X-User-Id": "1"}
+# 01:00-02:00 on Feb 21: still Feb 20 with days starting at 4 AM, already Feb 21 with midnight.
+NIGHT = {"start_time": "2026-02-21T01:00:00", "end_time": "2026-02-21T02:00:00"}
+RANGE = {"start_date": "2026-02-19T00:00:00", "end_date": "2026-02-23T00:00:00", "granularity": "day"}
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        yield session
+    app.dependency_overrides[get_session] = get_session_override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def log_night(client: TestClient, headers: dict) -> int:
+    task_id = client.post("/tasks/", json={"title": "Read"}, headers=headers).json()["id"]
+    client.post("/calendar/block", json={"task_id": task_id, **NIGHT}, headers=headers)
+    return task_id
+
+
+def bar_dates(client: TestClient, headers: dict):
+    return [bar["date"] for bar in client.get("/analytics/dashboard", params=RANGE, headers=headers).json()["bar_chart"]]
+
+
+def test_defaults_and_validation(client: TestClient):
+    settings = client.get("/settings/").json()
+    assert settings["day_start_hour"] == OFFSET_HOURS and settings["time_zone"] is None
+
+    assert client.put("/settings/", json={"day_start_hour": 24}).status_code == 422
+    assert client.put("/settings/", json={"day_start_hour": 6, "time_zone": "Mars/Olympus"}).status_code == 400
+    saved = client.put("/settings/", json={"day_start_hour": 6, "time_zone": "Europe/Berlin"}, headers=EARLY_BIRD).json()
+    assert saved["day_start_hour"] == 6 and saved["time_zone"] == "Europe/Berlin"
+    assert client.get("/settings/").json()["day_start_hour"] == OFFSET_HOURS  # other users keep the defaults
+
+
+def test_days_follow_the_users_day_start(client: TestClient):
+    log_night(client, {})
+    log_night(client, EARLY_BIRD)
+    assert bar_dates(client, {}) == bar_dates(client, EARLY_BIRD) == ["2026-02-20"]
+
+    client.put("/settings/", json={"day_start_hour": 0}, headers=EARLY_BIRD)
+    assert bar_dates(client, EARLY_BIRD) == ["2026-02-21"]  # the cached report was dropped
+    assert bar_dates(client, {}) == ["2026-02-20"]
+
+    timeline = client.get("/calendar/timeline", params={"date": "2026-02-21"}, headers=EARLY_BIRD).json()
+    assert timeline["day_start"] == "2026-02-21T00:00:00" and len(timeline["columns"]["id"]) == 1
+    heatmap = client.get("/analytics/heatmap", params={"year": 2026}, headers=EARLY_BIRD).json()
+    assert heatmap["minutes_rle"] == [[0, 51], [60, 1], [0, 313]]  # Feb 21 is day 52
+
+
+def test_archived_days_move_with_the_day_start(client: TestClient, session: Session):
+    log_night(client, EARLY_BIRD)
+    compaction.archive_before(session, datetime(2026, 3, 1, 4))
+    (day,) = session.exec(select(ArchivedDay)).all()
+    assert day.start_time == datetime(2026, 2, 20, 4)
+
+    client.put("/settings/", json={"day_start_hour": 6}, headers=EARLY_BIRD)
+    session.expire_all()
+    assert session.exec(select(ArchivedDay.start_time)).one() == datetime(2026, 2, 20, 6)
+    assert bar_dates(client, EARLY_BIRD) == ["2026-02-20"]
+
+
+def test_clock_converts_now_to_the_users_zone():
+    clock = UserClock(day_start_hour=4, time_zone="Asia/Tokyo")
+    at = datetime(2026, 2, 20, 20, 30, tzinfo=timezone.utc)
+    assert clock.now(at) == datetime(2026, 2, 21, 5, 30)
+    assert clock.today(at).isoformat() == "2026-02-21"
+    assert UserClock(day_start_hour=6).date_of(datetime(2026, 2, 21, 5)).isoformat() == "2026-02-20"
+
+
+def test_deleting_a_task_clears_the_users_today(client: TestClient, session: Session):
+    client.put("/settings/", json={"day_start_hour": 0, "time_zone": "Pacific/Kiritimati"}, headers=EARLY_BIRD)
+    clock = UserClock(day_start_hour=0, time_zone="Pacific/Kiritimati")
+    user_start, user_end = clock.day_range(clock.today())
+    server_start, _ = effective_range(effective_date(datetime.now()))
+    # 14 hours ahead of UTC: part of the user's today is never the server's default today.
+    start = user_start if user_start < server_start else user_end - timedelta(minutes=30)
+
+    task_id = client.post("/tasks/", json={"title": "Read"}, headers=EARLY_BIRD).json()["id"]
+    session.add(TimeBlock(owner_id=1, task_id=task_id, start_time=start, end_time=start + timedelta(minutes=30)))
+    session.add(TimeBlock(owner_id=1, task_id=task_id, start_time=user_start - timedelta(days=3),
+                          end_time=user_start - timedelta(days=3, minutes=-30)))
+    session.commit()
+
+    client.delete(f"/tasks/{task_id}", headers=EARLY_BIRD)
+    session.expire_all()
+    assert session.exec(select(TimeBlock.start_time)).all() == [user_start - timedelta(days=3)]
+
+
+def test_archive_cutoff_follows_the_users_months():
+    now = datetime(2026, 3, 1, 2)  # still February with days starting at 4 AM
+    assert compaction._months_back(now, 1, UserClock()) == datetime(2026, 1, 1, 4)
+    assert compaction._months_back(now, 1, UserClock(day_start_hour=0)) == datetime(2026, 2, 1, 0)
@@ -0,0 +1,107 @@
+"""
+test_singleflight.py — Concurrent identical analytics requests share one computation.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.singleflight import SingleFlight
+from app.models import Task, TimeBlock
+from app.services import analytics
+
+RANGE = (datetime(2026, 2, 20, 4), datetime(2026, 2, 21, 4))
+CALLERS = 4
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_concurrent_calls_share_one_result():
+    flights, release, calls = SingleFlight("test"), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return object()
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        futures = [pool.submit(flights.do, "key", compute) for _ in range(CALLERS)]
+        _wait_for(lambda: flights.waiting() == CALLERS - 1)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert all(r is results[0] for r in results)
+    assert len(calls) == 1
+    assert flights.do("key", lambda: "fresh") == "fresh"  # nothing is kept afterwards
+
+
+def test_each_owner_keeps_their_own_results():
+    flights = SingleFlight("test", keep=2, owners=2)
+    flights.do((1, "today"), lambda: "alice")
+    for n in range(5):  # a busy user only pushes out their own results
+        flights.do((2, n), lambda n=n: n)
+    assert flights.do((1, "today"), lambda: "recomputed") == "alice"
+    assert flights.do((2, 0), lambda: "recomputed") == "recomputed"
+
+    flights.do((3, "today"), lambda: "carol")  # a third user drops the least recently served one
+    assert flights.do((2, 4), lambda: "recomputed") == 4
+    assert flights.do((1, "today"), lambda: "recomputed") == "recomputed"
+
+
+def test_errors_are_shared_too():
+    flights = SingleFlight("test")
+    with pytest.raises(ValueError):
+        flights.do("key", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flights.in_flight() == 0
+
+
+def test_dashboard_key_includes_the_revision(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'flights.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        task = Task(title="Code")
+        session.add(task)
+        session.commit()
+        session.add(TimeBlock(task_id=task.id, start_time=datetime(2026, 2, 20, 9), end_time=datetime(2026, 2, 20, 10)))
+        session.commit()
+        task_id = task.id
+
+    computed, entered, release = [], threading.Event(), threading.Event()
+    real_dashboard = analytics._dashboard
+
+    def slow_dashboard(*args):
+        computed.append(1)
+        entered.set()
+        release.wait(5)
+        return real_dashboard(*args)
+
+    monkeypatch.setattr(analytics, "_dashboard", slow_dashboard)
+
+    def load():
+        with Session(engine) as session:
+            return analytics.dashboard(session, *RANGE, "day")
+
+    with ThreadPoolExecutor(CALLERS) as pool:
+        leader = pool.submit(load)
+        entered.wait(5)
+        followers = [pool.submit(load) for _ in range(CALLERS - 1)]
+        _wait_for(lambda: analytics._flights["dashboard"].waiting() == CALLERS - 1)
+        release.set()
+        reports = [leader.result()] + [f.result() for f in followers]
+    assert len(computed) == 1
+    assert all(r is reports[0] and r.total_minutes == 60 for r in reports)
+
+    # A write bumps the revision, so the next request computes instead of reusing anything.
+    with Session(engine) as session:
+        session.add(TimeBlock(task_id=task_id, start_time=datetime(2026, 2, 20, 11), end_time=datetime(2026, 2, 20, 11, 30)))
+        session.commit()
+    assert load().total_minutes == 90
+    assert len(computed) == 2
@@ -0,0 +1,70 @@
+"""
+test_startup.py — Keeps the API's cold start cheap.
+
+Importing app.main must not pull in the heavy optional dependencies (they are loaded
+by the endpoints that use them), and init_db must only run DDL when the models change.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlmodel import Session, create_engine, text
+
+from app import models  # noqa: F401  registers the tables on SQLModel.metadata
+from app.database import init_db
+from app.schemas import TaskCreate
+from app.services.tasks import create_task
+
+ROOT = Path(__file__).resolve().parent.parent
+LAZY = ("numpy", "pandas", "plotly", "psutil")
+
+
+def test_importing_the_api_skips_heavy_dependencies():
+    env = {**os.environ, "DATABASE_URL": "sqlite://", "COLUMNAR_ANALYTICS": "0"}
+    script = f"import sys, json, app.main; print(json.dumps([m for m in {LAZY!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+def test_init_db_skips_ddl_when_schema_is_unchanged(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+    assert init_db(engine) is True
+    assert init_db(engine) is False
+
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE schema_fingerprint SET fingerprint = 'stale'"))
+    assert init_db(engine) is True
+    assert init_db(engine) is False
+
+
+def test_init_db_upgrades_tables_from_before_owners(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE category (id INTEGER PRIMARY KEY, name VARCHAR NOT NULL, color_hex VARCHAR NOT NULL)"))
+        connection.execute(text("CREATE INDEX ix_category_name ON category (name)"))
+        connection.execute(text("INSERT INTO category (name, color_hex) VALUES ('Work', '#ff0000')"))
+        # The task table as it was before normalized titles and owners.
+        connection.execute(text(
+            "CREATE TABLE task (id INTEGER PRIMARY KEY, title VARCHAR NOT NULL, is_completed BOOLEAN NOT NULL, "
+            "is_streak BOOLEAN NOT NULL, created_at DATETIME NOT NULL, category_id INTEGER REFERENCES category (id))"
+        ))
+        connection.execute(text(
+            "INSERT INTO task (title, is_completed, is_streak, created_at, category_id) VALUES "
+            "('Café', 0, 0, '2026-01-01', 1), ('ÉCOLE\t', 0, 0, '2026-01-01', 1), ('Code', 0, 0, '2026-01-01', NULL)"
+        ))
+    assert init_db(engine) is True
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT owner_id FROM category")).scalar() == 0
+        indexes = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'category'")).scalars().all()
+        # Backfilled the way normalize_title() does it, not with SQL lower() (ASCII only).
+        titles = connection.execute(text("SELECT normalized_title, owner_id FROM task ORDER BY id")).all()
+        task_indexes = connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'task'")).scalars().all()
+    assert "ix_category_owner_id_name" in indexes and "ix_category_name" not in indexes
+    assert titles == [("café", 0), ("école", 0), ("code", 0)]
+    assert "ux_task_owner_id_normalized_title_category" in task_indexes
+
+    with Session(engine) as session:  # new tasks dedupe against the old rows
+        assert create_task(session, TaskCreate(title=" CAFÉ ", category_id=1)).id == 1
@@ -0,0 +1,57 @@
+"""
+test_warmup.py — The startup warm-up fills the analytics cache under the frontend's keys.
+"""
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine, update
+
+from app import warmup
+from app.core.metrics import metrics
+from app.core.timebuckets import effective_range
+from app.models import ChangeLog, Task, TimeBlock
+from app.services import analytics
+
+NOW = datetime(2026, 2, 20, 12, 0)
+
+
+def test_warm_up_precomputes_frontend_requests(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warmup.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        gym = Task(title="Gym", is_streak=True)
+        session.add(gym)
+        session.commit()
+        session.add(TimeBlock(task_id=gym.id, start_time=datetime(2026, 2, 20, 9), end_time=datetime(2026, 2, 20, 10)))
+        session.commit()
+
+    metrics.reset()
+    # Four dashboards plus a streak and a heatmap for the one streak task.
+    assert warmup.warm_up(engine, now=NOW, pause_ratio=0) == 6
+    assert metrics.snapshot()["warmup"]["last_run"]["reports"] == 6
+
+    # Same request as the frontend's analytics tab on its default "today" view.
+    start, end = effective_range(NOW.date())
+    with Session(engine) as session:
+        report = analytics.dashboard(session, start, end, limit=warmup.DASHBOARD_LIMIT)
+    assert report.total_minutes == 60
+    assert metrics.snapshot()["singleflight"]["dashboard"]["reused"] == 1
+
+
+def test_warm_up_skips_inactive_users(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'warmup.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Task(title="Gym", is_streak=True, owner_id=1))
+        session.add(Task(title="Gym", is_streak=True, owner_id=2))
+        session.commit()
+        # User 2 hasn't changed anything in months.
+        session.exec(update(ChangeLog).where(ChangeLog.owner_id == 2).values(changed_at=datetime.utcnow() - timedelta(days=90)))
+        session.commit()
+        assert warmup.active_owners(session) == [1]
+
+    assert warmup.warm_up(engine, now=NOW, pause_ratio=0) == 6
+
+
+def test_seconds_until_rollover():
+    assert warmup.seconds_until_rollover(datetime(2026, 2, 20, 3, 0)) == 3600
+    assert warmup.seconds_until_rollover(datetime(2026, 2, 20, 4, 0)) == 24 * 3600